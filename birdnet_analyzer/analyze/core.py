@@ -1,4 +1,7 @@
+import collections
+import contextlib
 import os
+import time
 from typing import Literal
 
 
@@ -19,7 +22,8 @@ def analyze(
     audio_speed: float = 1.0,
     batch_size: int = 1,
     combine_results: bool = False,
-    rtype: Literal["table", "audacity", "kaleidoscope", "csv"] | list[Literal["table", "audacity", "kaleidoscope", "csv"]] = "table",
+    rtype: Literal["table", "audacity", "kaleidoscope", "csv", "sqlite", "scores"]
+    | list[Literal["table", "audacity", "kaleidoscope", "csv", "sqlite", "scores"]] = "table",
     skip_existing_results: bool = False,
     sf_thresh: float = 0.03,
     top_n: int | None = None,
@@ -27,6 +31,15 @@ def analyze(
     threads: int = 8,
     locale: str = "en",
     additional_columns: list[str] | None = None,
+    model_precision: Literal["fp32", "fp16", "int8"] = "fp32",
+    prefetch_depth: int = 1,
+    scores_top_k: int = 0,
+    from_scores: str | None = None,
+    autotune: bool = False,
+    max_memory: float | None = None,
+    activity_threshold: float | Literal["auto"] | None = None,
+    cascade: Literal["fp16", "int8"] | None = None,
+    cascade_threshold: float = 0.1,
 ):
     """
     Analyzes audio files for bird species detection using the BirdNET-Analyzer.
@@ -44,17 +57,34 @@ def analyze(
         fmin (int, optional): Minimum frequency for analysis in Hz. Defaults to 0.
         fmax (int, optional): Maximum frequency for analysis in Hz. Defaults to 15000.
         audio_speed (float, optional): Speed factor for audio playback during analysis. Defaults to 1.0.
-        batch_size (int, optional): Batch size for processing. Defaults to 1.
+        batch_size (int, optional): Batch size for processing, files shorter than a batch share their batches. Defaults to 1.
         combine_results (bool, optional): Whether to combine results into a single file. Defaults to False.
-        rtype (Literal["table", "audacity", "kaleidoscope", "csv"] | List[Literal["table", "audacity", "kaleidoscope", "csv"]], optional):
-            Output format(s) for results. Defaults to "table".
-        skip_existing_results (bool, optional): Whether to skip analysis for files with existing results. Defaults to False.
+        rtype (Literal["table", "audacity", "kaleidoscope", "csv", "sqlite", "scores"] | List[Literal[...]], optional):
+            Output format(s) for results. "sqlite" writes the detections of all files to a single database,
+            "scores" stores the raw model outputs of all segments. Defaults to "table".
+        skip_existing_results (bool, optional): Whether to skip analysis for files with existing results. Interrupted runs
+            are resumed from the last completed range of each file. Defaults to False.
         sf_thresh (float, optional): Threshold for species filtering. Defaults to 0.03.
         top_n (int | None, optional): Limit the number of top detections per file. Defaults to None.
         merge_consecutive (int, optional): Merge consecutive detections within this time window in seconds. Defaults to 1.
         threads (int, optional): Number of CPU threads to use for analysis. Defaults to 8.
         locale (str, optional): Locale for species names and output. Defaults to "en".
         additional_columns (list[str] | None, optional): Additional columns to include in the output. Defaults to None.
+        model_precision (Literal["fp32", "fp16", "int8"], optional): Precision of the BirdNET model. Defaults to "fp32".
+        prefetch_depth (int, optional): Number of audio blocks decoded ahead while analyzing, 0 disables prefetching. Defaults to 1.
+        scores_top_k (int, optional): Number of highest model outputs per segment stored with rtype "scores", 0 stores all. Defaults to 0.
+        from_scores (str | None, optional): Output folder of a previous run with rtype "scores". If set, results are
+            generated from the stored model outputs instead of running the model. Defaults to None.
+        autotune (bool, optional): Whether to measure the fastest number of worker processes, TFLite threads and batch size
+            for the given threads on this machine and use them instead of the threads and batch size. Defaults to False.
+        max_memory (float | None, optional): Memory budget of the analysis in MB. The decoding window and the number of
+            prefetched blocks of each worker are reduced to fit the budget. Defaults to None.
+        activity_threshold (float | Literal["auto"] | None, optional): Level in dB relative to full scale below which chunks
+            are skipped without running the model. "auto" calibrates the level against the model on the first chunks of the files.
+            Defaults to None.
+        cascade (Literal["fp16", "int8"] | None, optional): Precision of the model that analyzes all chunks first. Only chunks
+            with a score of an allowed species >= cascade_threshold are analyzed again with the model_precision model. Defaults to None.
+        cascade_threshold (float, optional): Score that makes a chunk a candidate for the second stage of the cascade. Defaults to 0.1.
     Returns:
         None
     Raises:
@@ -67,9 +97,24 @@ def analyze(
     from multiprocessing import Pool
 
     import birdnet_analyzer.config as cfg
-    from birdnet_analyzer.analyze.utils import analyze_file, save_analysis_params
+    from birdnet_analyzer.analyze.utils import (
+        DatabaseWriter,
+        RunManifest,
+        analyze_task,
+        get_task_duration,
+        get_worker_stats,
+        init_worker,
+        print_activity_stats,
+        print_cascade_stats,
+        print_worker_utilization,
+        reset_activity_stats,
+        reset_cascade_stats,
+        save_analysis_params,
+        save_file_parts,
+        timed_analyze_task,
+    )
     from birdnet_analyzer.analyze.utils import combine_results as combine
-    from birdnet_analyzer.utils import ensure_model_exists
+    from birdnet_analyzer.utils import ensure_model_exists, get_peak_rss_mb
 
     ensure_model_exists()
 
@@ -98,6 +143,15 @@ def analyze(
         threads=threads,
         labels_file=cfg.LABELS_FILE,
         additional_columns=additional_columns,
+        model_precision=model_precision,
+        prefetch_depth=prefetch_depth,
+        scores_top_k=scores_top_k,
+        from_scores=from_scores,
+        autotune=autotune,
+        max_memory=max_memory,
+        activity_threshold=activity_threshold,
+        cascade=cascade,
+        cascade_threshold=cascade_threshold,
     )
 
     print(f"Found {len(cfg.FILE_LIST)} files to analyze")
@@ -107,18 +161,115 @@ def analyze(
     else:
         print(f"Species list contains {len(cfg.SPECIES_LIST)} species")
 
-    result_files = []
+    # Resumed runs continue from the ranges that were completed before
+    manifest = RunManifest(os.path.join(cfg.OUTPUT_PATH, cfg.RUN_MANIFEST_FILENAME)) if cfg.SKIP_EXISTING_RESULTS else None
+    tasks = _group_short_files(_get_tasks(flist, threads, manifest))
+    file_results = {fpath: manifest.get_result(fpath) for fpath in flist} if manifest else {}
 
-    # Analyze files
-    if cfg.CPU_THREADS < 2 or len(flist) < 2:
-        result_files.extend(analyze_file(f) for f in flist)
-    else:
-        with Pool(cfg.CPU_THREADS) as p:
-            # Map analyzeFile function to each entry in flist
-            results = p.map_async(analyze_file, flist)
-            # Wait for all tasks to complete
-            results.wait()
-            result_files = results.get()
+    # Ranges of split files are collected until all ranges of a file are done
+    file_parts = collections.defaultdict(dict)
+
+    for task in tasks:
+        if isinstance(task, tuple):
+            file_parts[task[0]][task[1:]] = None
+
+    if manifest:
+        for fpath, parts in file_parts.items():
+            parts.update((key, part) for key, part in manifest.get_checkpoints(fpath).items() if key in parts)
+
+        tasks = [task for task in tasks if not isinstance(task, tuple) or file_parts[task[0]][task[1:]] is None]
+
+    remaining = collections.Counter(task[0] for task in tasks if isinstance(task, tuple))
+
+    def save_result(task, result):
+        if isinstance(task, list):
+            for fpath, file_result in zip(task, result, strict=True):
+                file_results[fpath] = file_result
+
+                if manifest:
+                    manifest.add_result(fpath, file_result)
+
+            return
+
+        if not isinstance(task, tuple):
+            file_results[task] = result
+            return
+
+        fpath = task[0]
+        file_parts[fpath][task[1:]] = result
+
+        if manifest and result is not None:
+            manifest.add_checkpoint(task, result)
+
+        remaining[fpath] -= 1
+
+        if remaining[fpath] == 0:
+            save_parts(fpath)
+
+    def save_parts(fpath):
+        file_results[fpath] = save_file_parts(fpath, list(file_parts[fpath].values()))
+
+        if manifest:
+            manifest.add_result(fpath, file_results[fpath])
+
+    db_writer = DatabaseWriter(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_SQLITE_FILENAME)) if "sqlite" in cfg.RESULT_TYPES else None
+
+    with db_writer or contextlib.nullcontext():
+        try:
+            # Files with all ranges completed in a previous run only have to be saved
+            for fpath in file_parts:
+                if not remaining[fpath]:
+                    save_parts(fpath)
+
+            # Analyze files
+            if cfg.CPU_THREADS < 2 or len(tasks) < 2:
+                reset_activity_stats()
+                reset_cascade_stats()
+
+                for task in tasks:
+                    save_result(task, analyze_task(task))
+
+                if tasks and (peak_rss := get_peak_rss_mb()) is not None:
+                    print(f"Peak memory: {peak_rss:.0f} MB", flush=True)
+
+                if cfg.ACTIVITY_THRESHOLD is not None:
+                    print_activity_stats([get_worker_stats()["activity"]])
+
+                if cfg.CASCADE_PRECISION:
+                    print_cascade_stats([get_worker_stats()["cascade"]])
+            else:
+                # Longest tasks first, so short files fill the gaps at the end instead of a long file starting last
+                order = sorted(range(len(tasks)), key=lambda i: get_task_duration(tasks[i]), reverse=True)
+                busy_times = collections.defaultdict(float)
+                task_counts = collections.Counter()
+                worker_stats = {}
+                start_time = time.perf_counter()
+
+                # The configuration is sent to each worker once, tasks only carry the file path
+                with Pool(cfg.CPU_THREADS, initializer=init_worker, initargs=(cfg.get_config(), db_writer.queue if db_writer else None)) as p:
+                    # Hand out one task at a time, idle workers pick up the next one
+                    for index, pid, busy_time, stats, result in p.imap_unordered(timed_analyze_task, ((i, tasks[i]) for i in order), chunksize=1):
+                        save_result(tasks[index], result)
+                        busy_times[pid] += busy_time
+                        task_counts[pid] += 1
+
+                        # Stats are totals since the worker started
+                        worker_stats[pid] = stats
+
+                peak_memory = {pid: stats["peak_memory"] for pid, stats in worker_stats.items()}
+                print_worker_utilization(busy_times, task_counts, time.perf_counter() - start_time, cfg.CPU_THREADS, peak_memory)
+
+                if cfg.ACTIVITY_THRESHOLD is not None:
+                    print_activity_stats([stats["activity"] for stats in worker_stats.values()])
+
+                if cfg.CASCADE_PRECISION:
+                    print_cascade_stats([stats["cascade"] for stats in worker_stats.values()])
+
+        finally:
+            if manifest:
+                manifest.save(force=True)
+
+    result_files = [file_results.get(fpath) for fpath in flist]
 
     # Combine results?
     if cfg.COMBINE_RESULTS:
@@ -129,6 +280,127 @@ def analyze(
     save_analysis_params(os.path.join(cfg.OUTPUT_PATH, cfg.ANALYSIS_PARAMS_FILENAME))
 
 
+def _get_tasks(flist, threads, manifest=None):
+    """Splits long files into ranges that are analyzed by separate workers.
+
+    A single input file is split when more than one thread is available, the threads are then
+    shared between the workers and the TFLite interpreters. Files of a directory are only split
+    when they are analyzed by multiple workers anyway. When a run is resumed, all files are split,
+    so completed ranges are kept even if the run is interrupted again.
+
+    Args:
+        flist: List of file paths.
+        threads: Number of CPU threads.
+        manifest: The RunManifest of a resumed run or None.
+
+    Returns:
+        A list of file paths for whole files and (file path, start, end) tuples for ranges of a file.
+    """
+    import birdnet_analyzer.config as cfg
+    from birdnet_analyzer.analyze.utils import get_file_parts, get_result_file_names, has_results
+
+    if manifest is not None:
+        tasks = []
+
+        for fpath in flist:
+            if manifest.get_result(fpath) is not None:
+                print(f"Skipping {fpath} as it has already been analyzed", flush=True)
+                continue
+
+            # Results of an output folder without a manifest are only checked for existence,
+            # results of other settings are replaced
+            if not manifest.loaded and not manifest.stale and has_results(fpath, get_result_file_names(fpath)):
+                print(f"Skipping {fpath} as it has already been analyzed", flush=True)
+                continue
+
+            parts = [(0, None)] if cfg.SCORES_INPUT_PATH else get_file_parts(fpath)
+            tasks.extend((fpath, start, end) for start, end in parts)
+
+        if len(flist) == 1 and cfg.CPU_THREADS < 2 and threads > 1 and len(tasks) > 1 and not cfg.PERFORMANCE_AUTOTUNE:
+            cfg.CPU_THREADS = min(threads, len(tasks))
+            cfg.TFLITE_THREADS = max(1, threads // cfg.CPU_THREADS)
+
+        return tasks
+
+    # Score files are read at once, only audio files are split
+    if cfg.SCORES_INPUT_PATH:
+        return flist
+
+    # Tuned workers and TFLite threads are kept
+    if len(flist) == 1 and cfg.CPU_THREADS < 2 and threads > 1 and not cfg.PERFORMANCE_AUTOTUNE:
+        parts = get_file_parts(flist[0])
+
+        if len(parts) < 2:
+            return flist
+
+        cfg.CPU_THREADS = min(threads, len(parts))
+        cfg.TFLITE_THREADS = max(1, threads // cfg.CPU_THREADS)
+
+        return [(flist[0], start, end) for start, end in parts]
+
+    if cfg.CPU_THREADS < 2:
+        return flist
+
+    tasks = []
+
+    for fpath in flist:
+        parts = get_file_parts(fpath)
+
+        if len(parts) < 2:
+            tasks.append(fpath)
+        else:
+            tasks.extend((fpath, start, end) for start, end in parts)
+
+    return tasks
+
+
+def _group_short_files(tasks):
+    """Combines files that are shorter than a batch into tasks with shared batches.
+
+    Groups cover about FILE_SPLITTING_DURATION seconds of audio, like the ranges of split files.
+
+    Args:
+        tasks: List of tasks from _get_tasks.
+
+    Returns:
+        The tasks with lists of file paths for groups of short files.
+    """
+    import birdnet_analyzer.config as cfg
+    from birdnet_analyzer.analyze.utils import get_task_duration
+
+    # Score files are read at once, without running the model
+    if cfg.BATCH_SIZE < 2 or cfg.SCORES_INPUT_PATH:
+        return tasks
+
+    batch_duration = cfg.BATCH_SIZE * (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+    grouped = []
+    group = []
+    group_duration = 0.0
+
+    def add_group():
+        grouped.append([task[0] if isinstance(task, tuple) else task for task in group] if len(group) > 1 else group[0])
+
+    for task in tasks:
+        duration = get_task_duration(task)
+
+        # Ranges of split files are analyzed on their own
+        if (isinstance(task, tuple) and task[1:] != (0, None)) or duration >= batch_duration:
+            grouped.append(task)
+            continue
+
+        group.append(task)
+        group_duration += duration
+
+        if group_duration >= cfg.FILE_SPLITTING_DURATION:
+            add_group()
+            group, group_duration = [], 0.0
+
+    if group:
+        add_group()
+
+    return grouped
+
+
 def _set_params(
     audio_input,
     output,
@@ -154,9 +426,21 @@ def _set_params(
     threads,
     labels_file=None,
     additional_columns=None,
+    model_precision="fp32",
+    prefetch_depth=1,
+    scores_top_k=0,
+    from_scores=None,
+    autotune=False,
+    max_memory=None,
+    activity_threshold=None,
+    cascade=None,
+    cascade_threshold=0.1,
 ):
+    from multiprocessing import Pool
+
     import birdnet_analyzer.config as cfg
-    from birdnet_analyzer.analyze.utils import load_codes
+    from birdnet_analyzer.analyze.utils import autotune as run_autotune
+    from birdnet_analyzer.analyze.utils import calibrate_activity_threshold, get_memory_limits, init_worker, load_codes
     from birdnet_analyzer.species.utils import get_species_list
     from birdnet_analyzer.utils import collect_audio_files, read_lines
 
@@ -175,6 +459,12 @@ def _set_params(
     if audio_speed <= 0:
         raise ValueError("Audio speed must be a positive value.")
 
+    if model_precision not in cfg.MODEL_PRECISION_PATHS:
+        raise ValueError(f"Model precision must be one of {', '.join(cfg.MODEL_PRECISION_PATHS)}.")
+
+    if cascade is not None and cascade not in cfg.MODEL_PRECISION_PATHS:
+        raise ValueError(f"Cascade precision must be one of {', '.join(cfg.MODEL_PRECISION_PATHS)}.")
+
     cfg.CODES = load_codes()
     cfg.LABELS = read_lines(labels_file if labels_file else cfg.LABELS_FILE)
     cfg.SKIP_EXISTING_RESULTS = skip_existing_results
@@ -192,6 +482,22 @@ def _set_params(
     cfg.COMBINE_RESULTS = combine_results
     cfg.BATCH_SIZE = bs
     cfg.ADDITIONAL_COLUMNS = additional_columns
+    cfg.MODEL_PRECISION = model_precision
+    cfg.MODEL_PATH = cfg.MODEL_PRECISION_PATHS[model_precision]
+    cfg.PREFETCH_DEPTH = max(0, int(prefetch_depth))
+    cfg.SCORES_TOP_K = max(0, int(scores_top_k))
+    cfg.SCORES_INPUT_PATH = from_scores
+    cfg.PERFORMANCE_AUTOTUNE = autotune and not from_scores
+    cfg.MAX_MEMORY = max_memory
+    cfg.ACTIVITY_THRESHOLD = None if from_scores or activity_threshold == "auto" else activity_threshold
+
+    # The cascade only applies to the BirdNET model
+    cfg.CASCADE_PRECISION = cascade if cascade != model_precision and not custom_classifier and not from_scores else None
+    cfg.CASCADE_THRESHOLD = cascade_threshold
+
+    # Stored scores are not written again
+    if from_scores:
+        cfg.RESULT_TYPES = [t for t in ([rtype] if isinstance(rtype, str) else rtype) if t != "scores"]
 
     if not output:
         if os.path.isfile(cfg.INPUT_PATH):
@@ -265,4 +571,31 @@ def _set_params(
     else:
         cfg.TRANSLATED_LABELS = cfg.LABELS
 
-    return [(f, cfg.get_config()) for f in cfg.FILE_LIST]
+    if cfg.PERFORMANCE_AUTOTUNE:
+        tuned = run_autotune(threads)
+        cfg.CPU_THREADS = tuned["cpu_threads"]
+        cfg.TFLITE_THREADS = tuned["tflite_threads"]
+        cfg.BATCH_SIZE = tuned["batch_size"]
+
+        print(
+            f"Using {cfg.CPU_THREADS} worker(s) with {cfg.TFLITE_THREADS} TFLite thread(s) and batch size {cfg.BATCH_SIZE}",
+            flush=True,
+        )
+
+    if cfg.MAX_MEMORY:
+        # Single files may be split across all threads later
+        workers = cfg.CPU_THREADS if cfg.PERFORMANCE_AUTOTUNE else threads
+        cfg.FILE_SPLITTING_DURATION, cfg.PREFETCH_DEPTH = get_memory_limits(cfg.MAX_MEMORY, workers)
+
+        print(
+            f"Using a decoding window of {cfg.FILE_SPLITTING_DURATION} seconds and {cfg.PREFETCH_DEPTH} prefetched block(s) "
+            f"for {cfg.MAX_MEMORY:.0f} MB with {workers} worker(s)",
+            flush=True,
+        )
+
+    if activity_threshold == "auto" and not from_scores:
+        # In a separate process, so workers forked later do not inherit a loaded model
+        with Pool(1, initializer=init_worker, initargs=(cfg.get_config(),)) as p:
+            cfg.ACTIVITY_THRESHOLD = p.apply(calibrate_activity_threshold, (cfg.FILE_LIST,))
+
+    return cfg.FILE_LIST
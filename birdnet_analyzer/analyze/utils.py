@@ -1,9 +1,20 @@
 """Module to analyze audio samples."""
 
+import contextlib
 import datetime
+import hashlib
+import itertools
 import json
-import operator
+import math
+import multiprocessing
 import os
+import platform
+import queue
+import re
+import shutil
+import sqlite3
+import threading
+import time
 from collections.abc import Sequence
 
 import numpy as np
@@ -18,6 +29,78 @@ KALEIDOSCOPE_HEADER = "INDIR,FOLDER,IN FILE,OFFSET,DURATION,scientific_name,comm
 CSV_HEADER = "Start (s),End (s),Scientific name,Common name,Confidence,File\n"
 SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
 
+# Buffer size of the result files
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# One row per detection: segment start and end in seconds, index of the label in cfg.LABELS and confidence
+DETECTION_DTYPE = np.dtype([("start", "f8"), ("end", "f8"), ("label", "i4"), ("score", "f4")])
+
+# Labels, translated labels and codes the label table was built from and the table
+LABEL_TABLE = None
+
+# Labels and species list the species mask of the cascade was built from and the mask
+CASCADE_SPECIES_MASK = None
+
+# Tables and indexes of the 'sqlite' result database
+DATABASE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, duration REAL, recorded_at TEXT, lat REAL, lon REAL, week INTEGER)",
+    "CREATE TABLE IF NOT EXISTS species (id INTEGER PRIMARY KEY, label TEXT UNIQUE NOT NULL, scientific_name TEXT, common_name TEXT, code TEXT)",
+    "CREATE TABLE IF NOT EXISTS detections ("
+    "file_id INTEGER NOT NULL REFERENCES files (id), species_id INTEGER NOT NULL REFERENCES species (id), "
+    "start REAL NOT NULL, end REAL NOT NULL, confidence REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS detections_species_confidence ON detections (species_id, confidence)",
+    "CREATE INDEX IF NOT EXISTS detections_file_start ON detections (file_id, start)",
+)
+
+# Number of detections inserted into the result database before the transaction is committed
+DATABASE_COMMIT_ROWS = 100000
+
+# Queue of the process that writes the result database, detections are written directly if None
+DATABASE_QUEUE = None
+
+# Minimum number of seconds between two writes of the run manifest
+MANIFEST_SAVE_INTERVAL = 10.0
+
+# Batch sizes and seconds per batch size measured by the autotuner
+AUTOTUNE_BATCH_SIZES = (1, 4, 8, 16, 32)
+AUTOTUNE_DURATION = 1.0
+
+# Estimated memory of a worker without audio and models (Python and TensorFlow) in MB
+WORKER_BASE_MEMORY = 500
+
+# Estimated memory of each interpreter the inference engine allocates in MB, for the model
+# and per sample of its batch shape. The engine keeps one interpreter per batch shape.
+INTERPRETER_MEMORY = 60
+INTERPRETER_SAMPLE_MEMORY = 8
+
+# Peak memory of decoding a block, relative to the decoded signal. Covers multi-channel
+# source audio, the mono mix and the float64 copies of resampling and filtering.
+WINDOW_MEMORY_FACTOR = 12
+
+# Shortest decoding window in seconds that is used with a memory budget
+MIN_WINDOW_DURATION = 30
+
+# Length of the frames in seconds whose energy is compared to the activity threshold
+ACTIVITY_FRAME_LENGTH = 0.05
+
+# Maximum number of chunks covered by a batch when chunks are skipped, so long
+# silent stretches do not hold back the outputs of the analyzed chunks
+ACTIVITY_MAX_SPAN = 256
+
+# Number of chunks analyzed with the full model to calibrate the activity threshold
+# and the margin in dB below the quietest chunk with a detection
+ACTIVITY_CALIBRATION_CHUNKS = 512
+ACTIVITY_CALIBRATION_MARGIN = 6.0
+
+# Chunks checked and skipped by the activity pre-screen since the worker started
+ACTIVITY_STATS = {"chunks": 0, "skipped": 0}
+
+# Chunks and seconds spent in both stages of the cascade since the worker started
+CASCADE_STATS = {"chunks": 0, "rescored": 0, "first_stage_time": 0.0, "second_stage_time": 0.0}
+
+# Recording date and time in file names like 20240512_053000.wav
+RECORDING_TIME_PATTERN = re.compile(r"(?<!\d)(\d{4})(\d{2})(\d{2})[_T-]?(\d{2})(\d{2})(\d{2})(?!\d)")
+
 
 def save_analysis_params(path):
     utils.save_params(
@@ -33,6 +116,10 @@ def save_analysis_params(path):
             "Merge consecutive detections",
             "Audio speed",
             "Custom classifier path",
+            "Model precision",
+            "Activity threshold",
+            "Cascade precision",
+            "Cascade threshold",
         ),
         (
             cfg.FILE_SPLITTING_DURATION,
@@ -45,6 +132,10 @@ def save_analysis_params(path):
             cfg.MERGE_CONSECUTIVE,
             cfg.AUDIO_SPEED,
             cfg.CUSTOM_CLASSIFIER,
+            cfg.MODEL_PRECISION,
+            cfg.ACTIVITY_THRESHOLD,
+            cfg.CASCADE_PRECISION,
+            cfg.CASCADE_THRESHOLD if cfg.CASCADE_PRECISION else None,
         ),
     )
 
@@ -59,224 +150,487 @@ def load_codes():
         return json.load(cfile)
 
 
-def generate_raven_table(timestamps: list[str], result: dict[str, list], afile_path: str, result_path: str):
-    """
-    Generates a Raven selection table from the given timestamps and prediction results.
+class LabelTable:
+    """Names of all labels, indexed by label id.
 
     Args:
-        timestamps (list[str]): List of timestamp strings in the format "start-end".
-        result (dict[str, list]): Dictionary where keys are timestamp strings and values are lists of predictions.
-        afile_path (str): Path to the audio file being analyzed.
-        result_path (str): Path where the resulting Raven selection table will be saved.
+        labels: The model labels in the format "Scientific name_Common name".
+        translated_labels: The translated labels, same order as the labels.
+        codes: Dictionary of eBird codes by label.
+    """
+
+    def __init__(self, labels: list[str], translated_labels: list[str] | None = None, codes: dict[str, str] | None = None):
+        translated_labels = translated_labels or labels
+        codes = codes or {}
+
+        self.labels = labels
+        self.scientific_names = [label.split("_", 1)[0] for label in translated_labels]
+        self.common_names = [label.split("_", 1)[-1] for label in translated_labels]
+        self.codes = [codes.get(label, label) for label in labels]
+        self.audacity_labels = [label.replace("_", ", ") for label in translated_labels]
+
+
+def get_label_table() -> LabelTable:
+    """Returns the label table of the current labels.
+
+    The table is only rebuilt if the labels, translations or codes in cfg are replaced.
 
     Returns:
-        None
+        The LabelTable of cfg.LABELS.
+    """
+    global LABEL_TABLE  # noqa: PLW0603
+
+    key = (cfg.LABELS, cfg.TRANSLATED_LABELS, cfg.CODES)
+
+    if LABEL_TABLE is None or any(a is not b for a, b in zip(LABEL_TABLE[0], key, strict=True)):
+        LABEL_TABLE = key, LabelTable(*key)
+
+    return LABEL_TABLE[1]
+
+
+class ResultWriter:
+    """Base class of the result file writers.
+
+    Rows are formatted per detection and streamed to a buffered file, so the memory usage
+    does not depend on the number of detections. Writers are context managers.
+
+    Args:
+        result_path: Path of the result file.
+        afile_path: Path to the analyzed audio file.
+        labels: Label table, defaults to the table of the current labels.
+        settings: Audio settings the detections were computed with, defaults to get_audio_settings().
+        duration: Length of the audio file in seconds, None if unknown.
     """
-    selection_id = 0
-    out_string = RAVEN_TABLE_HEADER
 
-    # Read native sample rate
-    high_freq = audio.get_sample_rate(afile_path) / 2
+    header = ""
+
+    def __init__(self, result_path: str, afile_path: str, labels: LabelTable | None = None, settings: dict | None = None, duration: float | None = None):
+        os.makedirs(os.path.dirname(result_path), exist_ok=True)
+
+        self.afile_path = afile_path
+        self.duration = duration
+        self.labels = labels or get_label_table()
+        self.settings = settings or get_audio_settings()
+        self.rows = 0
+        self.file = open(result_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)  # noqa: SIM115
+        self.file.write(self.header)
+
+    def format_rows(self, detections: np.ndarray):
+        """Yields the lines of the detections."""
+        raise NotImplementedError
+
+    def write(self, detections: np.ndarray):
+        """Writes sorted detections with DETECTION_DTYPE."""
+        self.file.writelines(self.format_rows(detections))
+        self.rows += len(detections)
+
+    def close(self):
+        """Closes the result file."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RavenTableWriter(ResultWriter):
+    """Writes a Raven selection table."""
+
+    header = RAVEN_TABLE_HEADER
+
+    def __init__(self, result_path: str, afile_path: str, labels: LabelTable | None = None, settings: dict | None = None, duration: float | None = None):
+        super().__init__(result_path, afile_path, labels, settings, duration)
+
+        speed = self.settings["audio_speed"]
+
+        # Read native sample rate
+        high_freq = audio.get_sample_rate(afile_path) / 2
+        high_freq = min(high_freq, int(cfg.SIG_FMAX / speed))
+
+        self.high_freq = int(min(high_freq, int(self.settings["bandpass_fmax"] / speed)))
+        self.low_freq = max(cfg.SIG_FMIN, int(self.settings["bandpass_fmin"] / speed))
+
+    def format_rows(self, detections: np.ndarray):
+        common_names, codes = self.labels.common_names, self.labels.codes
+        freqs, afile_path = f"{self.low_freq}\t{self.high_freq}", self.afile_path
+
+        for selection_id, (start, end, label, score) in enumerate(detections.tolist(), start=self.rows + 1):
+            yield f"{selection_id}\tSpectrogram 1\t1\t{start}\t{end}\t{freqs}\t{common_names[label]}\t{codes[label]}\t{score:.4f}\t{afile_path}\t{start}\n"
+
+    def close(self):
+        # If we don't have any valid predictions, we still need to add a line to the selection table
+        # in case we want to combine results, it spans the file if its length is known
+        if not self.rows and cfg.OUTPUT_PATH is not None:
+            end = self.duration if self.duration is not None else 3
+            self.file.write(f"1\tSpectrogram 1\t1\t0\t{end}\t{self.low_freq}\t{self.high_freq}\tnocall\tnocall\t1.0\t{self.afile_path}\t0\n")
+
+        super().close()
+
+
+class AudacityWriter(ResultWriter):
+    """Writes an Audacity timeline label file."""
+
+    def format_rows(self, detections: np.ndarray):
+        audacity_labels = self.labels.audacity_labels
+
+        for start, end, label, score in detections.tolist():
+            yield f"{start}\t{end}\t{audacity_labels[label]}\t{score:.4f}\n"
+
+
+class KaleidoscopeWriter(ResultWriter):
+    """Writes a Kaleidoscope-compatible CSV file."""
+
+    header = KALEIDOSCOPE_HEADER
 
-    high_freq = min(high_freq, int(cfg.SIG_FMAX / cfg.AUDIO_SPEED))
+    def format_rows(self, detections: np.ndarray):
+        folder_path, filename = os.path.split(self.afile_path)
+        parent_folder, folder_name = os.path.split(folder_path)
+        prefix = f"{parent_folder.rstrip('/')},{folder_name},{filename}"
+        suffix = f"{cfg.LATITUDE:.4f},{cfg.LONGITUDE:.4f},{cfg.WEEK},{self.settings['sig_overlap']},{cfg.SIGMOID_SENSITIVITY}"
+        scientific_names, common_names = self.labels.scientific_names, self.labels.common_names
 
-    high_freq = int(min(high_freq, int(cfg.BANDPASS_FMAX / cfg.AUDIO_SPEED)))
-    low_freq = max(cfg.SIG_FMIN, int(cfg.BANDPASS_FMIN / cfg.AUDIO_SPEED))
+        for start, end, label, score in detections.tolist():
+            yield f"{prefix},{start},{end - start},{scientific_names[label]},{common_names[label]},{score:.4f},{suffix}\n"
 
-    # Extract valid predictions for every timestamp
-    for timestamp in timestamps:
-        rstring = ""
-        start, end = timestamp.split("-", 1)
 
-        for c in result[timestamp]:
-            selection_id += 1
-            label = cfg.TRANSLATED_LABELS[cfg.LABELS.index(c[0])] if cfg.TRANSLATED_LABELS else c[0]
-            code = cfg.CODES[c[0]] if c[0] in cfg.CODES else c[0]
-            rstring += (
-                f"{selection_id}\tSpectrogram 1\t1\t{start}\t{end}\t{low_freq}\t{high_freq}\t{label.split('_', 1)[-1]}\t{code}\t{c[1]:.4f}\t{afile_path}\t{start}\n"
-            )
+class CSVWriter(ResultWriter):
+    """Writes a CSV file, with the additional columns from cfg.ADDITIONAL_COLUMNS."""
 
-        # Write result string to file
-        out_string += rstring
+    def __init__(self, result_path: str, afile_path: str, labels: LabelTable | None = None, settings: dict | None = None, duration: float | None = None):
+        from birdnet_analyzer.analyze import POSSIBLE_ADDITIONAL_COLUMNS_MAP
 
-    # If we don't have any valid predictions, we still need to add a line to the selection table
-    # in case we want to combine results
-    # TODO: That's a weird way to do it, but it works for now. It would be better to keep track
-    # of file durations during the analysis.
-    if len(out_string) == len(RAVEN_TABLE_HEADER) and cfg.OUTPUT_PATH is not None:
-        selection_id += 1
-        out_string += f"{selection_id}\tSpectrogram 1\t1\t0\t3\t{low_freq}\t{high_freq}\tnocall\tnocall\t1.0\t{afile_path}\t0\n"
+        settings = settings or get_audio_settings()
+        columns_map = {}
 
-    utils.save_result_file(result_path, out_string)
+        if cfg.ADDITIONAL_COLUMNS:
+            for col in cfg.ADDITIONAL_COLUMNS:
+                if col in POSSIBLE_ADDITIONAL_COLUMNS_MAP:
+                    columns_map[col] = settings["sig_overlap"] if col == "overlap" else POSSIBLE_ADDITIONAL_COLUMNS_MAP[col]()
 
+        self.header = CSV_HEADER[:-1] + "," + ",".join(columns_map) + "\n" if columns_map else CSV_HEADER
+        self.suffix = afile_path + "".join("," + str(val) for val in columns_map.values())
 
-def generate_audacity(timestamps: list[str], result: dict[str, list], result_path: str):
+        super().__init__(result_path, afile_path, labels, settings, duration)
+
+    def format_rows(self, detections: np.ndarray):
+        scientific_names, common_names, suffix = self.labels.scientific_names, self.labels.common_names, self.suffix
+
+        for start, end, label, score in detections.tolist():
+            yield f"{start},{end},{scientific_names[label]},{common_names[label]},{score:.4f},{suffix}\n"
+
+
+RESULT_WRITERS = {"table": RavenTableWriter, "audacity": AudacityWriter, "kaleidoscope": KaleidoscopeWriter, "csv": CSVWriter}
+
+
+def generate_raven_table(detections: np.ndarray, afile_path: str, result_path: str):
+    """
+    Generates a Raven selection table from the given detections.
+
+    Args:
+        detections (np.ndarray): Sorted detections with DETECTION_DTYPE.
+        afile_path (str): Path to the audio file being analyzed.
+        result_path (str): Path where the resulting Raven selection table will be saved.
+    """
+    with RavenTableWriter(result_path, afile_path) as writer:
+        writer.write(detections)
+
+
+def generate_audacity(detections: np.ndarray, result_path: str):
     """
-    Generates an Audacity timeline label file from the given timestamps and results.
+    Generates an Audacity timeline label file from the given detections.
 
     Args:
-        timestamps (list[str]): A list of timestamp strings.
-        result (dict[str, list]): A dictionary where keys are timestamps and values are lists of tuples,
-                                  each containing a label and a confidence score.
+        detections (np.ndarray): Sorted detections with DETECTION_DTYPE.
         result_path (str): The file path where the result string will be saved.
+    """
+    with AudacityWriter(result_path, "") as writer:
+        writer.write(detections)
 
-    Returns:
-        None
+
+def generate_kaleidoscope(detections: np.ndarray, afile_path: str, result_path: str):
     """
-    out_string = ""
+    Generates a Kaleidoscope-compatible CSV file from the given detections.
 
-    # Audacity timeline labels
-    for timestamp in timestamps:
-        rstring = ""
+    Args:
+        detections (np.ndarray): Sorted detections with DETECTION_DTYPE.
+        afile_path (str): Path to the audio file being analyzed.
+        result_path (str): Path where the resulting CSV file will be saved.
+    """
+    with KaleidoscopeWriter(result_path, afile_path) as writer:
+        writer.write(detections)
 
-        for c in result[timestamp]:
-            label = cfg.TRANSLATED_LABELS[cfg.LABELS.index(c[0])] if cfg.TRANSLATED_LABELS else c[0]
-            ts = timestamp.replace("-", "\t")
-            lbl = label.replace("_", ", ")
-            rstring += f"{ts}\t{lbl}\t{c[1]:.4f}\n"
 
-        # Write result string to file
-        out_string += rstring
+def generate_csv(detections: np.ndarray, afile_path: str, result_path: str):
+    """
+    Generates a CSV file from the given detections.
 
-    utils.save_result_file(result_path, out_string)
+    Args:
+        detections (np.ndarray): Sorted detections with DETECTION_DTYPE.
+        afile_path (str): The file path of the audio file being analyzed.
+        result_path (str): The file path where the resulting CSV file will be saved.
+    """
+    with CSVWriter(result_path, afile_path) as writer:
+        writer.write(detections)
 
 
-def generate_kaleidoscope(timestamps: list[str], result: dict[str, list], afile_path: str, result_path: str):
+def save_result_files(
+    detections: np.ndarray, result_files: dict[str, str], afile_path: str, scores: dict[str, np.ndarray] | None = None, duration: float | None = None
+):
     """
-    Generates a Kaleidoscope-compatible CSV string from the given timestamps and results, and saves it to a file.
+    Saves the result files in various formats based on the provided configuration.
 
     Args:
-        timestamps (list[str]): List of timestamp strings in the format "start-end".
-        result (dict[str, list]): Dictionary where keys are timestamp strings and values are lists of tuples containing
-                                  species label and confidence score.
-        afile_path (str): Path to the audio file being analyzed.
-        result_path (str): Path where the resulting CSV file will be saved.
+        detections (np.ndarray): The detections of the file with DETECTION_DTYPE.
+        result_files (dict[str, str]): A dictionary mapping result types to their respective file paths.
+        afile_path (str): The path to the audio file being analyzed.
+        scores (dict[str, np.ndarray] | None): The compressed raw model outputs, saved for the "scores" result type.
+        duration (float | None): The length of the audio file in seconds, read from the file if None.
 
     Returns:
         None
     """
-    out_string = KALEIDOSCOPE_HEADER
 
-    folder_path, filename = os.path.split(afile_path)
-    parent_folder, folder_name = os.path.split(folder_path)
+    os.makedirs(cfg.OUTPUT_PATH, exist_ok=True)
+
+    # Merge consecutive detections of the same species
+    detections = sort_detections(merge_consecutive_detections(detections, cfg.MERGE_CONSECUTIVE))
+    labels = get_label_table()
+    settings = get_audio_settings(afile_path) if any(rtype in RESULT_WRITERS for rtype in result_files) else None
 
-    for timestamp in timestamps:
-        rstring = ""
-        start, end = timestamp.split("-", 1)
+    if duration is None and ("table" in result_files or "sqlite" in result_files):
+        duration = audio.get_audio_file_length(afile_path)
 
-        for c in result[timestamp]:
-            label = cfg.TRANSLATED_LABELS[cfg.LABELS.index(c[0])] if cfg.TRANSLATED_LABELS else c[0]
-            rstring += "{},{},{},{},{},{},{},{:.4f},{:.4f},{:.4f},{},{},{}\n".format(
-                parent_folder.rstrip("/"),
-                folder_name,
-                filename,
-                start,
-                float(end) - float(start),
-                label.split("_", 1)[0],
-                label.split("_", 1)[-1],
-                c[1],
-                cfg.LATITUDE,
-                cfg.LONGITUDE,
-                cfg.WEEK,
-                cfg.SIG_OVERLAP,
-                cfg.SIGMOID_SENSITIVITY,
-            )
+    with contextlib.ExitStack() as stack:
+        for rtype, result_path in result_files.items():
+            if rtype in RESULT_WRITERS:
+                stack.enter_context(RESULT_WRITERS[rtype](result_path, afile_path, labels, settings, duration)).write(detections)
 
-        # Write result string to file
-        out_string += rstring
+    if "scores" in result_files:
+        save_scores(result_files["scores"], scores)
 
-    utils.save_result_file(result_path, out_string)
+    if "sqlite" in result_files:
+        save_to_database(result_files["sqlite"], afile_path, detections, duration)
 
 
-def generate_csv(timestamps: list[str], result: dict[str, list], afile_path: str, result_path: str):
-    """
-    Generates a CSV file from the given timestamps and results.
+def get_recording_time(fpath: str) -> str | None:
+    """Parses the recording time from the name of an audio file.
 
     Args:
-        timestamps (list[str]): A list of timestamp strings in the format "start-end".
-        result (dict[str, list]): A dictionary where keys are timestamp strings and values are lists of tuples.
-                                  Each tuple contains a label and a confidence score.
-        afile_path (str): The file path of the audio file being analyzed.
-        result_path (str): The file path where the resulting CSV file will be saved.
+        fpath: Path to the audio file.
 
     Returns:
-        None
+        The recording time in ISO format or None if the file name does not contain a valid date and time.
+    """
+    match = RECORDING_TIME_PATTERN.search(os.path.basename(fpath))
+
+    if not match:
+        return None
+
+    try:
+        return datetime.datetime(*map(int, match.groups())).isoformat()
+    except ValueError:
+        return None
+
+
+class DetectionDatabase:
+    """SQLite database with the detections of all analyzed files.
+
+    Detections reference a row of the files table and of the species table, so species and
+    time queries can use the indexes. Changes are only written on commit.
     """
-    from birdnet_analyzer.analyze import POSSIBLE_ADDITIONAL_COLUMNS_MAP
 
-    out_string = CSV_HEADER
-    columns_map = {}
+    def __init__(self, db_path: str, labels: LabelTable | None = None):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db = sqlite3.connect(db_path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+
+        for statement in DATABASE_SCHEMA:
+            self.db.execute(statement)
+
+        labels = labels or get_label_table()
+
+        self.db.executemany(
+            "INSERT INTO species (label, scientific_name, common_name, code) VALUES (?, ?, ?, ?) ON CONFLICT (label) DO UPDATE SET "
+            "scientific_name = excluded.scientific_name, common_name = excluded.common_name, code = excluded.code",
+            zip(labels.labels, labels.scientific_names, labels.common_names, labels.codes, strict=True),
+        )
+        self.db.commit()
+
+        ids = dict(self.db.execute("SELECT label, id FROM species"))
+        self.species_ids = np.array([ids[label] for label in labels.labels], dtype="i8")
+
+    def add_file(self, fpath: str, duration: float | None, detections: np.ndarray) -> int:
+        """Adds the detections of a file, replacing the detections of a previous analysis.
+
+        Args:
+            fpath: Path to the audio file.
+            duration: Length of the file in seconds.
+            detections: The detections with DETECTION_DTYPE.
 
-    if cfg.ADDITIONAL_COLUMNS:
-        for col in cfg.ADDITIONAL_COLUMNS:
-            if col in POSSIBLE_ADDITIONAL_COLUMNS_MAP:
-                columns_map[col] = POSSIBLE_ADDITIONAL_COLUMNS_MAP[col]()
+        Returns:
+            The number of inserted detections.
+        """
+        fpath = os.path.abspath(fpath)
 
-        if columns_map:
-            out_string = out_string[:-1] + "," + ",".join(columns_map) + "\n"
+        self.db.execute(
+            "INSERT INTO files (path, duration, recorded_at, lat, lon, week) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET duration = excluded.duration, recorded_at = excluded.recorded_at, "
+            "lat = excluded.lat, lon = excluded.lon, week = excluded.week",
+            (fpath, duration, get_recording_time(fpath), cfg.LATITUDE, cfg.LONGITUDE, cfg.WEEK),
+        )
+        file_id = self.db.execute("SELECT id FROM files WHERE path = ?", (fpath,)).fetchone()[0]
 
-    for timestamp in timestamps:
-        rstring = ""
+        self.db.execute("DELETE FROM detections WHERE file_id = ?", (file_id,))
+        self.db.executemany(
+            "INSERT INTO detections (file_id, species_id, start, end, confidence) VALUES (?, ?, ?, ?, ?)",
+            zip(
+                itertools.repeat(file_id),
+                self.species_ids[detections["label"]].tolist(),
+                detections["start"].tolist(),
+                detections["end"].tolist(),
+                detections["score"].astype("f8").round(4).tolist(),
+            ),
+        )
 
-        for c in result[timestamp]:
-            start, end = timestamp.split("-", 1)
-            label = cfg.TRANSLATED_LABELS[cfg.LABELS.index(c[0])] if cfg.TRANSLATED_LABELS else c[0]
-            rstring += f"{start},{end},{label.split('_', 1)[0]},{label.split('_', 1)[-1]},{c[1]:.4f},{afile_path}"
+        return len(detections)
 
-            if columns_map:
-                rstring += "," + ",".join(str(val) for val in columns_map.values())
+    def commit(self):
+        self.db.commit()
 
-            rstring += "\n"
+    def close(self):
+        self.db.commit()
+        self.db.close()
 
-        # Write result string to file
-        out_string += rstring
+    def __enter__(self):
+        return self
 
-    utils.save_result_file(result_path, out_string)
+    def __exit__(self, *exc):
+        self.close()
 
 
-def save_result_files(r: dict[str, list], result_files: dict[str, str], afile_path: str):
+class DatabaseWriter:
+    """Writes the detections of all workers into the result database.
+
+    Workers send the detections of each file through a queue, a background thread inserts them
+    and commits once DATABASE_COMMIT_ROWS detections are pending or the queue is empty. The
+    database therefore only has a single writer and no lock contention.
     """
-    Saves the result files in various formats based on the provided configuration.
 
-    Args:
-        r (dict[str, list]): A dictionary containing the analysis results with timestamps as keys.
-        result_files (dict[str, str]): A dictionary mapping result types to their respective file paths.
-        afile_path (str): The path to the audio file being analyzed.
+    def __init__(self, db_path: str):
+        self.queue = multiprocessing.SimpleQueue()
+        self.thread = threading.Thread(target=self._write, args=(db_path, get_label_table()), daemon=True)
+        self.thread.start()
 
-    Returns:
-        None
+    def _write(self, db_path: str, labels: LabelTable):
+        try:
+            with DetectionDatabase(db_path, labels) as db:
+                pending = 0
+
+                while (item := self.queue.get()) is not None:
+                    pending += db.add_file(*item)
+
+                    if pending >= DATABASE_COMMIT_ROWS or self.queue.empty():
+                        db.commit()
+                        pending = 0
+
+                return
+
+        except Exception as ex:
+            print(f"Error: Cannot write to result database {db_path}.\n", flush=True)
+            utils.write_error_log(ex)
+
+        # Keep receiving, so workers do not block on a full queue
+        while self.queue.get() is not None:
+            pass
+
+    def close(self):
+        """Waits until all detections are written and closes the database."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def __enter__(self):
+        global DATABASE_QUEUE  # noqa: PLW0603
+
+        DATABASE_QUEUE = self.queue
+
+        return self
+
+    def __exit__(self, *exc):
+        global DATABASE_QUEUE  # noqa: PLW0603
+
+        DATABASE_QUEUE = None
+        self.close()
+
+
+def save_to_database(db_path: str, afile_path: str, detections: np.ndarray, duration: float | None = None):
+    """Saves the detections of a file to the result database.
+
+    The detections are sent to the DatabaseWriter of the analysis if there is one, otherwise
+    they are inserted directly.
+
+    Args:
+        db_path: Path to the database.
+        afile_path: Path to the audio file.
+        detections: The detections with DETECTION_DTYPE.
+        duration: Length of the audio file in seconds, read from the file if None.
     """
+    if duration is None:
+        duration = audio.get_audio_file_length(afile_path)
 
-    os.makedirs(cfg.OUTPUT_PATH, exist_ok=True)
+    if DATABASE_QUEUE is not None:
+        DATABASE_QUEUE.put((afile_path, duration, detections))
+    else:
+        with DetectionDatabase(db_path) as db:
+            db.add_file(afile_path, duration, detections)
 
-    # Merge consecutive detections of the same species
-    r_merged = merge_consecutive_detections(r, cfg.MERGE_CONSECUTIVE)
 
-    # Selection table
-    timestamps = get_sorted_timestamps(r_merged)
+def is_in_database(db_path: str, afile_path: str) -> bool:
+    """Checks if a file has been saved to the result database.
 
-    if "table" in result_files:
-        generate_raven_table(timestamps, r_merged, afile_path, result_files["table"])
+    Args:
+        db_path: Path to the database.
+        afile_path: Path to the audio file.
 
-    if "audacity" in cfg.RESULT_TYPES:
-        generate_audacity(timestamps, r_merged, result_files["audacity"])
+    Returns:
+        True if the database contains the file.
+    """
+    if not os.path.isfile(db_path):
+        return False
 
-    # if "r" in cfg.RESULT_TYPES:
-    #     generate_rtable(timestamps, r, afile_path, result_files["r"])
+    try:
+        with contextlib.closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)) as db:
+            return db.execute("SELECT 1 FROM files WHERE path = ?", (os.path.abspath(afile_path),)).fetchone() is not None
+    except sqlite3.Error:
+        return False
 
-    if "kaleidoscope" in cfg.RESULT_TYPES:
-        generate_kaleidoscope(timestamps, r_merged, afile_path, result_files["kaleidoscope"])
 
-    if "csv" in cfg.RESULT_TYPES:
-        generate_csv(timestamps, r_merged, afile_path, result_files["csv"])
+def has_results(fpath: str, result_files: dict[str, str]) -> bool:
+    """Checks if all results of an audio file already exist.
+
+    Args:
+        fpath: Path to the audio file.
+        result_files: The result file names of the file.
+
+    Returns:
+        True if all result files exist and the file is in the result database.
+    """
+    return all(is_in_database(path, fpath) if rtype == "sqlite" else os.path.exists(path) for rtype, path in result_files.items())
 
 
-def combine_raven_tables(saved_results: list[str]):
+def combine_raven_tables(saved_results: list[str], durations: Sequence[float | None] | None = None):
     """
     Combines multiple Raven selection table files into a single file and adjusts the selection IDs and times.
 
+    The tables are read line by line, so the memory usage does not depend on the number of files.
+
     Args:
         saved_results (list[str]): List of file paths to the Raven selection table files to be combined.
+        durations (Sequence[float | None] | None): The length of the audio file of each table in seconds,
+            as returned by the analysis. The audio files are only opened for unknown durations.
 
     Returns:
         None
@@ -285,39 +639,42 @@ def combine_raven_tables(saved_results: list[str]):
     s_id = 1
     time_offset = 0
     audiofiles = []
+    durations = durations or [None] * len(saved_results)
 
-    with open(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_RAVEN_FILENAME), "w", encoding="utf-8") as f:
+    with open(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_RAVEN_FILENAME), "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
         f.write(RAVEN_TABLE_HEADER)
 
-        for rfile in saved_results:
+        for rfile, f_duration in zip(saved_results, durations, strict=True):
             if not rfile:
                 continue
             with open(rfile, encoding="utf-8") as rf:
                 try:
-                    lines = rf.readlines()
+                    header = rf.readline()
 
                     # make sure it's a selection table
-                    if "Selection" not in lines[0] or "File Offset" not in lines[0]:
+                    if "Selection" not in header or "File Offset" not in header:
                         continue
 
-                    # skip header and add to file
-                    f_name = lines[1].split("\t")[10]
-                    f_duration = audio.get_audio_file_length(f_name)
-
-                    audiofiles.append(f_name)
+                    f_name = None
 
-                    for line in lines[1:]:
+                    for line in rf:
                         # empty line?
                         if not line.strip():
                             continue
 
+                        line_elements = line.split("\t")
+
+                        # The first line has the path of the audio file
+                        if f_name is None:
+                            f_name = line_elements[10]
+                            audiofiles.append(f_name)
+
                         # Is species code and common name == 'nocall'?
                         # If so, that's a dummy line and we can skip it
-                        if line.split("\t")[7] == "nocall" and line.split("\t")[8] == "nocall":
+                        if line_elements[7] == "nocall" and line_elements[8] == "nocall":
                             continue
 
                         # adjust selection id
-                        line_elements = line.split("\t")
                         line_elements[0] = str(s_id)
                         s_id += 1
 
@@ -329,7 +686,8 @@ def combine_raven_tables(saved_results: list[str]):
                         f.write("\t".join(line_elements))
 
                     # adjust time offset
-                    time_offset += f_duration
+                    if f_name is not None:
+                        time_offset += f_duration if f_duration is not None else audio.get_audio_file_length(f_name)
 
                 except Exception as ex:
                     print(f"Error: Cannot combine results from {rfile}.\n", flush=True)
@@ -352,20 +710,20 @@ def combine_kaleidoscope_files(saved_results: list[str]):
         None
     """
     # Combine all files
-    with open(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_KALEIDOSCOPE_FILENAME), "w", encoding="utf-8") as f:
+    with open(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_KALEIDOSCOPE_FILENAME), "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
         f.write(KALEIDOSCOPE_HEADER)
 
         for rfile in saved_results:
             with open(rfile, encoding="utf-8") as rf:
                 try:
-                    lines = rf.readlines()
+                    header = rf.readline()
 
                     # make sure it's a selection table
-                    if "INDIR" not in lines[0] or "sensitivity" not in lines[0]:
+                    if "INDIR" not in header or "sensitivity" not in header:
                         continue
 
                     # skip header and add to file
-                    f.writelines(lines[1:])
+                    shutil.copyfileobj(rf, f, WRITE_BUFFER_SIZE)
 
                 except Exception as ex:
                     print(f"Error: Cannot combine results from {rfile}.\n", flush=True)
@@ -376,23 +734,28 @@ def combine_csv_files(saved_results: list[str]):
     """
     Combines multiple CSV files into a single CSV file.
 
+    The header of the first file is kept, the files are copied without reading them into memory.
+
     Args:
         saved_results (list[str]): A list of file paths to the CSV files to be combined.
     """
-    out_string = ""
+    has_header = False
 
-    for rfile in saved_results:
-        try:
-            with open(rfile, encoding="utf-8") as rf:
-                lines = rf.readlines()
-                out_string += "".join(lines[1:] if out_string else lines)
+    with open(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_CSV_FILENAME), "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        for rfile in saved_results:
+            try:
+                with open(rfile, encoding="utf-8") as rf:
+                    header = rf.readline()
 
-        except Exception as ex:
-            print(f"Error: Cannot combine results from {rfile}.\n", flush=True)
-            utils.write_error_log(ex)
+                    if not has_header:
+                        f.write(header)
+                        has_header = bool(header)
 
-    with open(os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_CSV_FILENAME), "w", encoding="utf-8") as f:
-        f.write(out_string)
+                    shutil.copyfileobj(rf, f, WRITE_BUFFER_SIZE)
+
+            except Exception as ex:
+                print(f"Error: Cannot combine results from {rfile}.\n", flush=True)
+                utils.write_error_log(ex)
 
 
 def combine_results(saved_results: Sequence[dict[str, str] | None]):
@@ -404,105 +767,90 @@ def combine_results(saved_results: Sequence[dict[str, str] | None]):
     Args:
         saved_results (list[dict[str, str]]): A list of dictionaries containing
             file paths for different result types. Each dictionary represents
-            a set of result files for a particular analysis.
+            a set of result files for a particular analysis and can contain the
+            length of the audio file in seconds under the key "duration".
 
     Returns:
         None
     """
+    saved_results = [f for f in saved_results if f]
+
     if "table" in cfg.RESULT_TYPES:
-        combine_raven_tables([f["table"] for f in saved_results if f])
+        combine_raven_tables([f["table"] for f in saved_results], [f.get("duration") for f in saved_results])
 
     if "kaleidoscope" in cfg.RESULT_TYPES:
-        combine_kaleidoscope_files([f["kaleidoscope"] for f in saved_results if f])
+        combine_kaleidoscope_files([f["kaleidoscope"] for f in saved_results])
 
     if "csv" in cfg.RESULT_TYPES:
-        combine_csv_files([f["csv"] for f in saved_results if f])
+        combine_csv_files([f["csv"] for f in saved_results])
 
 
-def merge_consecutive_detections(results: dict[str, list], max_consecutive: int | None = None):
+def merge_consecutive_detections(detections: np.ndarray, max_consecutive: int | None = None):
     """Merges consecutive detections of the same species.
     Uses the mean of the top-3 highest scoring predictions as
     confidence score for the merged detection.
 
+    Detections are consecutive if a detection ends at or after the start of the next one.
+    Runs of consecutive detections are merged into groups of at most max_consecutive detections,
+    starting at the beginning of the run.
+
     Args:
-        results: The dictionary with {segment: scores}.
+        detections: The detections with DETECTION_DTYPE.
         max_consecutive: The maximum number of consecutive detections to merge.
                           If None, merge all consecutive detections.
 
     Returns:
-        The dictionary with merged detections.
+        The merged detections, grouped by label.
     """
 
     # If max_consecutive is 0 or 1, return original results
-    if max_consecutive is not None and max_consecutive <= 1:
-        return results
-
-    # For each species, make list of timestamps and scores
-    species = {}
-    for timestamp, scores in results.items():
-        for label, score in scores:
-            if label not in species:
-                species[label] = []
-            species[label].append((timestamp, score))
-
-    # Sort timestamps by start time for each species
-    for label, timestamps in species.items():
-        species[label] = sorted(timestamps, key=lambda t: float(t[0].split("-", 1)[0]))
-
-    # Merge consecutive detections
-    merged_results = {}
-    for label in species:
-        timestamps = species[label]
-
-        # Check if end time of current detection is within the start time of the next detection
-        i = 0
-        while i < len(timestamps) - 1:
-            start, end = timestamps[i][0].split("-", 1)
-            next_start, next_end = timestamps[i + 1][0].split("-", 1)
+    if (max_consecutive is not None and max_consecutive <= 1) or not len(detections):
+        return detections
 
-            if float(end) >= float(next_start):
-                # Merge detections
-                merged_scores = [timestamps[i][1], timestamps[i + 1][1]]
-                timestamps.pop(i)
+    # Group by label, sorted by start time
+    detections = detections[np.lexsort((detections["start"], detections["label"]))]
+    n = len(detections)
 
-                while i < len(timestamps) - 1 and float(next_end) >= float(timestamps[i + 1][0].split("-", 1)[0]):
-                    if max_consecutive and len(merged_scores) >= max_consecutive:
-                        break
-                    merged_scores.append(timestamps[i + 1][1])
-                    next_end = timestamps[i + 1][0].split("-", 1)[1]
-                    timestamps.pop(i + 1)
+    # A run starts where the previous detection has another label or ends before this one starts
+    run_start = np.ones(n, dtype=bool)
+    run_start[1:] = (detections["label"][1:] != detections["label"][:-1]) | (detections["end"][:-1] < detections["start"][1:])
 
-                # Calculate mean of top 3 scores
-                top_3_scores = sorted(merged_scores, reverse=True)[:3]
-                merged_score = sum(top_3_scores) / len(top_3_scores)
+    # Split runs into groups of max_consecutive detections
+    group_start = run_start
 
-                timestamps[i] = (f"{start}-{next_end}", merged_score)
+    if max_consecutive:
+        run_first = np.flatnonzero(run_start)
+        position = np.arange(n) - run_first[np.cumsum(run_start) - 1]
+        group_start = run_start | (position % max_consecutive == 0)
 
-            i += 1
+    first = np.flatnonzero(group_start)
+    last = np.append(first[1:], n) - 1
+    group = np.cumsum(group_start) - 1
 
-        merged_results[label] = timestamps
+    # Mean of the top-3 scores of each group, single detections keep their score
+    order = np.lexsort((-detections["score"], group))
+    top = order[np.arange(n) - first[group[order]] < 3]
+    scores = np.add.reduceat(detections["score"][top].astype("f8"), np.flatnonzero(np.diff(group[top], prepend=-1)))
 
-    # Restore original format
-    results = {}
-    for label, timestamps in merged_results.items():
-        for timestamp, score in timestamps:
-            if timestamp not in results:
-                results[timestamp] = []
-            results[timestamp].append((label, score))
+    merged = np.empty(len(first), dtype=DETECTION_DTYPE)
+    merged["start"] = detections["start"][first]
+    merged["end"] = detections["end"][last]
+    merged["label"] = detections["label"][first]
+    merged["score"] = scores / np.minimum(last - first + 1, 3)
 
-    return results
+    return merged
 
 
-def get_sorted_timestamps(results: dict[str, list]):
-    """Sorts the results based on the segments.
+def sort_detections(detections: np.ndarray):
+    """Sorts detections by segment and descending score.
 
     Args:
-        results: The dictionary with {segment: scores}.
+        detections: The detections with DETECTION_DTYPE.
 
     Returns:
-        Returns the sorted list of segments and their scores.
+        The detections sorted by start time, end time, descending score and label.
     """
-    return sorted(results, key=lambda t: float(t.split("-", 1)[0]))
+    return detections[np.lexsort((detections["label"], -detections["score"], detections["end"], detections["start"]))]
 
 
 def get_raw_audio_from_file(fpath: str, offset, duration):
@@ -517,175 +865,1685 @@ def get_raw_audio_from_file(fpath: str, offset, duration):
     # Open file
     sig, rate = audio.open_audio_file(fpath, cfg.SAMPLE_RATE, offset, duration, cfg.BANDPASS_FMIN, cfg.BANDPASS_FMAX, cfg.AUDIO_SPEED)
 
-    # Split into raw audio chunks
-    return audio.split_signal(sig, rate, cfg.SIG_LENGTH, cfg.SIG_OVERLAP, cfg.SIG_MINLEN)
+    # Split into raw audio chunks, the chunks are only read
+    return audio.split_signal(sig, rate, cfg.SIG_LENGTH, cfg.SIG_OVERLAP, cfg.SIG_MINLEN, writeable=False)
 
 
-def iterate_audio_chunks(fpath: str, embeddings: bool = False):
-    """Iterates over audio chunks from a file.
+def iterate_audio_batches(fpath: str, embeddings: bool = False, *, start: int = 0, end: int | None = None, raw: bool = False, screen: bool = False):
+    """Iterates over batches of audio chunks from a file.
 
     Args:
         fpath: Path to the audio file.
-        offset: Offset in seconds to start reading the file.
+        embeddings: If True, yield the feature embeddings instead of the prediction scores.
+        start: Index of the first chunk.
+        end: Index after the last chunk, None to analyze the file until the end.
+        raw: If True, yield the model outputs before the sigmoid is applied.
+        screen: If True, chunks below cfg.ACTIVITY_THRESHOLD are not run through the model
+                and get NaN outputs. Batches are still filled with BATCH_SIZE analyzed chunks.
 
     Yields:
-        Chunks of audio data.
+        Tuples of (timestamps, outputs).
+        Timestamps is a list of [start, end] pairs with one row in the outputs per pair.
     """
     fileLengthSeconds = audio.get_audio_file_length(fpath)
-    start, end = 0, cfg.SIG_LENGTH * cfg.AUDIO_SPEED
-    duration = int(cfg.FILE_SPLITTING_DURATION / cfg.AUDIO_SPEED)
-
-    while start < fileLengthSeconds and not np.isclose(start, fileLengthSeconds):
-        chunks = get_raw_audio_from_file(fpath, start, duration)
-        samples = []
-        timestamps = []
+    samples = []
+    active = []
+    first_index = 0
+    n_samples = 0
+    n_chunks = 0
+
+    for chunk_index, chunks in iterate_raw_audio_chunks(fpath, start, end):
+        chunks_active = get_activity_levels(chunks) >= cfg.ACTIVITY_THRESHOLD if screen else None
+        i = 0
 
-        if not chunks:
-            break
+        while i < len(chunks):
+            if not n_chunks:
+                first_index = chunk_index + i
 
-        for chunk_index, chunk in enumerate(chunks):
-            t_start = start + (chunk_index * (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED)
-            end = min(t_start + cfg.SIG_LENGTH * cfg.AUDIO_SPEED, fileLengthSeconds)
+            # Add to batch, slices of the chunk arrays are views
+            n = _get_batch_chunks(chunks_active, i, cfg.BATCH_SIZE - n_samples, ACTIVITY_MAX_SPAN - n_chunks if screen else len(chunks) - i)
+            n_chunks += n
 
-            # Add to batch
-            samples.append(chunk)
-            timestamps.append([round(t_start, 2), round(end, 2)])
+            if screen:
+                piece = chunks_active[i : i + n]
+                active.append(piece)
 
-            # Check if batch is full or last chunk
-            if len(samples) < cfg.BATCH_SIZE and chunk_index < len(chunks) - 1:
-                continue
+                if piece.any():
+                    samples.append(chunks[i : i + n][piece])
+                    n_samples += int(np.count_nonzero(piece))
+            else:
+                samples.append(chunks[i : i + n])
+                n_samples += n
 
-            # Predict
-            p = model.embeddings(samples) if embeddings else predict(samples)
+            i += n
 
-            # Add to results
-            for i in range(len(samples)):
-                # Get timestamp
-                s_start, s_end = timestamps[i]
+            # Check if batch is full
+            if n_samples < cfg.BATCH_SIZE and (not screen or n_chunks < ACTIVITY_MAX_SPAN):
+                continue
 
-                yield s_start, s_end, p[i]
+            yield _get_timestamps(first_index, n_chunks, fileLengthSeconds), *_predict_batch(samples, embeddings, raw, active)
 
             # Clear batch
             samples = []
-            timestamps = []
+            active = []
+            n_samples = 0
+            n_chunks = 0
 
-        start += len(chunks) * (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+    # Predict last batch
+    if n_chunks:
+        yield _get_timestamps(first_index, n_chunks, fileLengthSeconds), *_predict_batch(samples, embeddings, raw, active)
 
 
-def predict(samples):
-    """Predicts the classes for the given samples.
+def _get_batch_chunks(active: np.ndarray | None, i: int, n_free: int, max_chunks: int) -> int:
+    """Computes how many chunks from an array are added to a batch.
 
     Args:
-        samples: Samples to be predicted.
+        active: Mask of the chunks that are analyzed, None if all are analyzed.
+        i: Index of the first chunk that is not in a batch yet.
+        n_free: Number of samples that fit into the batch.
+        max_chunks: Maximum number of chunks that can be added, analyzed or not.
 
     Returns:
-        The prediction scores.
+        The number of chunks from index i on that are added to the batch.
     """
-    # Prepare sample and pass through model
-    data = np.array(samples, dtype="float32")
-    prediction = model.predict(data)
+    if active is None:
+        return min(n_free, max_chunks)
 
-    # Logits or sigmoid activations?
-    if cfg.APPLY_SIGMOID:
-        prediction = model.flat_sigmoid(np.array(prediction), sensitivity=-1, bias=cfg.SIGMOID_SENSITIVITY)
+    # Up to the chunk that fills the batch
+    n = int(np.searchsorted(np.cumsum(active[i:]), n_free)) + 1
 
-    return prediction
+    return min(n, len(active) - i, max_chunks)
 
 
-def get_result_file_names(fpath: str):
+def get_activity_levels(chunks: np.ndarray) -> np.ndarray:
+    """Measures the activity of audio chunks for the pre-screen.
+
+    The chunks are already bandpass filtered, so the energy of their frames is the energy in
+    the bandpass range. The activity of a chunk is the level of its loudest frame.
+
+    Args:
+        chunks: The chunks with shape (chunks, samples).
+
+    Returns:
+        The level of the loudest frame of each chunk in dB relative to full scale.
     """
-    Generates a dictionary of result file names based on the input file path and configured result types.
+    frame_size = max(1, int(cfg.SAMPLE_RATE * ACTIVITY_FRAME_LENGTH))
+    n_frames = max(1, chunks.shape[1] // frame_size)
+    frames = chunks[:, : n_frames * frame_size].reshape(len(chunks), n_frames, -1)
+    energy = np.einsum("ijk,ijk->ij", frames, frames) / frames.shape[2]
+
+    return 10 * np.log10(np.maximum(energy.max(axis=1), 1e-12))
+
+
+def calibrate_activity_threshold(fpaths: list[str], n_chunks: int = ACTIVITY_CALIBRATION_CHUNKS) -> float | None:
+    """Calibrates the activity threshold of the pre-screen against the full model.
+
+    The first chunks of the files are analyzed with the model. The threshold is set
+    ACTIVITY_CALIBRATION_MARGIN below the activity of the quietest chunk with a score of an
+    allowed species of at least cfg.MIN_CONFIDENCE, so none of these chunks would have been skipped.
+    Top N outputs are not counted, as they select detections in every chunk.
 
     Args:
-        fpath (str): The file path of the input file.
+        fpaths: Paths of the audio files, chunks are taken from the start of each file.
+        n_chunks: Number of chunks that are analyzed.
 
     Returns:
-        dict: A dictionary where the keys are result types (e.g., "table", "audacity", "r", "kaleidoscope", "csv")
-              and the values are the corresponding output file paths.
+        The activity threshold in dB or None if no chunk has a detection.
     """
-    result_names = {}
+    species_mask = None
+    levels, detected = [], []
+    chunks_per_file = max(1, -(-n_chunks // max(1, len(fpaths))))
 
-    rpath = fpath.replace(cfg.INPUT_PATH, "")
+    for fpath in fpaths:
+        if len(levels) >= n_chunks:
+            break
 
-    rpath = (rpath[1:] if rpath[0] in ["/", "\\"] else rpath) if rpath else os.path.basename(fpath)
+        try:
+            for _, chunks in iterate_raw_audio_chunks(fpath, 0, chunks_per_file):
+                for i in range(0, len(chunks), max(1, cfg.BATCH_SIZE)):
+                    batch = chunks[i : i + max(1, cfg.BATCH_SIZE)]
+                    pred = predict(batch)
 
-    file_shorthand = rpath.rsplit(".", 1)[0]
+                    if species_mask is None:
+                        species_mask = get_species_mask(cfg.LABELS, cfg.SPECIES_LIST)
 
-    if "table" in cfg.RESULT_TYPES:
-        result_names["table"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.selection.table.txt")
-    if "audacity" in cfg.RESULT_TYPES:
-        result_names["audacity"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.txt")
-    # if "r" in cfg.RESULT_TYPES:
-    #     result_names["r"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.r.csv")
-    if "kaleidoscope" in cfg.RESULT_TYPES:
-        result_names["kaleidoscope"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.kaleidoscope.csv")
-    if "csv" in cfg.RESULT_TYPES:
-        result_names["csv"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.csv")
+                    levels.extend(get_activity_levels(batch))
+                    detected.extend((pred[:, species_mask] >= cfg.MIN_CONFIDENCE).any(axis=1))
 
-    return result_names
+        except Exception as ex:
+            print(f"Error: Cannot calibrate with audio file {fpath}.\n", flush=True)
+            utils.write_error_log(ex)
 
+    levels, detected = np.array(levels), np.array(detected, dtype=bool)
 
-def analyze_file(item) -> dict[str, str] | None:
-    """
-    Analyzes an audio file and generates prediction results.
+    if not detected.any():
+        print(f"No detections in {len(levels)} calibration chunks, the activity pre-screen is disabled", flush=True)
+
+        return None
+
+    threshold = float(levels[detected].min()) - ACTIVITY_CALIBRATION_MARGIN
+
+    print(
+        f"Activity threshold: {threshold:.1f} dB from {len(levels)} chunks with {np.count_nonzero(detected)} detections, "
+        f"{np.mean(levels < threshold):.0%} of the calibration chunks would be skipped",
+        flush=True,
+    )
+
+    return threshold
+
+
+def _get_timestamps(first_index: int, n: int, file_length: float):
+    """Computes the start and end times of consecutive chunks.
 
     Args:
-        item (tuple): A tuple containing the file path (str) and configuration settings.
+        first_index: Index of the first chunk.
+        n: Number of chunks.
+        file_length: Length of the file in seconds.
 
     Returns:
-        dict or None: A dictionary of result file names if analysis is successful,
-                      None if the file is skipped or an error occurs.
-    Raises:
-        Exception: If there is an error in reading the audio file or saving the results.
+        A list of [start, end] pairs.
     """
-    # Get file path and restore cfg
-    fpath: str = item[0]
-    cfg.set_config(item[1])
+    timestamps = []
 
-    result_file_names = get_result_file_names(fpath)
+    for chunk_index in range(first_index, first_index + n):
+        t_start = chunk_index * (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+        end = min(t_start + cfg.SIG_LENGTH * cfg.AUDIO_SPEED, file_length)
+        timestamps.append([round(t_start, 2), round(end, 2)])
 
-    if cfg.SKIP_EXISTING_RESULTS and all(os.path.exists(f) for f in result_file_names.values()):
-        print(f"Skipping {fpath} as it has already been analyzed", flush=True)
-        return None  # or return path to combine later? TODO
+    return timestamps
 
-    # Start time
-    start_time = datetime.datetime.now()
-    results = {}
 
-    # Status
-    print(f"Analyzing {fpath}", flush=True)
+def _predict_batch(samples, embeddings: bool, raw: bool = False, active: list[np.ndarray] | None = None):
+    """Runs the model on a batch of chunks.
 
-    # Process each chunk
-    try:
-        for s_start, s_end, pred in iterate_audio_chunks(fpath):
-            if not cfg.LABELS:
-                cfg.LABELS = [f"Species-{i}_Species-{i}" for i in range(len(pred))]
+    Args:
+        samples: The audio chunks.
+        embeddings: If True, return the feature embeddings instead of the prediction scores.
+        raw: If True, return the model outputs before the sigmoid is applied.
+        active: Masks of the chunks of the batch that were analyzed, the samples only contain these chunks.
+                Skipped chunks get NaN outputs. Empty or None if all chunks were analyzed.
+
+    Returns:
+        A tuple with the model outputs.
+    """
+    if active:
+        mask = np.concatenate(active)
+        ACTIVITY_STATS["chunks"] += len(mask)
+        ACTIVITY_STATS["skipped"] += len(mask) - int(np.count_nonzero(mask))
 
-            # Assign scores to labels
-            p_labels = [
-                p for p in zip(cfg.LABELS, pred, strict=True) if (cfg.TOP_N or p[1] >= cfg.MIN_CONFIDENCE) and (not cfg.SPECIES_LIST or p[0] in cfg.SPECIES_LIST)
-            ]
+        return (_expand_outputs(_predict_batch(samples, False, raw)[0] if samples else None, mask),)
 
-            # Sort by score
-            p_sorted = sorted(p_labels, key=operator.itemgetter(1), reverse=True)
+    # Only batches that span multiple chunk arrays have to be copied
+    samples = samples[0] if len(samples) == 1 else np.concatenate(samples)
 
-            if cfg.TOP_N:
-                p_sorted = p_sorted[: cfg.TOP_N]
+    return (model.embeddings(samples) if embeddings else predict(samples, raw),)
 
-            # TODO: hier schon top n oder min conf raussortieren
-            # Store top 5 results and advance indices
-            results[str(s_start) + "-" + str(s_end)] = p_sorted
 
-    except Exception as ex:
-        # Write error log
-        print(f"Error: Cannot analyze audio file {fpath}.\n", flush=True)
-        utils.write_error_log(ex)
+def _expand_outputs(outputs: np.ndarray | None, active: np.ndarray) -> np.ndarray:
+    """Inserts NaN outputs for the chunks skipped by the pre-screen.
 
-        return None
+    Args:
+        outputs: The outputs of the analyzed chunks, None if no chunk was analyzed.
+        active: Mask of the analyzed chunks.
+
+    Returns:
+        The outputs with one row per chunk.
+    """
+    if outputs is not None and active.all():
+        return outputs
+
+    expanded = np.full((len(active), outputs.shape[1] if outputs is not None else len(cfg.LABELS)), np.nan, dtype="float32")
+
+    if outputs is not None:
+        expanded[active] = outputs
+
+    return expanded
+
+
+def iterate_raw_audio_chunks(fpath: str, start: int = 0, end: int | None = None):
+    """Decodes an audio file once and splits the signal into chunks.
+
+    The file is streamed in blocks of FILE_SPLITTING_DURATION, so memory usage does not depend on
+    the file length. Chunks are cut from the continuous signal, the last chunk is padded to the full
+    segment length if it is longer than the minimum segment length.
+
+    Args:
+        fpath: Path to the audio file.
+        start: Index of the first chunk.
+        end: Index after the last chunk, None to split the file until the end.
+
+    Yields:
+        Tuples of (index of the first chunk, chunks) with the consecutive chunks in an array
+        of shape (number of chunks, segment length). Chunks inside a decoded block are a view of the block.
+    """
+    chunk_size = int(cfg.SAMPLE_RATE * cfg.SIG_LENGTH)
+    step_size = int(cfg.SAMPLE_RATE * (cfg.SIG_LENGTH - cfg.SIG_OVERLAP))
+    block_duration = cfg.FILE_SPLITTING_DURATION / cfg.AUDIO_SPEED
+    offset, duration, position = 0.0, None, 0
+
+    if start > 0 or end is not None:
+        offset, duration, position = _get_decoding_range(fpath, start, end, chunk_size, step_size)
+
+    blocks = audio.stream_audio_file(fpath, cfg.SAMPLE_RATE, block_duration, cfg.BANDPASS_FMIN, cfg.BANDPASS_FMAX, cfg.AUDIO_SPEED, offset, duration)
+
+    # Decode the next blocks while the current one is analyzed
+    if cfg.PREFETCH_DEPTH > 0:
+        blocks = utils.prefetch(blocks, cfg.PREFETCH_DEPTH)
+
+    for chunk_index, chunks in _split_blocks(blocks, start, position, chunk_size, step_size):
+        if end is not None and chunk_index + len(chunks) >= end:
+            if chunk_index < end:
+                yield chunk_index, chunks[: end - chunk_index]
+
+            return
+
+        yield chunk_index, chunks
+
+
+def _get_decoding_range(fpath: str, start: int, end: int | None, chunk_size: int, step_size: int):
+    """Computes which part of a file has to be decoded for a range of chunks.
+
+    Decoding starts a little before the first chunk, so the resampler and the bandpass filter
+    have settled and the chunks are the same as when the whole file is decoded. The start is
+    aligned to a frame that maps to a whole output sample.
+
+    Args:
+        fpath: Path to the audio file.
+        start: Index of the first chunk.
+        end: Index after the last chunk or None.
+        chunk_size: Number of samples per chunk.
+        step_size: Number of samples between two chunks.
+
+    Returns:
+        A tuple of (offset in seconds, duration in seconds or None, position of the first decoded sample in the signal).
+    """
+    rate = audio.get_sample_rate(fpath)
+    orig_sr = int(rate * cfg.AUDIO_SPEED) if cfg.AUDIO_SPEED != 1.0 else rate
+    gcd = math.gcd(orig_sr, cfg.SAMPLE_RATE)
+    unit_in, unit_out = orig_sr // gcd, cfg.SAMPLE_RATE // gcd
+    pre_roll = cfg.SAMPLE_RATE
+
+    first_frame = max(0, start * step_size - pre_roll) * orig_sr // cfg.SAMPLE_RATE // unit_in * unit_in
+    duration = None
+
+    if end is not None:
+        last_frame = math.ceil((end * step_size + chunk_size + pre_roll) * orig_sr / cfg.SAMPLE_RATE)
+        duration = (last_frame - first_frame) / rate
+
+    return first_frame / rate, duration, first_frame // unit_in * unit_out
+
+
+def _split_blocks(blocks, chunk_index: int, position: int, chunk_size: int, step_size: int):
+    """Splits consecutive blocks of a signal into chunks.
+
+    Args:
+        blocks: Iterable of consecutive signal blocks.
+        chunk_index: Index of the first chunk.
+        position: Position of the first sample of the blocks in the signal.
+        chunk_size: Number of samples per chunk.
+        step_size: Number of samples between two chunks.
+
+    Yields:
+        Tuples of (index of the first chunk, chunks).
+    """
+    min_size = int(cfg.SAMPLE_RATE * cfg.SIG_MINLEN)
+
+    # Signal from the start of the next chunk, always shorter than a chunk
+    tail = np.empty(0, dtype="float32")
+    signal_length = position
+    skip = chunk_index * step_size - position
+
+    for decoded_block in blocks:
+        signal_length += len(decoded_block)
+        block = decoded_block
+
+        # Drop the signal before the first chunk
+        if skip:
+            dropped = min(skip, len(block))
+            block = block[dropped:]
+            skip -= dropped
+
+        # Chunks that start in the tail of the previous block only need the beginning of this block
+        chunks = audio.sliding_chunks(np.concatenate((tail, block[:chunk_size])), chunk_size, step_size)[: -(-len(tail) // step_size)]
+
+        if len(chunks):
+            yield chunk_index, chunks
+            chunk_index += len(chunks)
+
+        offset = len(chunks) * step_size - len(tail)
+
+        # Block is too short to complete the chunks
+        if offset < 0:
+            tail = np.concatenate((tail[len(chunks) * step_size :], block))
+            continue
+
+        chunks = audio.sliding_chunks(block[offset:], chunk_size, step_size)
+
+        if len(chunks):
+            yield chunk_index, chunks
+            chunk_index += len(chunks)
+
+        tail = block[offset + len(chunks) * step_size :]
+
+    if signal_length == 0:
+        return
+
+    # Start of last chunk, same as in audio.split_signal
+    last_chunk_pos = int((signal_length - chunk_size + step_size - 1) / step_size) * step_size
+
+    if last_chunk_pos < 0:
+        last_chunk_pos = 0
+    # Omit last chunk if minimum signal duration is underrun
+    elif signal_length - last_chunk_pos < min_size:
+        last_chunk_pos -= step_size
+
+    position = chunk_index * step_size
+    padded_chunks = [audio.pad(tail[i : i + chunk_size], cfg.SIG_LENGTH, cfg.SAMPLE_RATE) for i in range(0, last_chunk_pos - position + 1, step_size)]
+
+    if padded_chunks:
+        yield chunk_index, np.array(padded_chunks)
+
+
+def iterate_audio_chunks(fpath: str, embeddings: bool = False):
+    """Iterates over audio chunks from a file.
+
+    Args:
+        fpath: Path to the audio file.
+        embeddings: If True, yield the feature embeddings instead of the prediction scores.
+
+    Yields:
+        Tuples of (start, end, output).
+    """
+    for timestamps, outputs in iterate_audio_batches(fpath, embeddings):
+        for i, (s_start, s_end) in enumerate(timestamps):
+            yield s_start, s_end, outputs[i]
+
+
+def get_species_mask(labels: list[str], species_list: list[str] | None) -> np.ndarray:
+    """Creates a boolean mask of the labels that are allowed by the species list.
+
+    Args:
+        labels: The labels of the model outputs.
+        species_list: The allowed species. If empty or None, all labels are allowed.
+
+    Returns:
+        A boolean array with one entry per label.
+    """
+    if not species_list:
+        return np.ones(len(labels), dtype=bool)
+
+    allowed = set(species_list)
+
+    return np.array([label in allowed for label in labels], dtype=bool)
+
+
+def _select_predictions(pred: np.ndarray, species_mask: np.ndarray):
+    """Selects the detections of a batch of predictions.
+
+    Keeps all scores >= cfg.MIN_CONFIDENCE or, if cfg.TOP_N is set, the top N scores
+    of each segment regardless of their value. Only labels allowed by the species mask are kept.
+
+    Args:
+        pred: The prediction scores with shape (segments, labels).
+        species_mask: Boolean mask of the allowed labels.
+
+    Returns:
+        Segment and label indices of the detections, sorted by segment, descending score and label.
+    """
+    scores = np.where(species_mask, pred, -np.inf)
+
+    if cfg.TOP_N:
+        k = min(cfg.TOP_N, int(np.count_nonzero(species_mask)))
+
+        if k == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(pred, top, axis=1)
+
+        # Sort by descending score, ties by label index like a stable sort would
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        return np.repeat(np.arange(len(pred)), k), top.ravel()
+
+    rows, cols = np.nonzero(scores >= cfg.MIN_CONFIDENCE)
+    order = np.lexsort((cols, -pred[rows, cols], rows))
+
+    return rows[order], cols[order]
+
+
+def get_top_predictions(pred: np.ndarray, species_mask: np.ndarray) -> list[list[tuple[str, float]]]:
+    """Selects the detections of a batch of predictions.
+
+    Keeps all scores >= cfg.MIN_CONFIDENCE or, if cfg.TOP_N is set, the top N scores
+    of each segment regardless of their value. Only labels allowed by the species mask are kept.
+
+    Args:
+        pred: The prediction scores with shape (segments, labels).
+        species_mask: Boolean mask of the allowed labels.
+
+    Returns:
+        For each segment a list of (label, score) tuples sorted by descending score.
+    """
+    pred = np.asarray(pred)
+    rows, cols = _select_predictions(pred, species_mask)
+    bounds = np.searchsorted(rows, np.arange(len(pred) + 1))
+
+    return [[(cfg.LABELS[cols[j]], pred[i, cols[j]]) for j in range(bounds[i], bounds[i + 1])] for i in range(len(pred))]
+
+
+def get_detections(timestamps: list, pred: np.ndarray, species_mask: np.ndarray) -> np.ndarray:
+    """Selects the detections of a batch of predictions.
+
+    Same selection as get_top_predictions, but the detections are stored in columns.
+
+    Args:
+        timestamps: A [start, end] pair for each segment.
+        pred: The prediction scores with shape (segments, labels).
+        species_mask: Boolean mask of the allowed labels.
+
+    Returns:
+        The detections with DETECTION_DTYPE, sorted by segment and descending score.
+    """
+    pred = np.asarray(pred)
+    times = np.asarray(timestamps, dtype="f8").reshape(-1, 2)
+
+    # Segments skipped by the activity pre-screen have NaN outputs and no detections
+    analyzed = ~np.isnan(pred).any(axis=1)
+
+    if not analyzed.all():
+        pred, times = pred[analyzed], times[analyzed]
+
+    rows, cols = _select_predictions(pred, species_mask)
+
+    detections = np.empty(len(rows), dtype=DETECTION_DTYPE)
+    detections["start"] = times[rows, 0]
+    detections["end"] = times[rows, 1]
+    detections["label"] = cols
+    detections["score"] = pred[rows, cols]
+
+    return detections
+
+
+def apply_sigmoid(prediction, logits: bool | None = None):
+    """Turns the model outputs into prediction scores.
+
+    Args:
+        prediction: The model outputs.
+        logits: Whether the outputs are logits, defaults to cfg.APPLY_SIGMOID.
+
+    Returns:
+        The sigmoid activations with the configured sensitivity or the unchanged outputs
+        if the model does not output logits.
+    """
+    # Logits or sigmoid activations?
+    if cfg.APPLY_SIGMOID if logits is None else logits:
+        return model.flat_sigmoid(np.array(prediction), sensitivity=-1, bias=cfg.SIGMOID_SENSITIVITY)
+
+    return prediction
+
+
+def predict(samples, raw: bool = False):
+    """Predicts the classes for the given samples.
+
+    Args:
+        samples: Samples to be predicted.
+        raw: If True, return the model outputs before the sigmoid is applied.
+
+    Returns:
+        The prediction scores.
+    """
+    # Prepare sample and pass through model
+    data = np.asarray(samples, dtype="float32")
+    prediction = _predict_cascade(data) if cfg.CASCADE_PRECISION else model.predict(data)
+
+    return prediction if raw else apply_sigmoid(prediction)
+
+
+def _predict_cascade(data: np.ndarray) -> np.ndarray:
+    """Predicts with the lower precision model and re-scores the candidates with the full model.
+
+    Chunks with a score of an allowed species >= cfg.CASCADE_THRESHOLD in the first stage are candidates.
+    Their outputs are replaced by the outputs of the MODEL_PRECISION model, all other chunks keep the outputs
+    of the first stage.
+
+    Args:
+        data: The audio chunks.
+
+    Returns:
+        The model outputs of the chunks.
+    """
+    start_time = time.perf_counter()
+    prediction = np.array(model.predict_cascade(data), dtype="float32")
+    first_stage_time = time.perf_counter()
+
+    species_mask = _get_cascade_species_mask() if cfg.LABELS else np.ones(prediction.shape[1], dtype=bool)
+    candidates = (apply_sigmoid(prediction)[:, species_mask] >= cfg.CASCADE_THRESHOLD).any(axis=1)
+
+    if candidates.any():
+        prediction[candidates] = model.predict(data[candidates])
+
+    CASCADE_STATS["chunks"] += len(data)
+    CASCADE_STATS["rescored"] += int(np.count_nonzero(candidates))
+    CASCADE_STATS["first_stage_time"] += first_stage_time - start_time
+    CASCADE_STATS["second_stage_time"] += time.perf_counter() - first_stage_time
+
+    return prediction
+
+
+def _get_cascade_species_mask() -> np.ndarray:
+    """Returns the species mask the candidates of the cascade are selected with.
+
+    The mask is only rebuilt if the labels or the species list in cfg are replaced.
+
+    Returns:
+        The mask of cfg.LABELS allowed by cfg.SPECIES_LIST.
+    """
+    global CASCADE_SPECIES_MASK  # noqa: PLW0603
+
+    key = (cfg.LABELS, cfg.SPECIES_LIST)
+
+    if CASCADE_SPECIES_MASK is None or any(a is not b for a, b in zip(CASCADE_SPECIES_MASK[0], key, strict=True)):
+        CASCADE_SPECIES_MASK = key, get_species_mask(*key)
+
+    return CASCADE_SPECIES_MASK[1]
+
+
+def reset_cascade_stats():
+    """Sets the counters of the cascade to zero."""
+    CASCADE_STATS.update(chunks=0, rescored=0, first_stage_time=0.0, second_stage_time=0.0)
+
+
+def reset_activity_stats():
+    """Sets the counters of the activity pre-screen to zero."""
+    ACTIVITY_STATS.update(chunks=0, skipped=0)
+
+
+def print_activity_stats(stats: Sequence[dict]):
+    """Prints how many chunks the activity pre-screen skipped.
+
+    Args:
+        stats: The ACTIVITY_STATS of each worker.
+    """
+    chunks = sum(s["chunks"] for s in stats)
+    skipped = sum(s["skipped"] for s in stats)
+
+    if not chunks:
+        return
+
+    step = (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+
+    print(f"Activity pre-screen: {skipped} of {chunks} chunks ({skipped / chunks:.1%}) skipped, about {skipped * step:.0f} seconds of audio", flush=True)
+
+
+def print_cascade_stats(stats: Sequence[dict]):
+    """Prints how many chunks the cascade re-scored and the estimated time saved.
+
+    The time the full model would have needed for all chunks is extrapolated from the re-scored chunks.
+
+    Args:
+        stats: The CASCADE_STATS of each worker.
+    """
+    chunks = sum(s["chunks"] for s in stats)
+    rescored = sum(s["rescored"] for s in stats)
+    first_stage_time = sum(s["first_stage_time"] for s in stats)
+    second_stage_time = sum(s["second_stage_time"] for s in stats)
+
+    if not chunks:
+        return
+
+    message = (
+        f"Cascade: {rescored / chunks:.1%} of {chunks} chunks re-scored, "
+        f"{cfg.CASCADE_PRECISION} {first_stage_time:.2f} seconds + {cfg.MODEL_PRECISION} {second_stage_time:.2f} seconds"
+    )
+
+    if rescored:
+        full_time = second_stage_time / rescored * chunks
+        saved = full_time - first_stage_time - second_stage_time
+        message += f", about {saved:.2f} seconds ({saved / max(full_time, 1e-9):.0%}) saved compared to {cfg.MODEL_PRECISION} only"
+
+    print(message, flush=True)
+
+
+def _get_file_shorthand(fpath: str):
+    """Returns the path of an audio file relative to the input path, without extension."""
+    rpath = fpath.replace(cfg.INPUT_PATH, "")
+
+    rpath = (rpath[1:] if rpath[0] in ["/", "\\"] else rpath) if rpath else os.path.basename(fpath)
+
+    return rpath.rsplit(".", 1)[0]
+
+
+def get_scores_file_name(fpath: str, scores_path: str):
+    """Returns the path of the score file of an audio file.
+
+    Args:
+        fpath: Path to the audio file.
+        scores_path: The output folder of the analysis that stored the scores.
+
+    Returns:
+        The path of the NPZ file.
+    """
+    return os.path.join(scores_path, _get_file_shorthand(fpath) + ".BirdNET.scores.npz")
+
+
+def get_result_file_names(fpath: str):
+    """
+    Generates a dictionary of result file names based on the input file path and configured result types.
+
+    Args:
+        fpath (str): The file path of the input file.
+
+    Returns:
+        dict: A dictionary where the keys are result types (e.g., "table", "audacity", "r", "kaleidoscope", "csv")
+              and the values are the corresponding output file paths.
+    """
+    result_names = {}
+    file_shorthand = _get_file_shorthand(fpath)
+
+    if "table" in cfg.RESULT_TYPES:
+        result_names["table"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.selection.table.txt")
+    if "audacity" in cfg.RESULT_TYPES:
+        result_names["audacity"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.txt")
+    # if "r" in cfg.RESULT_TYPES:
+    #     result_names["r"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.r.csv")
+    if "kaleidoscope" in cfg.RESULT_TYPES:
+        result_names["kaleidoscope"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.kaleidoscope.csv")
+    if "csv" in cfg.RESULT_TYPES:
+        result_names["csv"] = os.path.join(cfg.OUTPUT_PATH, file_shorthand + ".BirdNET.results.csv")
+    if "scores" in cfg.RESULT_TYPES:
+        result_names["scores"] = get_scores_file_name(fpath, cfg.OUTPUT_PATH)
+    if "sqlite" in cfg.RESULT_TYPES:
+        result_names["sqlite"] = os.path.join(cfg.OUTPUT_PATH, cfg.OUTPUT_SQLITE_FILENAME)
+
+    return result_names
+
+
+def get_file_parts(fpath: str) -> list[tuple[int, int | None]]:
+    """Splits a long audio file into ranges of chunks that can be analyzed independently.
+
+    Each range covers about FILE_SPLITTING_DURATION seconds of audio. Only files that can be
+    decoded from an arbitrary position are split.
+
+    Args:
+        fpath: Path to the audio file.
+
+    Returns:
+        A list of (index of the first chunk, index after the last chunk) tuples.
+        The last range ends with None. Files that are not split have the single range (0, None).
+    """
+    try:
+        duration = audio.get_audio_file_length(fpath)
+
+        if duration <= cfg.FILE_SPLITTING_DURATION or not audio.is_seekable(fpath):
+            return [(0, None)]
+
+    except Exception:
+        return [(0, None)]
+
+    step = (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+    chunks_per_part = max(1, int(cfg.FILE_SPLITTING_DURATION / step))
+    n_parts = math.ceil(duration / (chunks_per_part * step))
+    bounds = [i * chunks_per_part for i in range(n_parts)] + [None]
+
+    return list(itertools.pairwise(bounds))
+
+
+def get_file_detections(fpath: str, start: int = 0, end: int | None = None):
+    """Analyzes a range of an audio file.
+
+    Args:
+        fpath: Path to the audio file.
+        start: Index of the first chunk.
+        end: Index after the last chunk, None to analyze the file until the end.
+
+    Returns:
+        A tuple of (detections, scores). The detections have DETECTION_DTYPE and are sorted by
+        segment and descending score. The scores are the compressed raw model outputs if the
+        "scores" result type is selected, otherwise None.
+    """
+    if cfg.SCORES_INPUT_PATH:
+        return get_score_file_detections(fpath, start, end), None
+
+    detections = [np.empty(0, dtype=DETECTION_DTYPE)]
+    scores = [] if "scores" in cfg.RESULT_TYPES else None
+    species_mask = None
+
+    screen = cfg.ACTIVITY_THRESHOLD is not None
+
+    for timestamps, outputs in iterate_audio_batches(fpath, start=start, end=end, raw=scores is not None, screen=screen):
+        batch_detections, species_mask = _get_batch_detections(timestamps, outputs, scores, species_mask)
+        detections.append(batch_detections)
+
+    return np.concatenate(detections), concatenate_scores(scores) if scores is not None else None
+
+
+def _get_batch_detections(timestamps: list, outputs: np.ndarray, scores: list | None, species_mask: np.ndarray | None):
+    """Selects the detections of a batch of model outputs.
+
+    Args:
+        timestamps: The [start, end] pairs of the chunks.
+        outputs: The model outputs, before the sigmoid if scores is a list.
+        scores: List the compressed raw outputs are added to, None if they are not stored.
+        species_mask: Mask of the allowed labels, None to create it.
+
+    Returns:
+        A tuple of (detections, species mask).
+    """
+    pred = outputs
+
+    if scores is not None:
+        scores.append(compress_scores(timestamps, outputs))
+        pred = apply_sigmoid(outputs)
+
+    if not cfg.LABELS:
+        cfg.LABELS = [f"Species-{i}_Species-{i}" for i in range(len(pred[0]))]
+
+    if species_mask is None:
+        species_mask = get_species_mask(cfg.LABELS, cfg.SPECIES_LIST)
+
+    # Filter by species list and threshold or top N and sort by score
+    return get_detections(timestamps, pred, species_mask), species_mask
+
+
+def get_score_file_detections(fpath: str, start: int = 0, end: int | None = None, block_size: int = 4096) -> np.ndarray:
+    """Selects the detections of a file from its stored model outputs.
+
+    The sigmoid, species list, threshold and top N are applied with the current settings.
+    Whether the outputs are logits is taken from the score file, the stored timestamps already
+    reflect the overlap and speed of the original analysis. The configuration is not changed.
+
+    Args:
+        fpath: Path to the audio file.
+        start: Index of the first segment.
+        end: Index after the last segment, None to use all segments.
+        block_size: Number of segments processed at once.
+
+    Returns:
+        The detections with DETECTION_DTYPE, sorted by segment and descending score.
+
+    Raises:
+        ValueError: If the scores were computed with other labels.
+    """
+    scores_file = get_scores_file_name(fpath, cfg.SCORES_INPUT_PATH)
+
+    with np.load(scores_file) as data:
+        scores = {key: data[key] for key in data.files}
+
+    config = json.loads(str(scores["config"]))
+    num_labels = int(scores["num_labels"])
+
+    if not cfg.LABELS:
+        cfg.LABELS = [f"Species-{i}_Species-{i}" for i in range(num_labels)]
+
+    if config["labels"] != get_scores_config()["labels"]:
+        raise ValueError(f"Scores in {scores_file} were computed with different labels.")
+
+    species_mask = get_species_mask(cfg.LABELS, cfg.SPECIES_LIST)
+    timestamps = np.stack((scores["start"], scores["end"]), axis=1)[start:end]
+    outputs = scores["outputs"][start:end]
+    indices = scores["indices"][start:end] if "indices" in scores else None
+    detections = [np.empty(0, dtype=DETECTION_DTYPE)]
+
+    for i in range(0, len(outputs), block_size):
+        pred = apply_sigmoid(outputs[i : i + block_size].astype("float32"), config["apply_sigmoid"])
+
+        # Labels that were not stored can't be detected
+        if indices is not None:
+            sparse = pred
+            pred = np.full((len(sparse), num_labels), -np.inf, dtype="float32")
+            np.put_along_axis(pred, indices[i : i + block_size].astype(np.intp), sparse, axis=1)
+
+        block = get_detections(timestamps[i : i + block_size], pred, species_mask)
+        detections.append(block[np.isfinite(block["score"])])
+
+    return np.concatenate(detections)
+
+
+def compress_scores(timestamps: list, outputs: np.ndarray) -> dict[str, np.ndarray]:
+    """Converts a batch of raw model outputs to the compact format of the score files.
+
+    Outputs are stored as float16. If cfg.SCORES_TOP_K is set, only the highest
+    outputs of each segment are stored together with their label indices.
+
+    Args:
+        timestamps: A [start, end] pair for each segment.
+        outputs: The raw model outputs with shape (segments, labels).
+
+    Returns:
+        A dictionary with the "start", "end" and "outputs" arrays and the "indices" of the stored labels for top-K scores.
+    """
+    outputs = np.asarray(outputs)
+    times = np.asarray(timestamps, dtype="f8").reshape(-1, 2)
+    scores = {"start": times[:, 0], "end": times[:, 1]}
+
+    if 0 < cfg.SCORES_TOP_K < outputs.shape[1]:
+        indices = np.argpartition(-outputs, cfg.SCORES_TOP_K - 1, axis=1)[:, : cfg.SCORES_TOP_K]
+        indices = np.take_along_axis(indices, np.argsort(indices, axis=1), axis=1)
+        scores["indices"] = indices.astype(np.min_scalar_type(outputs.shape[1] - 1))
+        outputs = np.take_along_axis(outputs, indices, axis=1)
+
+    scores["outputs"] = outputs.astype("float16")
+
+    return scores
+
+
+def concatenate_scores(scores: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray] | None:
+    """Concatenates compressed score batches.
+
+    Args:
+        scores: The batches from compress_scores in time order.
+
+    Returns:
+        The scores of all segments or None if there are no batches.
+    """
+    if not scores:
+        return None
+
+    return {key: np.concatenate([s[key] for s in scores]) for key in scores[0]}
+
+
+def get_scores_config() -> dict:
+    """Returns the settings that determine the raw model outputs.
+
+    Thresholds, species lists and the sensitivity are not included, they are applied when the scores are analyzed.
+
+    Returns:
+        A dictionary with the model and the audio processing settings.
+    """
+    return {
+        "model": os.path.basename(cfg.CUSTOM_CLASSIFIER or cfg.MODEL_PATH),
+        "model_precision": cfg.MODEL_PRECISION,
+        "labels": hashlib.sha256("\n".join(cfg.LABELS or []).encode("utf-8")).hexdigest(),
+        "apply_sigmoid": bool(cfg.APPLY_SIGMOID),
+        "sample_rate": cfg.SAMPLE_RATE,
+        "sig_length": cfg.SIG_LENGTH,
+        "sig_overlap": cfg.SIG_OVERLAP,
+        "sig_minlen": cfg.SIG_MINLEN,
+        "audio_speed": cfg.AUDIO_SPEED,
+        "bandpass_fmin": cfg.BANDPASS_FMIN,
+        "bandpass_fmax": cfg.BANDPASS_FMAX,
+        "activity_threshold": cfg.ACTIVITY_THRESHOLD,
+        "cascade_precision": cfg.CASCADE_PRECISION,
+        "cascade_threshold": cfg.CASCADE_THRESHOLD if cfg.CASCADE_PRECISION else None,
+    }
+
+
+def get_audio_settings(fpath: str | None = None) -> dict:
+    """Returns the audio settings the detections of a file were computed with.
+
+    Detections from stored scores keep the overlap, speed and frequency range of the
+    original analysis, which the result files show instead of the current settings.
+
+    Args:
+        fpath: Path to the audio file, None for the current settings.
+
+    Returns:
+        A dictionary with the "sig_overlap", "audio_speed", "bandpass_fmin" and "bandpass_fmax".
+    """
+    keys = ("sig_overlap", "audio_speed", "bandpass_fmin", "bandpass_fmax")
+
+    if fpath is None or not cfg.SCORES_INPUT_PATH:
+        return {key: getattr(cfg, key.upper()) for key in keys}
+
+    with np.load(get_scores_file_name(fpath, cfg.SCORES_INPUT_PATH)) as data:
+        config = json.loads(str(data["config"]))
+
+    return {key: config[key] for key in keys}
+
+
+def save_scores(result_path: str, scores: dict[str, np.ndarray] | None):
+    """Saves the raw model outputs of a file.
+
+    The NPZ file contains the segment "start" and "end" times, the float16 "outputs" and for
+    top-K scores the label "indices". Segments skipped by the activity pre-screen have NaN outputs.
+    The "config" entry holds the settings from get_scores_config
+    as JSON, "config_hash" its SHA-256 hash and "num_labels" the number of model outputs.
+
+    Args:
+        result_path: Path of the NPZ file.
+        scores: The compressed scores of all segments, None if the file has no segments.
+    """
+    if scores is None:
+        scores = {"start": np.empty(0), "end": np.empty(0), "outputs": np.empty((0, len(cfg.LABELS or [])), dtype="float16")}
+
+    config = json.dumps(get_scores_config(), sort_keys=True)
+
+    os.makedirs(os.path.dirname(result_path), exist_ok=True)
+
+    np.savez_compressed(
+        result_path,
+        **scores,
+        num_labels=np.array(len(cfg.LABELS or [])),
+        config=np.array(config),
+        config_hash=np.array(hashlib.sha256(config.encode("utf-8")).hexdigest()),
+    )
+
+
+def analyze_file_part(item):
+    """Analyzes a range of an audio file.
+
+    Args:
+        item (tuple): A tuple containing the file path (str), the index of the first chunk
+                      and the index after the last chunk.
+
+    Returns:
+        tuple or None: The detections and scores of the range from get_file_detections and the number of
+                       chunks skipped by the activity pre-screen or None if an error occurs.
+    """
+    fpath, start, end = item
+    step = (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+
+    print(f"Analyzing {fpath} from {start * step:.1f} s", flush=True)
+
+    try:
+        skipped = ACTIVITY_STATS["skipped"]
+        detections, scores = get_file_detections(fpath, start, end)
+
+        return detections, scores, ACTIVITY_STATS["skipped"] - skipped
+
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot analyze audio file {fpath}.\n", flush=True)
+        utils.write_error_log(ex)
+
+        return None
+
+
+def analyze_files(fpaths: list[str]) -> list[dict[str, str | float] | None]:
+    """Analyzes several short audio files with shared batches.
+
+    Chunks of consecutive files are collected into batches of BATCH_SIZE, so files shorter than a
+    batch do not run the model with mostly empty batches. Each sample keeps the index of its file
+    and chunk, the outputs are assigned back to the files and a file is saved as soon as all of
+    its chunks are analyzed. Chunks skipped by the activity pre-screen do not take a place in a batch.
+    Existing results are not checked, the caller selects the files.
+
+    Args:
+        fpaths: Paths of the audio files.
+
+    Returns:
+        The result of each file, as returned by analyze_file.
+    """
+    raw = "scores" in cfg.RESULT_TYPES
+    screen = cfg.ACTIVITY_THRESHOLD is not None
+    results = [None] * len(fpaths)
+    detections = [[np.empty(0, dtype=DETECTION_DTYPE)] for _ in fpaths]
+    scores = [[] if raw else None for _ in fpaths]
+    lengths = [0.0] * len(fpaths)
+    skipped = [0] * len(fpaths)
+    failed = set()
+    samples, segments = [], []
+    n_samples = saved = 0
+    species_mask = None
+
+    def predict_samples():
+        nonlocal n_samples, species_mask
+
+        try:
+            outputs = _predict_batch(samples, False, raw, [segment[3] for segment in segments] if screen else None)[0]
+            offset = 0
+
+            # Segments of a file in a batch are consecutive chunks
+            for i, file_segments in itertools.groupby(segments, key=lambda segment: segment[0]):
+                group = list(file_segments)
+                n = sum(segment[2] for segment in group)
+                timestamps = _get_timestamps(group[0][1], n, lengths[i])
+                batch_detections, species_mask = _get_batch_detections(timestamps, outputs[offset : offset + n], scores[i], species_mask)
+                detections[i].append(batch_detections)
+                offset += n
+
+        except Exception as ex:
+            print("Error: Cannot analyze batch.\n", flush=True)
+            utils.write_error_log(ex)
+            failed.update(segment[0] for segment in segments)
+
+        samples.clear()
+        segments.clear()
+        n_samples = 0
+
+    def save_files(end):
+        nonlocal saved
+
+        for i in range(saved, end):
+            if i not in failed:
+                file_scores = concatenate_scores(scores[i]) if raw else None
+                results[i] = save_file_parts(fpaths[i], [(np.concatenate(detections[i]), file_scores, skipped[i])])
+
+            detections[i] = scores[i] = None
+
+        saved = end
+
+    for i, fpath in enumerate(fpaths):
+        print(f"Analyzing {fpath}", flush=True)
+
+        try:
+            lengths[i] = audio.get_audio_file_length(fpath)
+
+            for chunk_index, chunks in iterate_raw_audio_chunks(fpath):
+                chunks_active = get_activity_levels(chunks) >= cfg.ACTIVITY_THRESHOLD if screen else None
+                j = 0
+
+                while j < len(chunks):
+                    n = _get_batch_chunks(chunks_active, j, cfg.BATCH_SIZE - n_samples, len(chunks) - j)
+
+                    if screen:
+                        piece = chunks_active[j : j + n]
+                        segments.append((i, chunk_index + j, n, piece))
+                        skipped[i] += n - int(np.count_nonzero(piece))
+
+                        if piece.any():
+                            samples.append(chunks[j : j + n][piece])
+                            n_samples += int(np.count_nonzero(piece))
+                    else:
+                        samples.append(chunks[j : j + n])
+                        segments.append((i, chunk_index + j, n))
+                        n_samples += n
+
+                    j += n
+
+                    if n_samples == cfg.BATCH_SIZE:
+                        predict_samples()
+
+                        # All chunks of the previous files are analyzed
+                        save_files(i)
+
+        except Exception as ex:
+            print(f"Error: Cannot analyze audio file {fpath}.\n", flush=True)
+            utils.write_error_log(ex)
+            failed.add(i)
+
+    if segments:
+        predict_samples()
+
+    save_files(len(fpaths))
+
+    return results
+
+
+def analyze_task(item):
+    """Runs an analysis task in a worker.
+
+    Args:
+        item (str | tuple | list): Either the file path to analyze a whole file,
+                            (file path, start, end) to analyze a range of a file
+                            or a list of file paths to analyze short files with shared batches.
+
+    Returns:
+        The result of analyze_file, analyze_file_part or analyze_files.
+    """
+    if isinstance(item, tuple):
+        return analyze_file_part(item)
+
+    if isinstance(item, list):
+        return analyze_files(item)
+
+    return analyze_file(item)
+
+
+def get_task_duration(item) -> float:
+    """Returns the duration of the audio analyzed by a task.
+
+    Uses the cached file duration, files that cannot be read count as empty.
+
+    Args:
+        item (str | tuple | list): The file path, (file path, start, end) or a list of file paths.
+
+    Returns:
+        The duration in seconds.
+    """
+    if isinstance(item, list):
+        return sum(get_task_duration(fpath) for fpath in item)
+
+    fpath, start, end = item if isinstance(item, tuple) else (item, 0, None)
+
+    try:
+        duration = audio.get_audio_file_length(fpath)
+    except Exception:
+        return 0.0
+
+    step = (cfg.SIG_LENGTH - cfg.SIG_OVERLAP) * cfg.AUDIO_SPEED
+
+    return max(0.0, (duration if end is None else min(duration, end * step)) - start * step)
+
+
+def timed_analyze_task(item):
+    """Runs an analysis task and measures how long the worker was busy.
+
+    Args:
+        item (tuple): The index of the task and the task.
+
+    Returns:
+        A tuple of (task index, worker process id, busy time in seconds, get_worker_stats(), result of analyze_task).
+    """
+    index, task = item
+    start_time = time.perf_counter()
+    result = analyze_task(task)
+
+    # Pool workers exit without running atexit handlers, so the metadata of the task is committed now
+    audio.flush_metadata_cache()
+
+    return index, os.getpid(), time.perf_counter() - start_time, get_worker_stats(), result
+
+
+def get_worker_stats() -> dict:
+    """Returns the statistics of the current worker since it started.
+
+    Returns:
+        A dictionary with the "peak_memory" in MB or None and copies of the "activity" and "cascade" stats.
+    """
+    return {"peak_memory": utils.get_peak_rss_mb(), "activity": dict(ACTIVITY_STATS), "cascade": dict(CASCADE_STATS)}
+
+
+def print_worker_utilization(
+    busy_times: dict[int, float], task_counts: dict[int, int], wall_time: float, n_workers: int, peak_memory: dict[int, float] | None = None
+):
+    """Prints how much of the wall time each worker spent analyzing.
+
+    Args:
+        busy_times: Busy time in seconds per worker process id.
+        task_counts: Number of tasks per worker process id.
+        wall_time: Wall time of the whole analysis in seconds.
+        n_workers: Number of workers in the pool.
+        peak_memory: Peak memory in MB per worker process id, if known.
+    """
+    wall_time = max(wall_time, 1e-9)
+    total = sum(busy_times.values())
+    peak_memory = {pid: mb for pid, mb in (peak_memory or {}).items() if mb is not None}
+
+    print(f"Worker utilization: {total / (wall_time * n_workers):.0%} of {n_workers} workers over {wall_time:.2f} seconds", flush=True)
+
+    for i, (pid, busy) in enumerate(sorted(busy_times.items(), key=lambda w: w[1], reverse=True)):
+        memory = f", peak memory {peak_memory[pid]:.0f} MB" if pid in peak_memory else ""
+        print(f"  Worker {i + 1}: {task_counts[pid]} tasks, busy {busy:.2f} seconds ({busy / wall_time:.0%}){memory}", flush=True)
+
+    if peak_memory:
+        print(f"Peak memory: {max(peak_memory.values()):.0f} MB per worker, {sum(peak_memory.values()):.0f} MB in total", flush=True)
+
+
+def save_file_parts(fpath: str, parts: list[tuple | None]) -> dict[str, str | float] | None:
+    """Combines the detections of all ranges of a file and saves the result files.
+
+    Args:
+        fpath: Path to the audio file.
+        parts: The detections, scores and number of skipped chunks of each range, in the order of the ranges.
+
+    Returns:
+        dict or None: A dictionary of result file names, the "duration" of the file and the number of
+                      "skipped_chunks" if the pre-screen is used or None if a range failed or the results cannot be saved.
+    """
+    if any(part is None for part in parts):
+        return None
+
+    # Ranges are in time order, so the combined detections are sorted as well
+    detections = np.concatenate([part[0] for part in parts])
+    scores = concatenate_scores([part[1] for part in parts if part[1] is not None])
+    skipped = sum(part[2] for part in parts)
+    result_file_names = get_result_file_names(fpath)
+    duration = audio.get_audio_file_length(fpath)
+
+    try:
+        save_result_files(detections, result_file_names, fpath, scores, duration)
+
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot save result for {fpath}.\n", flush=True)
+        utils.write_error_log(ex)
+
+        return None
+
+    print(f"Finished {fpath}{_get_skipped_message(skipped)}", flush=True)
+
+    return result_file_names | {"duration": duration} | _get_skipped_result(skipped)
+
+
+def _get_skipped_message(skipped: int) -> str:
+    """Returns the part of the status message with the chunks skipped by the pre-screen."""
+    return f", {skipped} chunks skipped" if cfg.ACTIVITY_THRESHOLD is not None else ""
+
+
+def _get_skipped_result(skipped: int) -> dict[str, int]:
+    """Returns the number of skipped chunks for the result of a file if the pre-screen is used."""
+    return {"skipped_chunks": skipped} if cfg.ACTIVITY_THRESHOLD is not None else {}
+
+
+def get_run_config() -> dict:
+    """Returns the settings that determine the results of an analysis run.
+
+    Returns:
+        A dictionary with the settings of get_scores_config and the detection and output settings.
+    """
+    return get_scores_config() | {
+        "min_confidence": cfg.MIN_CONFIDENCE,
+        "sigmoid_sensitivity": cfg.SIGMOID_SENSITIVITY,
+        "species_list": hashlib.sha256("\n".join(cfg.SPECIES_LIST or []).encode("utf-8")).hexdigest(),
+        "translated_labels": hashlib.sha256("\n".join(cfg.TRANSLATED_LABELS or []).encode("utf-8")).hexdigest(),
+        "top_n": cfg.TOP_N,
+        "merge_consecutive": cfg.MERGE_CONSECUTIVE,
+        "file_splitting_duration": cfg.FILE_SPLITTING_DURATION,
+        "result_types": sorted(cfg.RESULT_TYPES),
+        "additional_columns": sorted(cfg.ADDITIONAL_COLUMNS or []),
+        "scores_top_k": cfg.SCORES_TOP_K,
+        "scores_input_path": cfg.SCORES_INPUT_PATH,
+    }
+
+
+class RunManifest:
+    """Progress of an analysis run, used to resume the run after it was interrupted.
+
+    The manifest lists the results of all completed files and the ranges of the files that are
+    not completed yet. The detections of each completed range are stored as a checkpoint in
+    CHECKPOINT_DIRNAME next to the manifest. Files are written under a temporary name and then
+    renamed, so an interrupted write never leaves a damaged file behind. A manifest that was
+    written with other settings is not used and marked as stale, the results it lists are
+    analyzed again and overwritten.
+
+    Args:
+        path: Path to the manifest file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoint_dir = os.path.join(os.path.dirname(path), cfg.CHECKPOINT_DIRNAME)
+        self.config_hash = hashlib.sha256(json.dumps(get_run_config(), sort_keys=True).encode("utf-8")).hexdigest()
+        self.files = {}
+        self.checkpoints = {}
+        self.obsolete = []
+        self.loaded = False
+        self.stale = False
+        self.last_save = 0.0
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if manifest.get("config_hash") != self.config_hash:
+            print(f"The settings have changed since {path} was written, all files are analyzed again and existing results are overwritten.", flush=True)
+            self.stale = True
+            return
+
+        self.files = manifest["files"]
+        self.checkpoints = {fpath: {(start, end): name for start, end, name in ranges} for fpath, ranges in manifest["checkpoints"].items()}
+        self.loaded = True
+
+    def get_result(self, fpath: str) -> dict[str, str | float] | None:
+        """Returns the result files of a completed file or None if the file is not completed."""
+        return self.files.get(fpath)
+
+    def get_checkpoints(self, fpath: str) -> dict[tuple[int, int | None], tuple]:
+        """Loads the completed ranges of a file.
+
+        Args:
+            fpath: Path to the audio file.
+
+        Returns:
+            A dictionary of (start, end) ranges and their (detections, scores, skipped chunks). Checkpoints that
+            cannot be read are left out, so their ranges are analyzed again.
+        """
+        parts = {}
+
+        for (start, end), name in self.checkpoints.get(fpath, {}).items():
+            try:
+                with np.load(os.path.join(self.checkpoint_dir, name)) as data:
+                    scores = {k.removeprefix("scores_"): data[k] for k in data.files if k.startswith("scores_")}
+                    parts[(start, end)] = (data["detections"], scores or None, int(data["skipped"]) if "skipped" in data.files else 0)
+            except (OSError, ValueError, KeyError):
+                continue
+
+        return parts
+
+    def add_checkpoint(self, task: tuple[str, int, int | None], part: tuple):
+        """Stores the detections and scores of a completed range of a file.
+
+        The manifest is written right away, as ranges take much longer to analyze than the manifest to write.
+
+        Args:
+            task: The (file path, start, end) range.
+            part: The (detections, scores, skipped chunks) of the range.
+        """
+        fpath, start, end = task
+        detections, scores, skipped = part
+
+        # A whole file is completed with its range
+        if start == 0 and end is None:
+            return
+
+        name = f"{hashlib.sha1(fpath.encode('utf-8')).hexdigest()[:16]}_{start}.npz"
+        path = os.path.join(self.checkpoint_dir, name)
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, detections=detections, skipped=skipped, **{f"scores_{k}": v for k, v in (scores or {}).items()})
+
+        os.replace(path + ".tmp", path)
+
+        self.checkpoints.setdefault(fpath, {})[(start, end)] = name
+        self.save(force=True)
+
+    def add_result(self, fpath: str, result: dict[str, str | float] | None):
+        """Marks a file as completed, its checkpoints are removed with the next write.
+
+        Args:
+            fpath: Path to the audio file.
+            result: The result files of the file, files without results are not completed.
+        """
+        if result is None:
+            return
+
+        self.files[fpath] = result
+        self.obsolete.extend(self.checkpoints.pop(fpath, {}).values())
+        self.save()
+
+    def save(self, force: bool = False):
+        """Writes the manifest, at most every MANIFEST_SAVE_INTERVAL seconds unless forced.
+
+        Args:
+            force: Whether to write the manifest regardless of the last write.
+        """
+        if not force and time.monotonic() - self.last_save < MANIFEST_SAVE_INTERVAL:
+            return
+
+        manifest = {
+            "config_hash": self.config_hash,
+            "files": self.files,
+            "checkpoints": {fpath: [[start, end, name] for (start, end), name in ranges.items()] for fpath, ranges in self.checkpoints.items()},
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(self.path + ".tmp", self.path)
+        self.last_save = time.monotonic()
+
+        # Checkpoints of completed files are only removed once the manifest no longer lists them
+        for name in self.obsolete:
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.checkpoint_dir, name))
+
+        self.obsolete.clear()
+
+        if not self.checkpoints:
+            with contextlib.suppress(OSError):
+                os.rmdir(self.checkpoint_dir)
+
+
+def _measure_worker(config: dict, barrier, batch_sizes: Sequence[int], duration: float, results):
+    """Measures the throughput of one calibration worker.
+
+    Runs in its own process, so the model is loaded with the TFLite threads of the configuration.
+    All workers start each measurement at the same time.
+
+    Args:
+        config: The configuration to measure.
+        barrier: Barrier shared by all workers of the measurement.
+        batch_sizes: The batch sizes to measure.
+        duration: Number of seconds each batch size is measured.
+        results: Queue that receives the chunks per second of each batch size.
+    """
+    cfg.set_config(config)
+
+    rng = np.random.default_rng(cfg.RANDOM_SEED)
+    rates = []
+
+    try:
+        for batch_size in batch_sizes:
+            samples = rng.uniform(-0.5, 0.5, (batch_size, int(cfg.SAMPLE_RATE * cfg.SIG_LENGTH))).astype("float32")
+
+            # The engine splits the samples into batches of BATCH_SIZE
+            cfg.BATCH_SIZE = batch_size
+
+            # Load the model and resize the input before measuring
+            predict(samples)
+            barrier.wait(timeout=60 + duration)
+
+            n = 0
+            start_time = time.perf_counter()
+
+            while (elapsed := time.perf_counter() - start_time) < duration:
+                predict(samples)
+                n += batch_size
+
+            rates.append(n / elapsed)
+
+    except Exception as ex:
+        # Let the other workers stop waiting as well
+        barrier.abort()
+        utils.write_error_log(ex)
+        rates = [0.0] * len(batch_sizes)
+
+    results.put(rates)
+
+
+def measure_throughput(workers: int, tflite_threads: int, batch_sizes: Sequence[int], duration: float = AUTOTUNE_DURATION) -> list[float]:
+    """Measures the inference throughput of a number of workers on synthetic audio.
+
+    Args:
+        workers: Number of worker processes.
+        tflite_threads: Number of TFLite threads per worker.
+        batch_sizes: The batch sizes to measure.
+        duration: Number of seconds each batch size is measured.
+
+    Returns:
+        The chunks per second of all workers for each batch size, 0 if the measurement failed.
+    """
+    config = cfg.get_config() | {"TFLITE_THREADS": tflite_threads}
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_measure_worker, args=(config, barrier, batch_sizes, duration, results)) for _ in range(workers)]
+
+    for p in processes:
+        p.start()
+
+    try:
+        rates = [results.get(timeout=120 + duration * len(batch_sizes)) for _ in processes]
+    except queue.Empty:
+        return [0.0] * len(batch_sizes)
+    finally:
+        for p in processes:
+            p.join(timeout=10)
+
+            if p.is_alive():
+                p.terminate()
+
+    return [sum(r) for r in zip(*rates, strict=True)]
+
+
+def get_autotune_candidates(threads: int) -> list[tuple[int, int]]:
+    """Returns the splits of the threads into workers and TFLite threads that are measured.
+
+    Args:
+        threads: Number of CPU threads.
+
+    Returns:
+        A list of (workers, TFLite threads per worker) tuples with powers of two and all threads as workers.
+    """
+    workers = sorted({2**i for i in range(threads.bit_length())} | {threads})
+
+    return [(w, max(1, threads // w)) for w in workers]
+
+
+def get_autotune_key(threads: int) -> str:
+    """Returns the key of the current host, model and number of threads in the autotune cache."""
+    model_name = os.path.basename(cfg.CUSTOM_CLASSIFIER or cfg.MODEL_PATH)
+
+    precision = f"{cfg.CASCADE_PRECISION}>{cfg.MODEL_PRECISION}" if cfg.CASCADE_PRECISION else cfg.MODEL_PRECISION
+
+    return f"{platform.node()}|{os.cpu_count()}|{model_name}|{precision}|{threads}"
+
+
+def autotune(threads: int) -> dict:
+    """Finds the fastest number of workers, TFLite threads and batch size for this machine.
+
+    Each split of the threads is measured with all AUTOTUNE_BATCH_SIZES. The result is stored
+    in PERFORMANCE_AUTOTUNE_CACHE_FILE, so later runs with the same host, model and threads use it directly.
+
+    Args:
+        threads: Number of CPU threads to use.
+
+    Returns:
+        A dictionary with cpu_threads, tflite_threads, batch_size and the measured chunks_per_second.
+    """
+    key = get_autotune_key(threads)
+    cache = {}
+
+    if cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE:
+        try:
+            with open(cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    if key in cache:
+        return cache[key]
+
+    print(f"Autotuning for {threads} threads...", flush=True)
+
+    best = None
+
+    for workers, tflite_threads in get_autotune_candidates(threads):
+        rates = measure_throughput(workers, tflite_threads, AUTOTUNE_BATCH_SIZES)
+
+        for batch_size, rate in zip(AUTOTUNE_BATCH_SIZES, rates, strict=True):
+            print(f"  {workers} workers x {tflite_threads} TFLite threads, batch size {batch_size}: {rate:.1f} chunks/s", flush=True)
+
+            if best is None or rate > best["chunks_per_second"]:
+                best = {"cpu_threads": workers, "tflite_threads": tflite_threads, "batch_size": batch_size, "chunks_per_second": rate}
+
+    if cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE and best["chunks_per_second"] > 0:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE)), exist_ok=True)
+
+            with open(cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(cache | {key: best}, f, indent=2)
+
+            os.replace(cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE + ".tmp", cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE)
+        except OSError as e:
+            print(f"Autotune cache {cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE} is not available: {e}", flush=True)
+
+    return best
+
+
+def get_memory_limits(max_memory: float, workers: int) -> tuple[int, int]:
+    """Derives the decoding window and the number of prefetched blocks from a memory budget.
+
+    Each worker holds its interpreters, the block that is decoded, the prefetched blocks and the block
+    that is analyzed. Prefetching is reduced before the window gets shorter than MIN_WINDOW_DURATION.
+
+    Args:
+        max_memory: Memory budget of all workers in MB.
+        workers: Number of worker processes.
+
+    Returns:
+        A tuple of (FILE_SPLITTING_DURATION, PREFETCH_DEPTH) that fits the budget or the smallest values if it does not.
+    """
+    base_memory = get_worker_base_memory()
+    worker_memory = max_memory / max(1, workers) - base_memory
+    window_memory = cfg.SAMPLE_RATE * 4 / 1024**2
+
+    for depth in range(cfg.PREFETCH_DEPTH, -1, -1):
+        window = int(worker_memory / (window_memory * (WINDOW_MEMORY_FACTOR + depth + 1)))
+
+        if window >= MIN_WINDOW_DURATION:
+            return min(cfg.FILE_SPLITTING_DURATION, window), depth
+
+    print(
+        f"Memory budget of {max_memory:.0f} MB is too small for {workers} worker(s), "
+        f"each needs at least {base_memory + MIN_WINDOW_DURATION * window_memory * (WINDOW_MEMORY_FACTOR + 1):.0f} MB",
+        flush=True,
+    )
+
+    return min(cfg.FILE_SPLITTING_DURATION, MIN_WINDOW_DURATION), 0
+
+
+def get_worker_base_memory() -> float:
+    """Estimates the memory of a worker without audio in MB.
+
+    Counts an interpreter for each batch shape the inference engine may allocate
+    with cfg.BATCH_SIZE, for the main model and the first stage of the cascade.
+
+    Returns:
+        The estimated memory in MB.
+    """
+    shapes = model.get_batch_shapes(max(1, cfg.BATCH_SIZE))
+    engines = 2 if cfg.CASCADE_PRECISION else 1
+
+    return WORKER_BASE_MEMORY + engines * (len(shapes) * INTERPRETER_MEMORY + sum(shapes) * INTERPRETER_SAMPLE_MEMORY)
+
+
+def init_worker(config: dict, database_queue=None):
+    """Initializes an analysis worker.
+
+    Used as Pool initializer, so the configuration is sent to each worker once instead of with every task.
+
+    Args:
+        config: Snapshot of the configuration from cfg.get_config().
+        database_queue: Queue of the DatabaseWriter for the "sqlite" result type.
+    """
+    global DATABASE_QUEUE  # noqa: PLW0603
+
+    cfg.set_config(config)
+    DATABASE_QUEUE = database_queue
+
+    # Forked workers inherit the counters of the main process
+    reset_activity_stats()
+    reset_cascade_stats()
+
+
+def analyze_file(fpath: str) -> dict[str, str | float] | None:
+    """
+    Analyzes an audio file and generates prediction results.
+
+    Uses the current configuration, workers receive it through init_worker.
+
+    Args:
+        fpath (str): The path of the audio file.
+
+    Returns:
+        dict or None: A dictionary of result file names and the length of the file in seconds
+                      under the key "duration" if analysis is successful, None if the file is
+                      skipped or an error occurs.
+    Raises:
+        Exception: If there is an error in reading the audio file or saving the results.
+    """
+    result_file_names = get_result_file_names(fpath)
+
+    if cfg.SKIP_EXISTING_RESULTS and has_results(fpath, result_file_names):
+        print(f"Skipping {fpath} as it has already been analyzed", flush=True)
+        return None
+
+    # Start time
+    start_time = datetime.datetime.now()
+
+    # Status
+    print(f"Analyzing {fpath}", flush=True)
+
+    # Process each batch
+    try:
+        skipped = ACTIVITY_STATS["skipped"]
+        detections, scores = get_file_detections(fpath)
+        skipped = ACTIVITY_STATS["skipped"] - skipped
+
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot analyze audio file {fpath}.\n", flush=True)
+        utils.write_error_log(ex)
+
+        return None
+
+    # The length is known from decoding, so the result files and combining the results do not have to open the file again
+    duration = audio.get_audio_file_length(fpath)
 
     # Save as selection table
     try:
-        save_result_files(results, result_file_names, fpath)
+        save_result_files(detections, result_file_names, fpath, scores, duration)
 
     except Exception as ex:
         # Write error log
@@ -695,6 +2553,6 @@ def analyze_file(item) -> dict[str, str] | None:
         return None
 
     delta_time = (datetime.datetime.now() - start_time).total_seconds()
-    print(f"Finished {fpath} in {delta_time:.2f} seconds", flush=True)
+    print(f"Finished {fpath} in {delta_time:.2f} seconds{_get_skipped_message(skipped)}", flush=True)
 
-    return result_file_names
+    return result_file_names | {"duration": duration} | _get_skipped_result(skipped)
@@ -1,14 +1,35 @@
 """Module containing audio helper functions."""
 
+import atexit
+import functools
+import math
+import os
+import sqlite3
+import time
+
 import librosa
 import numpy as np
 import soundfile as sf
-from scipy.signal import find_peaks, firwin, kaiserord, lfilter
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import butter, find_peaks, firwin, kaiserord, oaconvolve, sosfilt
 
 import birdnet_analyzer.config as cfg
 
 RANDOM = np.random.RandomState(cfg.RANDOM_SEED)
 
+# Metadata of audio files by (path, size, mtime) and the connection to the on-disk index
+METADATA_CACHE: dict[tuple[str, int, int], tuple[float, int, int]] = {}
+METADATA_DB: sqlite3.Connection | None = None
+METADATA_DB_KEY: tuple[int, str | None] | None = None
+
+# Rows not yet written to the on-disk index, they are committed in batches
+METADATA_PENDING: list[tuple] = []
+METADATA_LAST_COMMIT = 0.0
+
+# Maximum number of pending rows and seconds between commits to the on-disk index
+METADATA_COMMIT_SIZE = 256
+METADATA_COMMIT_INTERVAL = 5.0
+
 
 def open_audio_file(path: str, sample_rate=48000, offset=0.0, duration=None, fmin=None, fmax=None, speed=1.0):
     """Open an audio file.
@@ -49,6 +70,346 @@ def open_audio_file(path: str, sample_rate=48000, offset=0.0, duration=None, fmi
     return sig, rate
 
 
+def stream_audio_file(path: str, sample_rate=48000, block_duration=600.0, fmin=None, fmax=None, speed=1.0, offset=0.0, duration=None):
+    """Decodes an audio file sequentially in blocks.
+
+    The file is opened once and decoded from start to end. WAV, FLAC and other formats supported by
+    libsndfile are read with soundfile, everything else is piped through a single audioread (ffmpeg) decoder.
+    Each block is converted to mono, resampled and bandpass filtered with the same settings as open_audio_file.
+
+    Args:
+        path: Path to the audio file.
+        sample_rate: The sample rate at which the file should be processed.
+        block_duration: Duration of the decoded blocks in seconds.
+        fmin: Minimum frequency for bandpass filter.
+        fmax: Maximum frequency for bandpass filter.
+        speed: Speed factor for audio playback.
+        offset: The starting offset in seconds.
+        duration: Maximum duration of the decoded content in seconds.
+
+    Yields:
+        The audio time series in consecutive blocks.
+    """
+    try:
+        context = sf.SoundFile(path)
+        read_blocks = _read_soundfile_blocks
+    except sf.SoundFileRuntimeError:
+        import audioread
+
+        context = audioread.audio_open(path)
+        read_blocks = _read_audioread_blocks
+
+    with context as f:
+        rate = f.samplerate
+        start = round(offset * rate)
+        frames = round(duration * rate) if duration is not None else -1
+        blocks = read_blocks(f, max(1, int(block_duration * rate)), start, frames)
+
+        if sample_rate is not None and (speed != 1.0 or rate != sample_rate):
+            # Resample with "fake" sample rate if the speed is changed
+            blocks = _resample_blocks(blocks, int(rate * speed) if speed != 1.0 else rate, sample_rate, start)
+            rate = sample_rate
+
+        # Bandpass filter, without transients at the block boundaries
+        if fmin is not None and fmax is not None:
+            blocks = bandpass_blocks(blocks, rate, fmin, fmax)
+
+        yield from blocks
+
+
+def _read_soundfile_blocks(sf_desc: sf.SoundFile, block_size: int, start: int = 0, frames: int = -1):
+    """Reads mono blocks from an open soundfile.
+
+    Args:
+        sf_desc: The open soundfile.
+        block_size: Number of frames per block.
+        start: The first frame to read.
+        frames: Maximum number of frames to read, -1 reads until the end of the file.
+
+    Yields:
+        The mono signal of each block.
+    """
+    if start:
+        sf_desc.seek(min(start, sf_desc.frames))
+
+    for block in sf_desc.blocks(blocksize=block_size, frames=frames, dtype="float32", always_2d=True):
+        yield block[:, 0] if block.shape[1] == 1 else np.mean(block, axis=1)
+
+
+def _read_audioread_blocks(ar_desc, block_size: int, start: int = 0, frames: int = -1):
+    """Reads mono blocks from an open audioread decoder.
+
+    Audioread cannot seek, so everything before the first frame is decoded and dropped.
+
+    Args:
+        ar_desc: The open audioread file.
+        block_size: Number of frames per block.
+        start: The first frame to read.
+        frames: Maximum number of frames to read, -1 reads until the end of the file.
+
+    Yields:
+        The mono signal of each block.
+    """
+    channels = ar_desc.channels
+    skip = start * channels
+    remaining = frames * channels if frames >= 0 else np.inf
+    buffers = []
+    n = 0
+
+    for buf in ar_desc:
+        frame = librosa.util.buf_to_float(buf, dtype="float32")
+
+        if skip:
+            dropped = min(skip, len(frame))
+            frame = frame[dropped:]
+            skip -= dropped
+
+        frame = frame[: int(min(len(frame), remaining))]
+        remaining -= len(frame)
+        buffers.append(frame)
+        n += len(frame)
+
+        if n >= block_size * channels:
+            block = np.concatenate(buffers)
+            end = block_size * channels * (n // (block_size * channels))
+            buffers, n = [block[end:]], n - end
+
+            yield np.mean(block[:end].reshape(-1, channels), axis=1)
+
+        if remaining <= 0:
+            break
+
+    if n:
+        yield np.mean(np.concatenate(buffers).reshape(-1, channels), axis=1)
+
+
+def is_seekable(path: str):
+    """
+    Checks if an audio file can be decoded from an offset without decoding everything before it.
+
+    Args:
+        path (str): The file path to the audio file.
+
+    Returns:
+        bool: True if the file can be read with soundfile.
+    """
+    try:
+        sf.info(path)
+    except sf.SoundFileRuntimeError:
+        return False
+
+    return True
+
+
+def _resample_blocks(blocks, orig_sr: int, target_sr: int, start: int = 0):
+    """Resamples a sequence of blocks as if it was one continuous signal.
+
+    Blocks are resampled with enough context on both sides, so the result matches resampling
+    the whole signal. To keep input and output samples aligned, only multiples of the smallest
+    block that maps to an integer number of output samples are resampled at once.
+
+    Args:
+        blocks: Iterable of consecutive signal blocks.
+        orig_sr: The original sample rate.
+        target_sr: The target sample rate.
+        start: Position of the first block in the signal, the length of the last block
+               is computed for the whole signal.
+
+    Yields:
+        The resampled blocks.
+    """
+    gcd = math.gcd(orig_sr, target_sr)
+    unit_in, unit_out = orig_sr // gcd, target_sr // gcd
+
+    # The resampling filter extends over a few zero crossings of the lower sample rate
+    context = unit_in * math.ceil(64 * max(1, orig_sr / target_sr) / unit_in)
+    history = np.empty(0, dtype="float32")
+    pending = history
+    n_in, n_out = start, start * target_sr // orig_sr
+
+    for block in blocks:
+        pending = np.concatenate((pending, block))
+        n_in += len(block)
+        n = (len(pending) - context) // unit_in * unit_in
+
+        if n <= 0:
+            continue
+
+        y = librosa.resample(np.concatenate((history, pending[: n + context])), orig_sr=orig_sr, target_sr=target_sr, res_type="kaiser_fast")
+        offset = len(history) // unit_in * unit_out
+        n_out += n // unit_in * unit_out
+
+        yield y[offset : offset + n // unit_in * unit_out]
+
+        history = np.concatenate((history, pending[:n]))[-context:]
+        pending = pending[n:]
+
+    if len(pending):
+        y = librosa.resample(np.concatenate((history, pending)), orig_sr=orig_sr, target_sr=target_sr, res_type="kaiser_fast")
+        offset = len(history) // unit_in * unit_out
+
+        # Same output length as librosa.resample for the whole signal
+        yield librosa.util.fix_length(y[offset:], size=int(np.ceil(n_in * (target_sr / orig_sr))) - n_out)
+
+
+def get_audio_file_info(path: str):
+    """
+    Get the duration, native sample rate and number of channels of an audio file.
+
+    Only the header of the file is read. The result is cached by path, size and modification time
+    in memory and in the on-disk index at cfg.AUDIO_METADATA_CACHE_FILE.
+
+    Args:
+        path (str): The file path to the audio file.
+
+    Returns:
+        tuple: The duration in seconds, the sample rate and the number of channels.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    info = METADATA_CACHE.get(key)
+
+    if info is None:
+        db = _get_metadata_db()
+        info = _load_metadata(db, key)
+
+        if info is None:
+            info = _read_audio_file_info(path)
+            _save_metadata(db, key, info)
+
+        METADATA_CACHE[key] = info
+
+    return info
+
+
+def _read_audio_file_info(path: str):
+    """Reads the duration, sample rate and number of channels from the header of an audio file.
+
+    Args:
+        path: The file path to the audio file.
+
+    Returns:
+        A tuple of (duration, sample rate, channels).
+    """
+    try:
+        info = sf.info(path)
+
+        return info.duration, info.samplerate, info.channels
+    except sf.SoundFileRuntimeError:
+        import audioread
+
+        with audioread.audio_open(path) as f:
+            return f.duration, f.samplerate, f.channels
+
+
+def _get_metadata_db():
+    """Opens the on-disk metadata index.
+
+    The connection is opened once per process, the index is not used if it cannot be opened.
+
+    Returns:
+        The sqlite connection or None.
+    """
+    global METADATA_DB, METADATA_DB_KEY  # noqa: PLW0603
+
+    db_key = (os.getpid(), cfg.AUDIO_METADATA_CACHE_FILE)
+
+    if db_key != METADATA_DB_KEY:
+        # Rows inherited from a parent process are written by the parent
+        if METADATA_DB_KEY is not None and METADATA_DB_KEY[0] == db_key[0]:
+            flush_metadata_cache()
+        else:
+            METADATA_PENDING.clear()
+
+        METADATA_DB, METADATA_DB_KEY = None, db_key
+
+        if cfg.AUDIO_METADATA_CACHE_FILE:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(cfg.AUDIO_METADATA_CACHE_FILE)), exist_ok=True)
+
+                db = sqlite3.connect(cfg.AUDIO_METADATA_CACHE_FILE, timeout=30)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS audio_metadata ("
+                    "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, duration REAL, sample_rate INTEGER, channels INTEGER)"
+                )
+                db.commit()
+
+                METADATA_DB = db
+            except (OSError, sqlite3.Error) as e:
+                print(f"Audio metadata cache {cfg.AUDIO_METADATA_CACHE_FILE} is not available: {e}", flush=True)
+
+    return METADATA_DB
+
+
+def _load_metadata(db: sqlite3.Connection | None, key: tuple[str, int, int]):
+    """Looks up the metadata of a file in the on-disk index.
+
+    Args:
+        db: The sqlite connection or None.
+        key: Tuple of (path, size, mtime).
+
+    Returns:
+        A tuple of (duration, sample rate, channels) or None if the file is not indexed or has changed.
+    """
+    if db is None:
+        return None
+
+    try:
+        row = db.execute("SELECT size, mtime, duration, sample_rate, channels FROM audio_metadata WHERE path = ?", (key[0],)).fetchone()
+    except sqlite3.Error:
+        return None
+
+    if row is None or tuple(row[:2]) != key[1:]:
+        return None
+
+    return row[2], row[3], row[4]
+
+
+def _save_metadata(db: sqlite3.Connection | None, key: tuple[str, int, int], info: tuple[float, int, int]):
+    """Stores the metadata of a file in the on-disk index.
+
+    Rows are committed in batches of METADATA_COMMIT_SIZE or after METADATA_COMMIT_INTERVAL seconds,
+    so indexing many files does not write the index once per file.
+
+    Args:
+        db: The sqlite connection or None.
+        key: Tuple of (path, size, mtime).
+        info: Tuple of (duration, sample rate, channels).
+    """
+    if db is None:
+        return
+
+    METADATA_PENDING.append((*key, *info))
+
+    if len(METADATA_PENDING) >= METADATA_COMMIT_SIZE or time.monotonic() - METADATA_LAST_COMMIT >= METADATA_COMMIT_INTERVAL:
+        flush_metadata_cache()
+
+
+def flush_metadata_cache():
+    """Commits the pending rows to the on-disk metadata index."""
+    global METADATA_LAST_COMMIT  # noqa: PLW0603
+
+    METADATA_LAST_COMMIT = time.monotonic()
+
+    if METADATA_DB is None or not METADATA_PENDING:
+        METADATA_PENDING.clear()
+        return
+
+    try:
+        with METADATA_DB:
+            METADATA_DB.executemany("INSERT OR REPLACE INTO audio_metadata VALUES (?, ?, ?, ?, ?, ?)", METADATA_PENDING)
+    except sqlite3.Error:
+        pass
+
+    METADATA_PENDING.clear()
+
+
+# Pool workers are terminated without atexit handlers, analysis workers flush after each task
+atexit.register(flush_metadata_cache)
+
+
 def get_audio_file_length(path):
     """
     Get the length of an audio file in seconds.
@@ -59,9 +420,7 @@ def get_audio_file_length(path):
     Returns:
         float: The duration of the audio file in seconds.
     """
-    # Open file with librosa (uses ffmpeg or libav)
-
-    return librosa.get_duration(path=path, sr=None)
+    return get_audio_file_info(path)[0]
 
 
 def get_sample_rate(path: str):
@@ -74,7 +433,7 @@ def get_sample_rate(path: str):
     Returns:
         int: The sample rate of the audio file.
     """
-    return librosa.get_samplerate(path)
+    return get_audio_file_info(path)[1]
 
 
 def save_signal(sig, fname: str, rate=48000):
@@ -126,7 +485,7 @@ def pad(sig, seconds, srate, amount=None):
     return sig
 
 
-def split_signal(sig, rate, seconds, overlap, minlen, amount=None):
+def split_signal(sig, rate, seconds, overlap, minlen, amount=None, *, writeable=True):
     """Split signal with overlap.
 
     Args:
@@ -135,9 +494,12 @@ def split_signal(sig, rate, seconds, overlap, minlen, amount=None):
         seconds: The duration of a segment.
         overlap: The overlapping seconds of segments.
         minlen: Minimum length of a split.
+        amount: Intensity of the noise used for padding if cfg.USE_NOISE is set, random if None.
+        writeable: If False, chunks that need no padding are returned as a read-only view
+                   of the signal instead of a copy. Overlapping chunks of the view share memory.
 
     Returns:
-        A list of splits.
+        An array of shape (number of splits, split length).
     """
 
     # Split signal to chunks of duration with overlap, whereas each chunk still has minimum duration of signal
@@ -168,7 +530,7 @@ def split_signal(sig, rate, seconds, overlap, minlen, amount=None):
     elif sig.size - lastchunkpos < minsize:
         lastchunkpos = lastchunkpos - stepsize
 
-    # Append noise or empty signal of chunk duration, so all splits have desired length
+    # Noise or empty signal of chunk duration, so all splits have desired length
     if not cfg.USE_NOISE:
         noise = np.zeros(shape=chunksize, dtype=sig.dtype)
     else:
@@ -177,16 +539,42 @@ def split_signal(sig, rate, seconds, overlap, minlen, amount=None):
             amount = RANDOM.uniform(0.1, 0.5)
         # Create Gaussian noise
         try:
-            noise = RANDOM.normal(loc=min(sig) * amount, scale=max(sig) * amount, size=chunksize).astype(sig.dtype)
+            noise = RANDOM.normal(loc=np.min(sig) * amount, scale=np.max(sig) * amount, size=chunksize).astype(sig.dtype)
         except:
             noise = np.zeros(shape=chunksize, dtype=sig.dtype)
-    data = np.concatenate((sig, noise))
 
-    # Split signal with overlap
-    sig_splits = []
-    sig_splits.extend(data[i : i + chunksize] for i in range(0, lastchunkpos + 1, stepsize))
+    # Split signal with overlap, chunks that are completely inside the signal are a view of the signal
+    n_chunks = lastchunkpos // stepsize + 1 if lastchunkpos >= 0 else 0
+    sig_splits = sliding_chunks(sig, chunksize, stepsize)[:n_chunks]
+
+    if len(sig_splits) == n_chunks:
+        return sig_splits if not writeable else sig_splits.copy()
+
+    # Only pad the chunks that extend beyond the end of the signal
+    padded_splits = []
+
+    for i in range(len(sig_splits) * stepsize, lastchunkpos + 1, stepsize):
+        split = sig[i : i + chunksize]
+        padded_splits.append(np.concatenate((split, noise[: chunksize - split.size])))
+
+    return np.concatenate((sig_splits, padded_splits))
+
+
+def sliding_chunks(sig, chunksize, stepsize):
+    """Returns all chunks that are completely inside the signal without copying it.
+
+    Args:
+        sig: The signal.
+        chunksize: Number of samples per chunk.
+        stepsize: Number of samples between the starts of two chunks.
+
+    Returns:
+        A read-only view of the signal with shape (number of chunks, chunksize).
+    """
+    if sig.size < chunksize:
+        return np.empty((0, chunksize), dtype=sig.dtype)
 
-    return sig_splits
+    return sliding_window_view(sig, chunksize)[::stepsize]
 
 
 def crop_center(sig, rate, seconds):
@@ -274,48 +662,101 @@ def smart_crop_signal(sig, rate, sig_length, sig_overlap, sig_minlen):
     return peak_splits
 
 
-def bandpass(sig, rate, fmin, fmax, order=5):
+@functools.lru_cache(maxsize=32)
+def get_bandpass_sos(rate, fmin, fmax, order=5):
     """
-    Apply a bandpass filter to the input signal.
+    Designs the Butterworth filter used by bandpass as second-order sections.
+
+    Designs are cached, so the filter is only computed once per setting.
 
     Args:
-        sig (numpy.ndarray): The input signal to be filtered.
-        rate (int): The sampling rate of the input signal.
+        rate (int): The sampling rate of the signal.
         fmin (float): The minimum frequency for the bandpass filter.
         fmax (float): The maximum frequency for the bandpass filter.
         order (int, optional): The order of the filter. Default is 5.
 
     Returns:
-        numpy.ndarray: The filtered signal as a float32 array.
+        numpy.ndarray: The float32 second-order sections or None if no filter has to be applied.
     """
     # Check if we have to bandpass at all
     if (fmin == cfg.SIG_FMIN and fmax == cfg.SIG_FMAX) or fmin > fmax:
-        return sig
-
-    from scipy.signal import butter, lfilter
+        return None
 
     nyquist = 0.5 * rate
 
     # Highpass?
     if fmin > cfg.SIG_FMIN and fmax == cfg.SIG_FMAX:
-        low = fmin / nyquist
-        b, a = butter(order, low, btype="high")
-        sig = lfilter(b, a, sig)
+        sos = butter(order, fmin / nyquist, btype="high", output="sos")
 
     # Lowpass?
     elif fmin == cfg.SIG_FMIN and fmax < cfg.SIG_FMAX:
-        high = fmax / nyquist
-        b, a = butter(order, high, btype="low")
-        sig = lfilter(b, a, sig)
+        sos = butter(order, fmax / nyquist, btype="low", output="sos")
 
     # Bandpass?
     elif fmin > cfg.SIG_FMIN and fmax < cfg.SIG_FMAX:
-        low = fmin / nyquist
-        high = fmax / nyquist
-        b, a = butter(order, [low, high], btype="band")
-        sig = lfilter(b, a, sig)
+        sos = butter(order, [fmin / nyquist, fmax / nyquist], btype="band", output="sos")
+
+    else:
+        return None
+
+    return sos.astype("float32")
+
+
+def bandpass(sig, rate, fmin, fmax, order=5):
+    """
+    Apply a bandpass filter to the input signal.
+
+    Args:
+        sig (numpy.ndarray): The input signal to be filtered.
+        rate (int): The sampling rate of the input signal.
+        fmin (float): The minimum frequency for the bandpass filter.
+        fmax (float): The maximum frequency for the bandpass filter.
+        order (int, optional): The order of the filter. Default is 5.
+
+    Returns:
+        numpy.ndarray: The filtered signal as a float32 array.
+    """
+    # Check if we have to bandpass at all
+    if (fmin == cfg.SIG_FMIN and fmax == cfg.SIG_FMAX) or fmin > fmax:
+        return sig
+
+    sos = get_bandpass_sos(rate, fmin, fmax, order)
+
+    if sos is None:
+        return sig.astype("float32")
+
+    return sosfilt(sos, np.asarray(sig, dtype="float32"))
+
+
+def bandpass_blocks(blocks, rate, fmin, fmax, order=5):
+    """
+    Apply a bandpass filter to consecutive blocks of a signal.
+
+    The filter state is carried from one block to the next, so the result is the same
+    as filtering the whole signal at once.
+
+    Args:
+        blocks: Iterable of consecutive signal blocks.
+        rate (int): The sampling rate of the signal.
+        fmin (float): The minimum frequency for the bandpass filter.
+        fmax (float): The maximum frequency for the bandpass filter.
+        order (int, optional): The order of the filter. Default is 5.
+
+    Yields:
+        numpy.ndarray: The filtered blocks as float32 arrays.
+    """
+    sos = get_bandpass_sos(rate, fmin, fmax, order)
+
+    if sos is None:
+        yield from blocks
+        return
+
+    zi = np.zeros((sos.shape[0], 2), dtype="float32")
 
-    return sig.astype("float32")
+    for block in blocks:
+        filtered, zi = sosfilt(sos, np.asarray(block, dtype="float32"), zi=zi)
+
+        yield filtered
 
 
 # Raven is using Kaiser window FIR filter, so we try to emulate it.
@@ -324,22 +765,26 @@ def bandpass(sig, rate, fmin, fmax, order=5):
 # the Nyquist frequency and a default stop band attenuation of 100 dB.
 # For a complete description of this method, see Discrete-Time Signal Processing
 # (Second Edition), by Alan Oppenheim, Ronald Schafer, and John Buck, Prentice Hall 1998, pp. 474-476.
-def bandpass_kaiser_fir(sig, rate, fmin, fmax, width=0.02, stopband_attenuation_db=100):
+@functools.lru_cache(maxsize=32)
+def get_kaiser_fir_taps(rate, fmin, fmax, width=0.02, stopband_attenuation_db=100):
     """
-    Applies a bandpass filter to the given signal using a Kaiser window FIR filter.
+    Designs the Kaiser window FIR filter used by bandpass_kaiser_fir.
+
+    Designs are cached, so the filter is only computed once per setting.
+
     Args:
-        sig (numpy.ndarray): The input signal to be filtered.
-        rate (int): The sample rate of the input signal.
+        rate (int): The sample rate of the signal.
         fmin (float): The minimum frequency of the bandpass filter.
         fmax (float): The maximum frequency of the bandpass filter.
         width (float, optional): The transition width of the filter. Default is 0.02.
         stopband_attenuation_db (float, optional): The desired attenuation in the stopband, in decibels. Default is 100.
+
     Returns:
-        numpy.ndarray: The filtered signal as a float32 numpy array.
+        numpy.ndarray: The float32 filter taps or None if no filter has to be applied.
     """
     # Check if we have to bandpass at all
     if (fmin == cfg.SIG_FMIN and fmax == cfg.SIG_FMAX) or fmin > fmax:
-        return sig
+        return None
 
     nyquist = 0.5 * rate
 
@@ -348,21 +793,47 @@ def bandpass_kaiser_fir(sig, rate, fmin, fmax, width=0.02, stopband_attenuation_
 
     # Highpass?
     if fmin > cfg.SIG_FMIN and fmax == cfg.SIG_FMAX:
-        low = fmin / nyquist
-        taps = firwin(N, low, window=("kaiser", beta), pass_zero=False)
+        taps = firwin(N, fmin / nyquist, window=("kaiser", beta), pass_zero=False)
 
     # Lowpass?
     elif fmin == cfg.SIG_FMIN and fmax < cfg.SIG_FMAX:
-        high = fmax / nyquist
-        taps = firwin(N, high, window=("kaiser", beta), pass_zero=True)
+        taps = firwin(N, fmax / nyquist, window=("kaiser", beta), pass_zero=True)
 
     # Bandpass?
     elif fmin > cfg.SIG_FMIN and fmax < cfg.SIG_FMAX:
-        low = fmin / nyquist
-        high = fmax / nyquist
-        taps = firwin(N, [low, high], window=("kaiser", beta), pass_zero=False)
+        taps = firwin(N, [fmin / nyquist, fmax / nyquist], window=("kaiser", beta), pass_zero=False)
+
+    else:
+        return None
+
+    return taps.astype("float32")
+
+
+def bandpass_kaiser_fir(sig, rate, fmin, fmax, width=0.02, stopband_attenuation_db=100):
+    """
+    Applies a bandpass filter to the given signal using a Kaiser window FIR filter.
+
+    The filter has hundreds of taps, so it is applied with FFT-based overlap-add convolution.
+
+    Args:
+        sig (numpy.ndarray): The input signal to be filtered.
+        rate (int): The sample rate of the input signal.
+        fmin (float): The minimum frequency of the bandpass filter.
+        fmax (float): The maximum frequency of the bandpass filter.
+        width (float, optional): The transition width of the filter. Default is 0.02.
+        stopband_attenuation_db (float, optional): The desired attenuation in the stopband, in decibels. Default is 100.
+    Returns:
+        numpy.ndarray: The filtered signal as a float32 numpy array.
+    """
+    # Check if we have to bandpass at all
+    if (fmin == cfg.SIG_FMIN and fmax == cfg.SIG_FMAX) or fmin > fmax:
+        return sig
+
+    taps = get_kaiser_fir_taps(rate, fmin, fmax, width, stopband_attenuation_db)
+    sig = np.asarray(sig, dtype="float32")
 
-    # Apply the filter to the signal.
-    sig = lfilter(taps, 1.0, sig)
+    if taps is None or not sig.size:
+        return sig
 
-    return sig.astype("float32")
+    # Same output as lfilter(taps, 1.0, sig), the filter starts at rest
+    return oaconvolve(sig, taps)[: sig.size]
@@ -0,0 +1,3 @@
+from birdnet_analyzer.benchmark.core import benchmark
+
+__all__ = ["benchmark"]
@@ -0,0 +1,3 @@
+from birdnet_analyzer.benchmark.cli import main
+
+main()
@@ -0,0 +1,13 @@
+from birdnet_analyzer.utils import runtime_error_handler
+
+
+@runtime_error_handler
+def main():
+    from birdnet_analyzer import benchmark, cli
+
+    # Parse arguments
+    parser = cli.benchmark_parser()
+
+    args = parser.parse_args()
+
+    benchmark(**vars(args))
@@ -0,0 +1,38 @@
+def benchmark(
+    audio_input: str,
+    output: str | None = None,
+    *,
+    precisions: list[str] | None = None,
+    top_k: int = 5,
+    min_conf: float = 0.25,
+    overlap: float = 0.0,
+    threads: int = 8,
+    batch_size: int = 1,
+    max_files: int | None = None,
+):
+    """
+    Benchmarks the FP32, FP16 and INT8 variants of the BirdNET model on a local corpus.
+    Each variant analyzes all files in its own process. For every variant the real-time factor,
+    the peak memory usage and the agreement of its scores with the FP32 model are reported.
+    Args:
+        audio_input (str): Path to an audio file or a folder containing audio files.
+        output (str | None, optional): Path to a CSV file the results are written to. Defaults to None.
+        precisions (list[str] | None, optional): Model precisions to benchmark. FP32 is always included,
+            because it is used as reference. Defaults to all available precisions.
+        top_k (int, optional): Number of top scoring classes compared with the FP32 model. Defaults to 5.
+        min_conf (float, optional): Confidence threshold used to compare detections with the FP32 model. Defaults to 0.25.
+        overlap (float, optional): Overlap between consecutive segments in seconds. Defaults to 0.0.
+        threads (int, optional): Number of TFLite threads. Defaults to 8.
+        batch_size (int, optional): Number of segments to process at the same time. Defaults to 1.
+        max_files (int | None, optional): Maximum number of files to use from the input folder. Defaults to None.
+    Returns:
+        list[dict]: One dictionary with the measured values per model precision.
+    Raises:
+        ValueError: If no audio files are found or an unknown precision is requested.
+    """
+    from birdnet_analyzer.benchmark.utils import run
+    from birdnet_analyzer.utils import ensure_model_exists
+
+    ensure_model_exists()
+
+    return run(audio_input, output, precisions, top_k, min_conf, overlap, threads, batch_size, max_files)
@@ -0,0 +1,232 @@
+"""Module to compare the throughput and accuracy of the different model precisions."""
+
+import csv
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import birdnet_analyzer.config as cfg
+from birdnet_analyzer import audio, utils
+
+RESULT_COLUMNS = (
+    "precision",
+    "audio_seconds",
+    "processing_seconds",
+    "real_time_factor",
+    "speedup",
+    "peak_rss_mb",
+    "top1_agreement",
+    "topk_overlap",
+    "topk_mean_abs_diff",
+    "detection_precision",
+    "detection_recall",
+)
+
+
+def _analyze_precision(precision: str, files: list[str], score_path: str, config: dict):
+    """Analyzes all files with the given model precision.
+
+    Runs in a fresh worker process, so the peak memory usage only covers this model.
+    The scores of each batch are written to disk right away, so they do not add to it.
+
+    Args:
+        precision: The model precision.
+        files: The audio files to analyze.
+        score_path: Path to the .npy file the scores are written to.
+        config: The configuration to restore in the worker.
+
+    Returns:
+        A tuple of (processing time in seconds, peak memory usage in MB).
+    """
+    from birdnet_analyzer import model
+    from birdnet_analyzer.analyze.utils import iterate_audio_batches
+
+    cfg.set_config(config)
+    cfg.MODEL_PRECISION = precision
+    cfg.MODEL_PATH = cfg.MODEL_PRECISION_PATHS[precision]
+
+    # Warm up decoder and model before measuring, so one-time costs like
+    # JIT compilation and tensor allocation are not included
+    sig, rate = audio.open_audio_file(files[0], cfg.SAMPLE_RATE, duration=cfg.SIG_LENGTH)
+    model.predict(audio.split_signal(sig, rate, cfg.SIG_LENGTH, cfg.SIG_OVERLAP, cfg.SIG_MINLEN, writeable=False)[:1])
+
+    raw_path = score_path + ".raw"
+    shape = [0, 0]
+    start_time = time.perf_counter()
+
+    with open(raw_path, "wb") as raw:
+        for f in files:
+            for _, outputs in iterate_audio_batches(f):
+                raw.write(np.ascontiguousarray(outputs, dtype="float32").tobytes())
+                shape = [shape[0] + len(outputs), outputs.shape[1]]
+
+    processing_time = time.perf_counter() - start_time
+    peak_rss = utils.get_peak_rss_mb()
+
+    # Prepend the .npy header, the scores are copied in blocks
+    with open(score_path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(out, {"descr": np.lib.format.dtype_to_descr(np.dtype("float32")), "fortran_order": False, "shape": tuple(shape)})
+        shutil.copyfileobj(raw, out)
+
+    os.remove(raw_path)
+
+    return processing_time, peak_rss
+
+
+def compare_scores(scores: np.ndarray, reference: np.ndarray, top_k: int, min_conf: float, block_size: int = 4096):
+    """Compares the scores of a model with the scores of the reference model.
+
+    Args:
+        scores: The scores with shape (segments, classes).
+        reference: The reference scores with the same shape.
+        top_k: Number of top scoring reference classes to compare.
+        min_conf: The threshold for a detection.
+        block_size: Number of segments compared at once.
+
+    Returns:
+        A dictionary with the top-1 agreement, the mean overlap of the top-k classes,
+        the mean absolute score difference on the top-k reference classes and the
+        precision and recall of the detections with respect to the reference detections.
+    """
+    top_k = max(1, min(top_k, reference.shape[1]))
+    top1 = overlap = abs_diff = 0.0
+    hits = detections = reference_detections = 0
+
+    for i in range(0, len(reference), block_size):
+        s = np.asarray(scores[i : i + block_size])
+        r = np.asarray(reference[i : i + block_size])
+
+        top1 += np.sum(np.argmax(s, axis=1) == np.argmax(r, axis=1))
+
+        s_top = np.argpartition(s, -top_k, axis=1)[:, -top_k:]
+        r_top = np.argpartition(r, -top_k, axis=1)[:, -top_k:]
+        overlap += np.sum((s_top[:, :, None] == r_top[:, None, :]).any(axis=2)) / top_k
+        abs_diff += np.sum(np.abs(np.take_along_axis(s, r_top, axis=1) - np.take_along_axis(r, r_top, axis=1))) / top_k
+
+        s_det = s >= min_conf
+        r_det = r >= min_conf
+        hits += np.count_nonzero(s_det & r_det)
+        detections += np.count_nonzero(s_det)
+        reference_detections += np.count_nonzero(r_det)
+
+    n = max(1, len(reference))
+
+    return {
+        "top1_agreement": top1 / n,
+        "topk_overlap": overlap / n,
+        "topk_mean_abs_diff": abs_diff / n,
+        "detection_precision": hits / detections if detections else 1.0,
+        "detection_recall": hits / reference_detections if reference_detections else 1.0,
+    }
+
+
+def print_results(results: list[dict], top_k: int):
+    """Prints the benchmark results as a table.
+
+    Args:
+        results: One dictionary per model precision.
+        top_k: Number of compared top classes.
+    """
+    print(f"{'Precision':<10}{'RTF':>10}{'Speedup':>10}{'Peak RSS':>12}{'Top-1':>8}{f'Top-{top_k}':>8}{'Det. P':>8}{'Det. R':>8}", flush=True)
+
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+        print(
+            f"{r['precision']:<10}{r['real_time_factor']:>10.4f}{r['speedup']:>9.2f}x{rss:>12}"
+            f"{r['top1_agreement']:>8.3f}{r['topk_overlap']:>8.3f}{r['detection_precision']:>8.3f}{r['detection_recall']:>8.3f}",
+            flush=True,
+        )
+
+
+def save_results(path: str, results: list[dict]):
+    """Saves the benchmark results to a CSV file.
+
+    Args:
+        path: Path to the CSV file.
+        results: One dictionary per model precision.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def run(audio_input, output, precisions, top_k, min_conf, overlap, threads, batch_size, max_files):
+    # Parse input files
+    if os.path.isdir(audio_input):
+        files = utils.collect_audio_files(audio_input, max_files)
+    else:
+        files = [audio_input]
+
+    if not files:
+        raise ValueError(f"No audio files found in {audio_input}.")
+
+    # FP32 is the reference and always has to be analyzed first
+    precisions = [p.lower() for p in precisions or cfg.MODEL_PRECISION_PATHS]
+
+    for p in precisions:
+        if p not in cfg.MODEL_PRECISION_PATHS:
+            raise ValueError(f"Model precision must be one of {', '.join(cfg.MODEL_PRECISION_PATHS)}.")
+
+    precisions = ["fp32"] + [p for p in dict.fromkeys(precisions) if p != "fp32"]
+
+    cfg.INPUT_PATH = audio_input
+    cfg.SIG_OVERLAP = max(0.0, min(2.9, float(overlap)))
+    cfg.CPU_THREADS = 1
+    cfg.TFLITE_THREADS = max(1, int(threads))
+    cfg.BATCH_SIZE = max(1, int(batch_size))
+
+    audio_seconds = sum(audio.get_audio_file_length(f) for f in files)
+
+    print(f"Benchmarking {', '.join(precisions)} on {len(files)} files ({audio_seconds:.1f} s of audio)", flush=True)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reference = None
+
+        for precision in precisions:
+            print(f"Analyzing with {precision} model...", end="", flush=True)
+
+            score_path = os.path.join(tmp_dir, f"{precision}.npy")
+
+            # Use a fresh process per model, so memory usage is measured independently
+            with Pool(1) as p:
+                processing_time, peak_rss = p.apply(_analyze_precision, (precision, files, score_path, cfg.get_config()))
+
+            print(f"done in {processing_time:.2f} seconds", flush=True)
+
+            scores = np.load(score_path, mmap_mode="r")
+
+            if reference is None:
+                reference = scores
+                reference_time = processing_time
+
+            results.append(
+                {
+                    "precision": precision,
+                    "audio_seconds": audio_seconds,
+                    "processing_seconds": processing_time,
+                    "real_time_factor": processing_time / audio_seconds if audio_seconds else 0.0,
+                    "speedup": reference_time / processing_time if processing_time else 0.0,
+                    "peak_rss_mb": peak_rss,
+                    **compare_scores(scores, reference, top_k, min_conf),
+                }
+            )
+
+        del scores, reference
+
+    print_results(results, top_k)
+
+    if output:
+        save_results(output, results)
+        print(f"Results written to {output}", flush=True)
+
+    return results
@@ -285,6 +285,30 @@ def bs_args(default=cfg.BATCH_SIZE):
     return p
 
 
+def model_precision_args():
+    """
+    Creates an argument parser for the precision of the BirdNET model.
+
+    Returns:
+        argparse.ArgumentParser: An argument parser with the --model_precision argument.
+
+    The parser includes the following argument:
+        --model_precision: Precision of the TFLite model, one of 'fp32', 'fp16' or 'int8'.
+                           Defaults to the value of cfg.MODEL_PRECISION.
+    """
+    p = argparse.ArgumentParser(add_help=False)
+
+    p.add_argument(
+        "--model_precision",
+        default=cfg.MODEL_PRECISION,
+        type=str.lower,
+        choices=list(cfg.MODEL_PRECISION_PATHS),
+        help="Precision of the BirdNET model. 'fp16' and 'int8' are faster and use less memory, but their scores slightly deviate from 'fp32'. Use birdnet-bench to compare them on your data.",
+    )
+
+    return p
+
+
 def db_args():
     """
     Creates an arguments parser for the database path.
@@ -315,12 +339,20 @@ def analyzer_parser():
     The parser also defines a custom action `UniqueSetAction` to ensure that the `--rtype`
     argument values are stored as a set of unique, lowercase strings.
     Arguments:
-        --rtype: Specifies output format. Accepts multiple values from ['table', 'audacity', 'kaleidoscope', 'csv'].
+        --rtype: Specifies output format. Accepts multiple values from ['table', 'audacity', 'kaleidoscope', 'csv', 'sqlite', 'scores'].
         --combine_results: Outputs a combined file for all selected result types if set.
         -c, --classifier: Path to a custom trained classifier. Overrides --lat, --lon, and --locale if set.
-        --skip_existing_results: Skips files that have already been analyzed if set.
+        --skip_existing_results: Skips files that have already been analyzed and resumes interrupted runs if set.
         --top_n: Saves only the top N predictions for each segment. Threshold will be ignored.
         --merge_consecutive: Maximum number of consecutive detections to merge for each species.
+        --prefetch_depth: Number of audio blocks decoded ahead while analyzing.
+        --scores_top_k: Number of highest model outputs per segment stored with --rtype scores.
+        --from_scores: Generates the results from the score files of a previous run instead of running the model.
+        --autotune: Measures and uses the fastest workers, TFLite threads and batch size for this machine.
+        --max_memory: Memory budget in MB that limits the decoding window and prefetching of each worker.
+        --activity_threshold: Level in dB below which chunks are skipped without running the model, or 'auto'.
+        --cascade: Precision of the model that analyzes all chunks before candidates are re-scored with --model_precision.
+        --cascade_threshold: Score of an allowed species that makes a chunk a candidate for re-scoring.
     Returns:
         argparse.ArgumentParser: Configured argument parser for the BirdNET Analyzer CLI.
     """
@@ -336,6 +368,7 @@ def analyzer_parser():
         min_conf_args(),
         locale_args(),
         bs_args(),
+        model_precision_args(),
     ]
 
     parser = argparse.ArgumentParser(
@@ -350,9 +383,11 @@ def analyzer_parser():
     parser.add_argument(
         "--rtype",
         default={"table"},
-        choices=["table", "audacity", "kaleidoscope", "csv"],
+        choices=["table", "audacity", "kaleidoscope", "csv", "sqlite", "scores"],
         nargs="+",
-        help="Specifies output format. Values in `['table', 'audacity',  'kaleidoscope', 'csv']`.",
+        help="Specifies output format. Values in `['table', 'audacity',  'kaleidoscope', 'csv', 'sqlite', 'scores']`. "
+        f"'sqlite' writes the detections of all files to a single database '{cfg.OUTPUT_SQLITE_FILENAME}' in the output folder. "
+        "'scores' stores the raw model outputs of all segments, so results can be generated again with other settings without inference.",
         action=UniqueSetAction,
     )
     parser.add_argument(
@@ -379,7 +414,8 @@ def analyzer_parser():
     parser.add_argument(
         "--skip_existing_results",
         action="store_true",
-        help="Skip files that have already been analyzed.",
+        help="Skip files that have already been analyzed. Interrupted runs are resumed from the last completed range of each file, "
+        f"the progress is kept in '{cfg.RUN_MANIFEST_FILENAME}' in the output folder.",
     )
 
     parser.add_argument(
@@ -395,6 +431,69 @@ def analyzer_parser():
         help="Maximum number of consecutive detections above MIN_CONF to merge for each detected species. This will result in fewer entires in the result file with segments longer than 3 seconds. Set to 0 or 1 to disable merging. Set to None to include all consecutive detections. We use the mean of the top 3 scores from all consecutive detections for merging.",
     )
 
+    parser.add_argument(
+        "--prefetch_depth",
+        type=lambda a: max(0, int(a)),
+        default=cfg.PREFETCH_DEPTH,
+        help="Number of audio blocks that are decoded in a background thread while the current block is analyzed. Set to 0 to disable prefetching.",
+    )
+
+    parser.add_argument(
+        "--scores_top_k",
+        type=lambda a: max(0, int(a)),
+        default=cfg.SCORES_TOP_K,
+        help="Number of highest model outputs per segment stored with '--rtype scores'. Set to 0 to store the outputs of all classes.",
+    )
+
+    parser.add_argument(
+        "--from_scores",
+        metavar="SCORES_PATH",
+        help="Path to the output folder of a previous run with '--rtype scores'. "
+        "Results are generated from the stored model outputs with the current sensitivity, species list, "
+        "confidence threshold, top N and merge settings, without running the model again. "
+        "The original audio files are still needed as input, their sample rate and duration are read for the result files.",
+    )
+
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="Runs a short calibration on synthetic audio to find the fastest split of --threads into worker processes and TFLite threads "
+        f"and the fastest batch size on this machine. The result is cached per host and model in {cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE}. Overrides --batch_size.",
+    )
+
+    parser.add_argument(
+        "--max_memory",
+        type=lambda a: max(1.0, float(a)),
+        metavar="MB",
+        help="Memory budget of the analysis in MB, shared by all worker processes. The decoding window and the number of prefetched blocks "
+        "of each worker are derived from it. The peak memory of each worker is reported at the end.",
+    )
+
+    parser.add_argument(
+        "--activity_threshold",
+        type=lambda a: a if a == "auto" else float(a),
+        metavar="DB",
+        help="Pre-screen that skips quiet chunks without running the model. Chunks whose loudest 50 ms frame in the bandpass range "
+        "is below this level in dB relative to full scale (e.g. -60) have no detections and NaN outputs in the score files. "
+        "Use 'auto' to calibrate the level against the model on the first chunks of the files.",
+    )
+
+    parser.add_argument(
+        "--cascade",
+        choices=[p for p in cfg.MODEL_PRECISION_PATHS if p != "fp32"],
+        help="Two-stage inference. All chunks are analyzed with the model in this lower precision first. Only chunks where an "
+        "allowed species reaches --cascade_threshold are analyzed again with the --model_precision model, whose scores are used. "
+        "The fraction of re-scored chunks and the estimated time saved are reported at the end.",
+    )
+
+    parser.add_argument(
+        "--cascade_threshold",
+        type=lambda a: max(0.0, min(1.0, float(a))),
+        default=cfg.CASCADE_THRESHOLD,
+        help="Score of an allowed species in the first stage of --cascade that makes a chunk a candidate for re-scoring. "
+        "Should be below --min_conf, so detections are not missed because of the lower precision.",
+    )
+
     return parser
 
 
@@ -409,12 +508,13 @@ def embeddings_parser():
     - overlap_args(): Handles overlap arguments.
     - threads_args(): Handles threading arguments.
     - bs_args(): Handles batch size arguments.
+    - model_precision_args(): Handles model precision arguments.
 
     Returns:
         argparse.ArgumentParser: Configured argument parser for extracting feature embeddings.
     """
 
-    parents = [db_args(), bandpass_args(), audio_speed_args(), overlap_args(), threads_args(), bs_args()]
+    parents = [db_args(), bandpass_args(), audio_speed_args(), overlap_args(), threads_args(), bs_args(), model_precision_args()]
 
     parser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -475,6 +575,56 @@ def search_parser():
     return parser
 
 
+def benchmark_parser():
+    """
+    Creates an argument parser for benchmarking the different precisions of the BirdNET model.
+
+    The parser includes the following arguments:
+    - input: Path to an audio file or a folder containing audio files.
+    - -o, --output: Path to a CSV file the results are written to.
+    - --precisions: Model precisions to benchmark. FP32 is always included as reference.
+    - --top_k: Number of top scoring classes compared with the FP32 model.
+    - --max_files: Maximum number of files used from the input folder.
+
+    The parser also includes arguments from the following parent parsers:
+    - min_conf_args(): Threshold used to compare detections with the FP32 model.
+    - overlap_args(): Handles overlap arguments.
+    - threads_args(): Handles threading arguments.
+    - bs_args(): Handles batch size arguments.
+
+    Returns:
+        argparse.ArgumentParser: Configured argument parser for the benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        parents=[min_conf_args(), overlap_args(), threads_args(), bs_args()],
+    )
+
+    parser.add_argument("audio_input", metavar="INPUT", help="Path to input file or folder.")
+    parser.add_argument("-o", "--output", help="Path to a CSV file the results are written to.")
+    parser.add_argument(
+        "--precisions",
+        default=list(cfg.MODEL_PRECISION_PATHS),
+        type=str.lower,
+        choices=list(cfg.MODEL_PRECISION_PATHS),
+        nargs="+",
+        help="Model precisions to benchmark. FP32 is always included, because it is used as reference.",
+    )
+    parser.add_argument(
+        "--top_k",
+        type=lambda a: max(1, int(a)),
+        default=5,
+        help="Number of top scoring classes per segment that are compared with the FP32 model.",
+    )
+    parser.add_argument(
+        "--max_files",
+        type=lambda a: max(1, int(a)),
+        help="Maximum number of files to use from the input folder.",
+    )
+
+    return parser
+
+
 def client_parser():
     """
     Creates and returns an argument parser for the client that queries an analyzer API endpoint server.
@@ -515,7 +665,7 @@ def segments_parser():
     Returns:
         argparse.ArgumentParser: Configured argument parser with the following arguments:
             - input (str): Path to folder containing audio files.
-            - results (str, optional): Path to folder containing result files. Defaults to the `input` path.
+            - results (str, optional): Path to folder containing result files or to a result database. Defaults to the `input` path.
             - output (str, optional): Output folder path for extracted segments. Defaults to the `input` path.
             - max_segments (int, optional): Number of randomly extracted segments per species. Defaults to 100.
             - seg_length (float, optional): Length of extracted segments in seconds. Defaults to cfg.SIG_LENGTH.
@@ -525,7 +675,11 @@ def segments_parser():
         parents=[audio_speed_args(), threads_args(), min_conf_args()],
     )
     parser.add_argument("audio_input", metavar="INPUT", help="Path to folder containing audio files.")
-    parser.add_argument("-r", "--results", help="Path to folder containing result files. Defaults to the `input` path.")
+    parser.add_argument(
+        "-r",
+        "--results",
+        help=f"Path to folder containing result files or to a '{cfg.OUTPUT_SQLITE_FILENAME}' result database. Defaults to the `input` path.",
+    )
     parser.add_argument("-o", "--output", help="Output folder path for extracted segments. Defaults to the `input` path.")
     parser.add_argument(
         "--max_segments",
@@ -548,13 +702,13 @@ def server_parser():
     """
     Creates and configures an argument parser for the API endpoint server.
     The parser includes arguments for specifying the host, port, and storage path for uploaded files.
-    It also inherits arguments from `threads_args` and `locale_args`.
+    It also inherits arguments from `threads_args`, `locale_args` and `model_precision_args`.
     Returns:
         argparse.ArgumentParser: Configured argument parser with server-specific options.
     """
     parser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-        parents=[threads_args(), locale_args()],
+        parents=[threads_args(), locale_args(), model_precision_args()],
     )
 
     parser.add_argument("--host", default="0.0.0.0", help="Host name or IP address of API endpoint server.")
@@ -17,6 +17,21 @@ MODEL_VERSION: str = "V2.4"
 PB_MODEL: str = os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_Model")
 # MODEL_PATH = PB_MODEL # This will load the protobuf model
 MODEL_PATH: str = os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_Model_FP32.tflite")
+
+# Available precisions of the TFLite model. Lower precisions are faster and smaller,
+# but scores will slightly deviate from the FP32 model.
+MODEL_PRECISION: str = "fp32"
+MODEL_PRECISION_PATHS: dict[str, str] = {
+    "fp32": os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_Model_FP32.tflite"),
+    "fp16": os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_Model_FP16.tflite"),
+    "int8": os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_Model_INT8.tflite"),
+}
+
+# Cascade inference: all chunks are analyzed with the model in this lower precision first,
+# only chunks with a score of an allowed species >= CASCADE_THRESHOLD are analyzed again with
+# the MODEL_PRECISION model and get its outputs. Set to None to use the MODEL_PRECISION model only.
+CASCADE_PRECISION: str | None = None
+CASCADE_THRESHOLD: float = 0.1
 MDATA_MODEL_PATH: str = os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_MData_Model_V2_FP16.tflite")
 LABELS_FILE: str = os.path.join(SCRIPT_DIR, "checkpoints/V2.4/BirdNET_GLOBAL_6K_V2.4_Labels.txt")
 TRANSLATED_LABELS_PATH: str = os.path.join(SCRIPT_DIR, "labels/V2.4")
@@ -100,12 +115,40 @@ MERGE_CONSECUTIVE: int = 1
 # Might only be useful for GPU inference.
 BATCH_SIZE: int = 1
 
+# Whether to measure the fastest number of worker processes, TFLite threads and batch size
+# at startup. Replaces CPU_THREADS, TFLITE_THREADS and BATCH_SIZE.
+PERFORMANCE_AUTOTUNE: bool = False
+
+# Measured configurations by host, model and number of threads, so each machine is only tuned once.
+# Set to None to tune on every run.
+PERFORMANCE_AUTOTUNE_CACHE_FILE: str | None = os.path.join(os.path.expanduser("~"), ".cache", "birdnet_analyzer", "autotune.json")
+
 
 # Number of seconds to load from a file at a time
 # Files will be loaded into memory in segments that are only as long as this value
 # Lowering this value results in lower memory usage
 FILE_SPLITTING_DURATION: int = 600
 
+# Number of decoded blocks that are prefetched in a background thread while the
+# current block is analyzed. Each block holds FILE_SPLITTING_DURATION seconds of audio.
+# Set to 0 to decode and analyze strictly one after the other.
+PREFETCH_DEPTH: int = 1
+
+# Memory budget of the analysis in MB, shared by all worker processes.
+# FILE_SPLITTING_DURATION and PREFETCH_DEPTH are reduced until the estimated peak memory
+# of each worker fits into its share. Set to None to use them as they are.
+MAX_MEMORY: float | None = None
+
+# Activity pre-screen before inference. Chunks whose loudest frame in the bandpass range is
+# quieter than this level in dB relative to full scale are not analyzed and have no detections.
+# Set to None to analyze all chunks.
+ACTIVITY_THRESHOLD: float | None = None
+
+# On-disk index of audio file metadata (duration, sample rate and channels),
+# so files don't have to be opened again when the same folders are scanned repeatedly.
+# Set to None to only cache metadata in memory.
+AUDIO_METADATA_CACHE_FILE: str | None = os.path.join(os.path.expanduser("~"), ".cache", "birdnet_analyzer", "audio_metadata.db")
+
 # Whether to use noise to pad the signal
 # If set to False, the signal will be padded with zeros
 USE_NOISE: bool = False
@@ -113,12 +156,24 @@ USE_NOISE: bool = False
 # Specifies the output format. 'table' denotes a Raven selection table,
 # 'audacity' denotes a TXT file with the same format as Audacity timeline labels
 # 'csv' denotes a generic CSV file with start, end, species and confidence.
+# 'sqlite' denotes a SQLite database with the detections of all files, see OUTPUT_SQLITE_FILENAME.
+# 'scores' denotes an NPZ file with the raw model outputs of all segments, which can be
+# analyzed again with other thresholds, species lists or sensitivities without inference.
 RESULT_TYPES: set[str] | list[str] = {"table"}
+
+# Number of highest model outputs per segment stored in the 'scores' result files.
+# Set to 0 to store the outputs of all classes.
+SCORES_TOP_K: int = 0
+
+# Directory with the 'scores' result files of a previous analysis.
+# If set, results are generated from the stored model outputs instead of running the model.
+SCORES_INPUT_PATH: str | None = None
 ADDITIONAL_COLUMNS: list[str] | None = None
 OUTPUT_RAVEN_FILENAME: str = "BirdNET_SelectionTable.txt"  # this is for combined Raven selection tables only
 # OUTPUT_RTABLE_FILENAME: str = "BirdNET_RTable.csv"
 OUTPUT_KALEIDOSCOPE_FILENAME: str = "BirdNET_Kaleidoscope.csv"
 OUTPUT_CSV_FILENAME: str = "BirdNET_CombinedTable.csv"
+OUTPUT_SQLITE_FILENAME: str = "BirdNET_Detections.db"
 
 # File name of the settings csv for batch analysis
 ANALYSIS_PARAMS_FILENAME: str = "BirdNET_analysis_params.csv"
@@ -127,6 +182,12 @@ ANALYSIS_PARAMS_FILENAME: str = "BirdNET_analysis_params.csv"
 # If set to False, existing files will not be overwritten
 SKIP_EXISTING_RESULTS: bool = False
 
+# Progress of an analysis run in the output path, used to resume interrupted runs if existing results are skipped
+RUN_MANIFEST_FILENAME: str = "BirdNET_run_manifest.json"
+
+# Folder next to the run manifest with the detections of completed ranges of unfinished files
+CHECKPOINT_DIRNAME: str = "BirdNET_checkpoints"
+
 COMBINE_RESULTS: bool = False
 #####################
 # Training settings #
@@ -9,6 +9,7 @@ def embeddings(
     threads: int = 8,
     batch_size: int = 1,
     file_output: str | None = None,
+    model_precision: str = "fp32",
 ):
     """
     Generates embeddings for audio files using the BirdNET-Analyzer.
@@ -24,6 +25,8 @@ def embeddings(
         fmax (int, optional): Maximum frequency (in Hz) for audio analysis. Defaults to 15000.
         threads (int, optional): Number of threads to use for processing. Defaults to 8.
         batch_size (int, optional): Number of audio segments to process in a single batch. Defaults to 1.
+        file_output (str | None, optional): Path to a folder to write the embeddings to as text files. Defaults to None.
+        model_precision (str, optional): Precision of the BirdNET model, one of "fp32", "fp16" or "int8". Defaults to "fp32".
     Raises:
         FileNotFoundError: If the input path or database path does not exist.
         ValueError: If any of the parameters are invalid.
@@ -47,7 +50,7 @@ def embeddings(
     from birdnet_analyzer.utils import ensure_model_exists
 
     ensure_model_exists()
-    run(audio_input, database, overlap, audio_speed, fmin, fmax, threads, batch_size, file_output)
+    run(audio_input, database, overlap, audio_speed, fmin, fmax, threads, batch_size, file_output, model_precision)
 
 
 def get_database(db_path: str):
@@ -115,7 +115,7 @@ def create_file_output(output_path: str, db: sqlite_usearch_impl.SQLiteUsearchDB
             f.write(",".join(map(str, embedding.tolist())))
 
 
-def run(audio_input, database, overlap, audio_speed, fmin, fmax, threads, batchsize, file_output):
+def run(audio_input, database, overlap, audio_speed, fmin, fmax, threads, batchsize, file_output, model_precision="fp32"):
     ### Make sure to comment out appropriately if you are not using args. ###
 
     # Set input and output path
@@ -150,6 +150,10 @@ def run(audio_input, database, overlap, audio_speed, fmin, fmax, threads, batchs
     # Set batch size
     cfg.BATCH_SIZE = max(1, int(batchsize))
 
+    # Set model precision
+    cfg.MODEL_PRECISION = model_precision
+    cfg.MODEL_PATH = cfg.MODEL_PRECISION_PATHS[model_precision]
+
     # Add config items to each file list entry.
     # We have to do this for Windows which does not
     # support fork() and thus each process has to
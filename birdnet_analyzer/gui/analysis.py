@@ -10,6 +10,7 @@ from birdnet_analyzer import model
 from birdnet_analyzer.analyze.utils import (
     analyze_file,
     combine_results,
+    init_worker,
     save_analysis_params,
 )
 
@@ -22,15 +23,13 @@ def analyze_file_wrapper(entry):
     Wrapper function for analyzing a file.
 
     Args:
-        entry (tuple): A tuple where the first element is the file path and the
-                       remaining elements are arguments to be passed to the
-                       analyze.analyzeFile function.
+        entry (str): The path of the file passed to the analyze.analyzeFile function.
 
     Returns:
         tuple: A tuple where the first element is the file path and the second
                element is the result of the analyze.analyzeFile function.
     """
-    return (entry[0], analyze_file(entry))
+    return (entry, analyze_file(entry))
 
 
 def run_analysis(
@@ -151,7 +150,7 @@ def run_analysis(
     if cfg.CPU_THREADS < 2:
         result_list.extend(analyze_file_wrapper(entry) for entry in flist)
     else:
-        with concurrent.futures.ProcessPoolExecutor(max_workers=cfg.CPU_THREADS) as executor:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=cfg.CPU_THREADS, initializer=init_worker, initargs=(cfg.get_config(),)) as executor:
             futures = (executor.submit(analyze_file_wrapper, arg) for arg in flist)
             for i, f in enumerate(concurrent.futures.as_completed(futures), start=1):
                 if progress is not None:
@@ -162,7 +161,7 @@ def run_analysis(
 
     # Combine results?
     if cfg.COMBINE_RESULTS:
-        combine_list = [[r[1] for r in result_list if r[0] == i[0]][0] for i in flist]
+        combine_list = [[r[1] for r in result_list if r[0] == i][0] for i in flist]
         print(f"Combining results, writing to {cfg.OUTPUT_PATH}...", end="", flush=True)
         combine_results(combine_list)
         print("done!", flush=True)
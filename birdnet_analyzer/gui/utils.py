@@ -100,14 +100,14 @@ def get_audio_files_and_durations(folder, max_files=None):
     Returns:
         list: A list of lists, where each inner list contains the relative file path and its duration as a string.
     """
-    import librosa
+    from birdnet_analyzer import audio
 
     files_and_durations = []
     files = utils.collect_audio_files(folder, max_files=max_files)  # Use the collect_audio_files function
 
     for file_path in files:
         try:
-            duration = format_seconds(librosa.get_duration(path=file_path))
+            duration = format_seconds(audio.get_audio_file_length(file_path))
 
         except Exception as _:
             duration = "0:00"  # Default value in case of an error
@@ -170,7 +170,7 @@ def select_directory(collect_files=True, max_files=None, state_key=None):
         else just the directory path.
         All values will be None of the dialog is cancelled.
     """
-    import librosa
+    from birdnet_analyzer import audio
 
     dir_name = select_folder(state_key=state_key)
 
@@ -180,7 +180,7 @@ def select_directory(collect_files=True, max_files=None, state_key=None):
 
         files = utils.collect_audio_files(dir_name, max_files=max_files)
 
-        return dir_name, [[os.path.relpath(file, dir_name), format_seconds(librosa.get_duration(filename=file))] for file in files]
+        return dir_name, [[os.path.relpath(file, dir_name), format_seconds(audio.get_audio_file_length(file))] for file in files]
 
     return dir_name if dir_name else None
 
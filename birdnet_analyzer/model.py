@@ -29,10 +29,10 @@ except ModuleNotFoundError:
 if not cfg.MODEL_PATH.endswith(".tflite"):
     from tensorflow import keras
 
-INTERPRETER: tflite.Interpreter = None
-C_INTERPRETER: tflite.Interpreter = None
+ENGINE: "InferenceEngine" = None
+C_ENGINE: "InferenceEngine" = None
+CASCADE_ENGINE: "InferenceEngine" = None
 M_INTERPRETER: tflite.Interpreter = None
-OUTPUT_DETAILS = None
 PBMODEL = None
 C_PBMODEL = None
 EMPTY_CLASS_EXCEPTION_REF = None
@@ -482,54 +482,166 @@ def save_model_params(path):
     )
 
 
+def get_batch_shape(n: int, batch_size: int) -> int:
+    """Returns the input shape the InferenceEngine uses for a batch of n samples.
+
+    Args:
+        n: Number of samples in the batch, at most batch_size.
+        batch_size: Number of samples of a full batch.
+
+    Returns:
+        n for full batches, otherwise the next power of two, capped at the batch size.
+    """
+    return n if n == batch_size else min(batch_size, 1 << (n - 1).bit_length())
+
+
+def get_batch_shapes(batch_size: int) -> list[int]:
+    """Returns all input shapes the InferenceEngine may allocate an interpreter for.
+
+    Args:
+        batch_size: Number of samples of a full batch.
+
+    Returns:
+        The sorted shapes, including the single-sample interpreter that is always allocated.
+    """
+    return sorted({1} | {get_batch_shape(n, batch_size) for n in range(1, batch_size + 1)})
+
+
+class InferenceEngine:
+    """Runs a TFLite model with fixed input shapes.
+
+    Resizing the input tensor and re-allocating all tensors is expensive, so the engine
+    keeps one allocated interpreter per batch shape and never resizes it again.
+    Inputs are split into batches of the requested size. A trailing partial batch is
+    zero-padded to the next power of two (capped at the batch size), which bounds the
+    number of allocated shapes to log2(batch size) + 1 and the wasted compute to 2x.
+    """
+
+    def __init__(self, model_path: str, num_threads: int = 1):
+        """Loads the model and allocates a single-sample interpreter.
+
+        Args:
+            model_path: Path to the TFLite model.
+            num_threads: Number of threads used by each interpreter.
+        """
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreters: dict[int, tflite.Interpreter] = {}
+
+        interpreter = self.get_interpreter(1)
+        input_details = interpreter.get_input_details()
+        output_details = interpreter.get_output_details()
+
+        self.input_index = input_details[0]["index"]
+        self.input_shape = tuple(input_details[0]["shape"][1:])
+        self.output_index = output_details[0]["index"]
+
+    def get_interpreter(self, batch_size: int) -> tflite.Interpreter:
+        """Returns the interpreter for the given batch size, allocating it on first use.
+
+        Args:
+            batch_size: Number of samples per invocation.
+
+        Returns:
+            An interpreter with allocated tensors for the batch size.
+        """
+        if batch_size not in self.interpreters:
+            interpreter = tflite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+            input_details = interpreter.get_input_details()
+
+            if input_details[0]["shape"][0] != batch_size:
+                interpreter.resize_tensor_input(input_details[0]["index"], [batch_size, *input_details[0]["shape"][1:]])
+
+            interpreter.allocate_tensors()
+            self.interpreters[batch_size] = interpreter
+
+        return self.interpreters[batch_size]
+
+    def run(self, sample, output_indices: list[int] | None = None, batch_size: int | None = None) -> list[np.ndarray]:
+        """Runs the model on the given samples.
+
+        Args:
+            sample: Input samples, first dimension is the number of samples. Samples shorter than
+                    the model input are zero-padded.
+            output_indices: Indices of the tensors to read after each invocation.
+                            Defaults to the model output.
+            batch_size: Number of samples per invocation. Defaults to cfg.BATCH_SIZE.
+
+        Returns:
+            A list with one array per output index, each with one row per sample.
+            Empty inputs give empty arrays with the output shapes of the model.
+        """
+        sample = np.asarray(sample, dtype="float32")
+        output_indices = output_indices or [self.output_index]
+        batch_size = max(1, int(batch_size or cfg.BATCH_SIZE))
+        outputs = [[] for _ in output_indices]
+
+        # The input shape is fixed, so short samples (e.g. a recording shorter than the signal length) are padded
+        if sample.ndim > 1 and sample.shape[-1] < self.input_shape[-1]:
+            sample = np.pad(sample, [(0, 0)] * (sample.ndim - 1) + [(0, self.input_shape[-1] - sample.shape[-1])])
+
+        if not len(sample):
+            shapes = {details["index"]: details["shape"] for details in self.get_interpreter(1).get_tensor_details()}
+
+            return [np.empty((0, *shapes[index][1:]), dtype="float32") for index in output_indices]
+
+        for i in range(0, len(sample), batch_size):
+            batch = sample[i : i + batch_size]
+            n = len(batch)
+
+            # Pad partial batches to the next allocated shape instead of resizing
+            shape = get_batch_shape(n, batch_size)
+
+            if shape != n:
+                batch = np.concatenate((batch, np.zeros((shape - n, *batch.shape[1:]), dtype="float32")))
+
+            interpreter = self.get_interpreter(shape)
+            interpreter.set_tensor(self.input_index, batch)
+            interpreter.invoke()
+
+            for out, index in zip(outputs, output_indices, strict=True):
+                out.append(interpreter.get_tensor(index)[:n])
+
+        return [np.concatenate(out) if len(out) > 1 else out[0] for out in outputs]
+
+
 def reset_custom_classifier():
     """
-    Resets the custom classifier by setting the global variables C_INTERPRETER and C_PBMODEL to None.
+    Resets the custom classifier by setting the global variables C_ENGINE and C_PBMODEL to None.
     This function is used to clear any existing custom classifier models and interpreters, effectively
     resetting the state of the custom classifier.
     """
-    global C_INTERPRETER
+    global C_ENGINE
     global C_PBMODEL
 
-    C_INTERPRETER = None
+    C_ENGINE = None
     C_PBMODEL = None
 
 
-def load_model(class_output=True):
+def load_model():
     """
     Loads the machine learning model based on the configuration provided.
     This function loads either a TensorFlow Lite (TFLite) model or a protobuf model
     depending on the file extension of the model path specified in the configuration.
-    It sets up the global variables for the model interpreter and input/output layer indices.
-
-    Args:
-        class_output (bool): If True, sets the output layer index to the classification output.
-                             If False, sets the output layer index to the feature embeddings.
+    It sets up the global inference engine and the indices of the classification output
+    and the feature embeddings, which are both available after a single invocation.
+    The engine is loaded again if the model path or the number of threads has changed.
     """
     global PBMODEL
-    global INTERPRETER
-    global INPUT_LAYER_INDEX
+    global ENGINE
     global OUTPUT_LAYER_INDEX
-    global OUTPUT_DETAILS
+    global EMBEDDINGS_LAYER_INDEX
 
     # Do we have to load the tflite or protobuf model?
     if cfg.MODEL_PATH.endswith(".tflite"):
-        if not INTERPRETER:
-            # Load TFLite model and allocate tensors.
-            INTERPRETER = tflite.Interpreter(
-                model_path=os.path.join(SCRIPT_DIR, cfg.MODEL_PATH), num_threads=cfg.TFLITE_THREADS
-            )
-            INTERPRETER.allocate_tensors()
-
-            # Get input and output tensors.
-            input_details = INTERPRETER.get_input_details()
-            OUTPUT_DETAILS = INTERPRETER.get_output_details()
+        model_path = os.path.join(SCRIPT_DIR, cfg.MODEL_PATH)
 
-            # Get input tensor index
-            INPUT_LAYER_INDEX = input_details[0]["index"]
+        if not ENGINE or (ENGINE.model_path, ENGINE.num_threads) != (model_path, cfg.TFLITE_THREADS):
+            ENGINE = InferenceEngine(model_path, num_threads=cfg.TFLITE_THREADS)
 
-        # Get classification output or feature embeddings
-        OUTPUT_LAYER_INDEX = OUTPUT_DETAILS[0]["index"] if class_output else OUTPUT_DETAILS[0]["index"] - 1
+            # Classification output and feature embeddings (the layer right before it)
+            OUTPUT_LAYER_INDEX = ENGINE.output_index
+            EMBEDDINGS_LAYER_INDEX = ENGINE.output_index - 1
 
     elif not PBMODEL:
         # Load protobuf model
@@ -538,35 +650,34 @@ def load_model(class_output=True):
         PBMODEL = keras.models.load_model(os.path.join(SCRIPT_DIR, cfg.MODEL_PATH), compile=False)
 
 
+def load_cascade_model():
+    """Loads the lower precision TFLite model that runs first in cascade mode.
+
+    The precision is set by cfg.CASCADE_PRECISION, the model path is taken from cfg.MODEL_PRECISION_PATHS.
+    The engine is loaded again if the precision or the number of threads has changed.
+    """
+    global CASCADE_ENGINE
+
+    model_path = os.path.join(SCRIPT_DIR, cfg.MODEL_PRECISION_PATHS[cfg.CASCADE_PRECISION])
+
+    if not CASCADE_ENGINE or (CASCADE_ENGINE.model_path, CASCADE_ENGINE.num_threads) != (model_path, cfg.TFLITE_THREADS):
+        CASCADE_ENGINE = InferenceEngine(model_path, num_threads=cfg.TFLITE_THREADS)
+
+
 def load_custom_classifier():
     """
     Loads a custom classifier model based on the file extension of the provided model path.
-    If the model file ends with ".tflite", it loads a TensorFlow Lite model and sets up the interpreter,
-    input layer index, output layer index, and input size.
+    If the model file ends with ".tflite", it loads a TensorFlow Lite model and sets up the inference engine
+    and input size.
     If the model file does not end with ".tflite", it loads a TensorFlow SavedModel.
     """
-    global C_INTERPRETER
-    global C_INPUT_LAYER_INDEX
-    global C_OUTPUT_LAYER_INDEX
+    global C_ENGINE
     global C_INPUT_SIZE
     global C_PBMODEL
 
     if cfg.CUSTOM_CLASSIFIER.endswith(".tflite"):
-        # Load TFLite model and allocate tensors.
-        C_INTERPRETER = tflite.Interpreter(model_path=cfg.CUSTOM_CLASSIFIER, num_threads=cfg.TFLITE_THREADS)
-        C_INTERPRETER.allocate_tensors()
-
-        # Get input and output tensors.
-        input_details = C_INTERPRETER.get_input_details()
-        output_details = C_INTERPRETER.get_output_details()
-
-        # Get input tensor index
-        C_INPUT_LAYER_INDEX = input_details[0]["index"]
-
-        C_INPUT_SIZE = input_details[0]["shape"][-1]
-
-        # Get classification output
-        C_OUTPUT_LAYER_INDEX = output_details[0]["index"]
+        C_ENGINE = InferenceEngine(cfg.CUSTOM_CLASSIFIER, num_threads=cfg.TFLITE_THREADS)
+        C_INPUT_SIZE = C_ENGINE.input_shape[-1]
     else:
         import tensorflow as tf
 
@@ -1146,19 +1257,27 @@ def predict(sample):
     load_model()
 
     if PBMODEL is None:
-        # Reshape input tensor
-        INTERPRETER.resize_tensor_input(INPUT_LAYER_INDEX, [len(sample), *sample[0].shape])
-        INTERPRETER.allocate_tensors()
-
         # Make a prediction (Audio only for now)
-        INTERPRETER.set_tensor(INPUT_LAYER_INDEX, np.array(sample, dtype="float32"))
-        INTERPRETER.invoke()
-        return INTERPRETER.get_tensor(OUTPUT_LAYER_INDEX)
+        return ENGINE.run(sample, [OUTPUT_LAYER_INDEX])[0]
 
     # Make a prediction (Audio only for now)
     return PBMODEL.basic(sample)["scores"]
 
 
+def predict_cascade(sample):
+    """Uses the lower precision model of the cascade to predict a sample.
+
+    Args:
+        sample: Audio sample.
+
+    Returns:
+        The prediction scores of the first stage for the sample.
+    """
+    load_cascade_model()
+
+    return CASCADE_ENGINE.run(sample)[0]
+
+
 def predict_with_custom_classifier(sample):
     """Uses the custom classifier to make a prediction.
 
@@ -1169,23 +1288,17 @@ def predict_with_custom_classifier(sample):
         The prediction scores for the sample.
     """
     # Does interpreter exist?
-    if C_INTERPRETER is None and C_PBMODEL is None:
+    if C_ENGINE is None and C_PBMODEL is None:
         load_custom_classifier()
 
-    if C_PBMODEL is None:
-        vector = embeddings(sample) if C_INPUT_SIZE != 144000 else sample
-
-        # Reshape input tensor
-        C_INTERPRETER.resize_tensor_input(C_INPUT_LAYER_INDEX, [len(vector), *vector[0].shape])
-        C_INTERPRETER.allocate_tensors()
-
-        # Make a prediction
-        C_INTERPRETER.set_tensor(C_INPUT_LAYER_INDEX, np.array(vector, dtype="float32"))
-        C_INTERPRETER.invoke()
+    if C_PBMODEL is not None:
+        return C_PBMODEL.basic(sample)["scores"]
 
-        return C_INTERPRETER.get_tensor(C_OUTPUT_LAYER_INDEX)
+    if C_INPUT_SIZE == 144000:
+        return C_ENGINE.run(sample)[0]
 
-    return C_PBMODEL.basic(sample)["scores"]
+    # Classifiers on embeddings get them from a single pass through the backbone
+    return predict_with_embeddings(sample)[0]
 
 
 def embeddings(sample):
@@ -1198,16 +1311,40 @@ def embeddings(sample):
         The embeddings.
     """
 
-    load_model(False)
+    load_model()
 
-    sample = np.array(sample, dtype="float32")
+    # Extract feature embeddings
+    return ENGINE.run(sample, [EMBEDDINGS_LAYER_INDEX])[0]
 
-    # Reshape input tensor
-    INTERPRETER.resize_tensor_input(INPUT_LAYER_INDEX, [len(sample), *sample[0].shape])
-    INTERPRETER.allocate_tensors()
 
-    # Extract feature embeddings
-    INTERPRETER.set_tensor(INPUT_LAYER_INDEX, sample)
-    INTERPRETER.invoke()
+def predict_with_embeddings(sample):
+    """Predicts a sample and extracts its embeddings with a single pass through the backbone.
+
+    Both outputs are read from the same invocation of the main net. If a custom classifier
+    operating on embeddings is set, it is applied to those embeddings.
+
+    Args:
+        sample: Audio samples.
+
+    Returns:
+        A tuple of (scores, embeddings) with one row per sample.
+
+    Raises:
+        ValueError: If the custom classifier takes raw audio, it would need a second pass through the backbone.
+    """
+    if cfg.CUSTOM_CLASSIFIER is not None:
+        if C_ENGINE is None and C_PBMODEL is None:
+            load_custom_classifier()
+
+        if C_PBMODEL is not None or C_INPUT_SIZE == 144000:
+            raise ValueError("Custom classifiers on raw audio do not provide embeddings from the same pass.")
+
+        vector = embeddings(sample)
+
+        return C_ENGINE.run(vector)[0], vector
+
+    load_model()
+
+    scores, vector = ENGINE.run(sample, [OUTPUT_LAYER_INDEX, EMBEDDINGS_LAYER_INDEX])
 
-    return INTERPRETER.get_tensor(OUTPUT_LAYER_INDEX)
+    return scores, vector
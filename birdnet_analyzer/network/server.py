@@ -7,7 +7,7 @@ import birdnet_analyzer.config as cfg
 from birdnet_analyzer import cli, utils
 
 
-def start_server(host="0.0.0.0", port=8080, spath="uploads/", threads=1, locale="en"):
+def start_server(host="0.0.0.0", port=8080, spath="uploads/", threads=1, locale="en", model_precision="fp32"):
     """
     Starts a web server for the BirdNET Analyzer.
     Args:
@@ -16,6 +16,7 @@ def start_server(host="0.0.0.0", port=8080, spath="uploads/", threads=1, locale=
         spath (str): The file storage path for uploads. Defaults to "uploads/".
         threads (int): The number of threads to use for TensorFlow Lite inference. Defaults to 1.
         locale (str): The locale for translated labels. Defaults to "en".
+        model_precision (str): The precision of the BirdNET model, one of "fp32", "fp16" or "int8". Defaults to "fp32".
     Behavior:
         - Ensures the required model files exist.
         - Loads eBird codes and labels, including translated labels if available for the specified locale.
@@ -60,6 +61,10 @@ def start_server(host="0.0.0.0", port=8080, spath="uploads/", threads=1, locale=
     # Set number of TFLite threads
     cfg.TFLITE_THREADS = threads
 
+    # Set model precision
+    cfg.MODEL_PRECISION = model_precision
+    cfg.MODEL_PATH = cfg.MODEL_PRECISION_PATHS[model_precision]
+
     # Run server
     print(f"UP AND RUNNING! LISTENING ON {host}:{port}", flush=True)
 
@@ -145,7 +145,7 @@ def handle_request():
             cfg.SPECIES_LIST = []
 
         # Analyze file
-        success = analyze.analyze_file((file_path, cfg.get_config()))
+        success = analyze.analyze_file(file_path)
 
         # Parse results
         if success:
@@ -4,6 +4,8 @@ Can be used to save the segments of the audio files for each detection.
 """
 
 import os
+import sqlite3
+from contextlib import closing
 
 import numpy as np
 
@@ -72,8 +74,14 @@ def parse_folders(apath: str, rpath: str, allowed_result_filetypes: tuple[str] =
     apath = apath.replace("/", os.sep).replace("\\", os.sep)
     rpath = rpath.replace("/", os.sep).replace("\\", os.sep)
 
+    # Check if a result database is present and read that.
+    if rpath.lower().endswith(".db") and os.path.isfile(rpath):
+        data["combined"] = {"isCombinedFile": True, "isDatabase": True, "result": rpath}
+    elif os.path.exists(os.path.join(rpath, cfg.OUTPUT_SQLITE_FILENAME)):
+        rfile = os.path.join(rpath, cfg.OUTPUT_SQLITE_FILENAME)
+        data["combined"] = {"isCombinedFile": True, "isDatabase": True, "result": rfile}
     # Check if combined selection table is present and read that.
-    if os.path.exists(os.path.join(rpath, cfg.OUTPUT_RAVEN_FILENAME)):
+    elif os.path.exists(os.path.join(rpath, cfg.OUTPUT_RAVEN_FILENAME)):
         # Read combined Raven selection table
         rfile = os.path.join(rpath, cfg.OUTPUT_RAVEN_FILENAME)
         data["combined"] = {"isCombinedFile": True, "result": rfile}
@@ -114,7 +122,7 @@ def parse_files(flist: list[dict], max_segments=100):
     Args:
         flist (list[dict]): A list of dictionaries, each containing 'audio' and 'result' file paths.
                             Optionally, a dictionary can have 'isCombinedFile' set to True to indicate
-                            that it is a combined result file.
+                            that it is a combined result file and 'isDatabase' set to True if it is a result database.
         max_segments (int, optional): The maximum number of segments to retain per species. Defaults to 100.
     Returns:
         list[tuple]: A list of tuples where each tuple contains an audio file path and a list of segments
@@ -134,7 +142,7 @@ def parse_files(flist: list[dict], max_segments=100):
 
     if is_combined_rfile:
         rfile = flist[0]["result"]
-        segments = find_segments_from_combined(rfile)
+        segments = find_segments_from_database(rfile) if flist[0].get("isDatabase", False) else find_segments_from_combined(rfile)
 
         # Parse segments by species
         for s in segments:
@@ -247,6 +255,32 @@ def find_segments_from_combined(rfile: str) -> list[dict]:
     return segments
 
 
+def find_segments_from_database(db_path: str) -> list[dict]:
+    """Extracts the segments from a result database
+
+    Args:
+        db_path (str): Path to the database.
+
+    Returns:
+        list[dict]: A list of dicts in the form of
+        {"audio": afile, "start": start, "end": end, "species": species, "confidence": confidence}
+    """
+    # Uses the (species, confidence) index of the detections table
+    with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as db:
+        rows = db.execute(
+            "SELECT files.path, detections.start, detections.end, species.common_name, detections.confidence FROM detections "
+            "JOIN files ON files.id = detections.file_id JOIN species ON species.id = detections.species_id "
+            "WHERE detections.confidence >= ? ORDER BY files.path, detections.start",
+            (cfg.MIN_CONFIDENCE,),
+        ).fetchall()
+
+    return [
+        {"audio": afile, "start": start, "end": end, "species": species, "confidence": confidence}
+        for afile, start, end, species, confidence in rows
+        if species.lower() != "nocall"
+    ]
+
+
 def find_segments(afile: str, rfile: str):
     """Extracts the segments for an audio file from the results file
 
@@ -89,15 +89,12 @@ def _load_audio_file(f, label_vector, config):
         sig_splits = audio.split_signal(sig, rate, cfg.SIG_LENGTH, cfg.SIG_OVERLAP, cfg.SIG_MINLEN)
 
     # Get feature embeddings
-    batch_size = 1  # turns out that batch size 1 is the fastest, probably because of having to resize the model input when the number of samples in a batch changes
-    for i in range(0, len(sig_splits), batch_size):
-        batch_sig = sig_splits[i : i + batch_size]
-        batch_label = [label_vector] * len(batch_sig)
-        embeddings = model.embeddings(batch_sig)
-
-        # Add to training data
-        x_train.extend(embeddings)
-        y_train.extend(batch_label)
+    # The inference engine batches and pads internally, so the input tensor is never resized
+    embeddings = model.embeddings(sig_splits)
+
+    # Add to training data
+    x_train.extend(embeddings)
+    y_train.extend([label_vector] * len(sig_splits))
 
     return x_train, y_train
 
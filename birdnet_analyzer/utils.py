@@ -44,6 +44,87 @@ def batched(iterable, n, *, strict=False):
         yield batch
 
 
+def prefetch(iterable, depth: int):
+    """Iterates over an iterable in a background thread.
+
+    Up to `depth` items are produced ahead of the consumer, so producing the next item
+    overlaps with processing the current one. Exceptions of the producer are raised in
+    the consumer.
+
+    Args:
+        iterable: The iterable to prefetch.
+        depth: Maximum number of items that are buffered.
+
+    Yields:
+        The items of the iterable.
+    """
+    import queue
+    import threading
+
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Stop waiting for a free slot if the consumer is gone
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    break
+            else:
+                put((done, None))
+        except Exception as e:
+            put((done, e))
+        finally:
+            # Release resources of generators that were not exhausted
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = buffer.get()
+
+            if item is done:
+                if error is not None:
+                    raise error
+                break
+
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def get_peak_rss_mb():
+    """Returns the peak resident set size of the current process.
+
+    Returns:
+        The peak memory usage in MB or None if it cannot be determined on this platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
 def spectrogram_from_file(path, fig_num=None, fig_size=None, offset=0, duration=None, fmin=None, fmax=None, speed=1.0):
     """
     Generate a spectrogram from an audio file.
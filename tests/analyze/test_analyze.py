@@ -1,9 +1,11 @@
 import csv
+import json
 import os
 import shutil
 import tempfile
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 import birdnet_analyzer.config as cfg
@@ -60,7 +62,7 @@ def test_analyze_single_file(
     env = setup_test_environment
 
     # Configure mocks
-    mock_set_params.return_value = [(env["test_file1"], {"param1": "value1"})]
+    mock_set_params.return_value = [env["test_file1"]]
     mock_analyze_file.return_value = f"{env['test_file1']}_results.txt"
 
     # Set config values
@@ -77,7 +79,7 @@ def test_analyze_single_file(
     # Verify behavior
     mock_ensure_model.assert_called_once()
     mock_set_params.assert_called_once()
-    mock_analyze_file.assert_called_once_with((env["test_file1"], {"param1": "value1"}))
+    mock_analyze_file.assert_called_once_with(env["test_file1"])
     mock_save_params.assert_called_once()
 
 
@@ -90,15 +92,16 @@ def test_analyze_directory_multiprocess(mock_save_params: MagicMock, mock_pool,
     env = setup_test_environment
 
     # Configure mocks
-    file_params = [(env["test_file1"], {"param1": "value1"}), (env["test_file2"], {"param1": "value1"})]
-    mock_set_params.return_value = file_params
+    mock_set_params.return_value = [env["test_file1"], env["test_file2"]]
 
     pool_instance = MagicMock()
     mock_pool.return_value.__enter__.return_value = pool_instance
 
-    async_result = MagicMock()
-    async_result.get.return_value = [f"{env['test_file1']}_results.txt", f"{env['test_file2']}_results.txt"]
-    pool_instance.map_async.return_value = async_result
+    # Tasks finish out of order on different workers
+    pool_instance.imap_unordered.return_value = [
+        (1, 101, 0.5, {"peak_memory": 610.0}, f"{env['test_file2']}_results.txt"),
+        (0, 102, 1.0, {"peak_memory": None}, f"{env['test_file1']}_results.txt"),
+    ]
 
     # Set config values
     cfg.FILE_LIST = [env["test_file1"], env["test_file2"]]
@@ -114,8 +117,14 @@ def test_analyze_directory_multiprocess(mock_save_params: MagicMock, mock_pool,
     # Verify behavior
     mock_ensure_model.assert_called_once()
     mock_set_params.assert_called_once()
-    mock_pool.assert_called_once_with(2)
-    pool_instance.map_async.assert_called_once()
+    mock_pool.assert_called_once()
+    assert mock_pool.call_args.args == (2,)
+    assert mock_pool.call_args.kwargs["initargs"][0]["CPU_THREADS"] == 2
+    pool_instance.imap_unordered.assert_called_once()
+    assert pool_instance.imap_unordered.call_args.kwargs["chunksize"] == 1
+
+    # Tasks only carry the file path
+    assert sorted(task for _, task in pool_instance.imap_unordered.call_args.args[1]) == [env["test_file1"], env["test_file2"]]
     mock_save_params.assert_called_once()
 
 
@@ -137,7 +146,7 @@ def test_analyze_with_combined_results(
 
     # Configure mocks
     result_file = f"{env['test_file1']}_results.txt"
-    mock_set_params.return_value = [(env["test_file1"], {"param1": "value1"})]
+    mock_set_params.return_value = [env["test_file1"]]
     mock_analyze_file.return_value = result_file
 
     # Set config values
@@ -154,7 +163,7 @@ def test_analyze_with_combined_results(
     # Verify behavior
     mock_ensure_model.assert_called_once()
     mock_set_params.assert_called_once()
-    mock_analyze_file.assert_called_once_with((env["test_file1"], {"param1": "value1"}))
+    mock_analyze_file.assert_called_once_with(env["test_file1"])
     mock_combine_results.assert_called_once_with([result_file])
     mock_save_params.assert_called_once()
 
@@ -167,7 +176,7 @@ def test_analyze_with_location_filtering(mock_analyze_file: MagicMock, mock_set_
     env = setup_test_environment
 
     # Configure mocks
-    mock_set_params.return_value = [(env["test_file1"], {"param1": "value1"})]
+    mock_set_params.return_value = [env["test_file1"]]
     mock_analyze_file.return_value = f"{env['test_file1']}_results.txt"
 
     # Call function under test
@@ -195,7 +204,7 @@ def test_analyze_with_custom_classifier(mock_analyze_file: MagicMock, mock_set_p
         f.write(b"dummy model data")
 
     # Configure mocks
-    mock_set_params.return_value = [(env["test_file1"], {"param1": "value1"})]
+    mock_set_params.return_value = [env["test_file1"]]
     mock_analyze_file.return_value = f"{env['test_file1']}_results.txt"
 
     # Call function under test
@@ -216,7 +225,7 @@ def test_analyze_with_multiple_result_types(mock_analyze_file: MagicMock, mock_s
     env = setup_test_environment
 
     # Configure mocks
-    mock_set_params.return_value = [(env["test_file1"], {"param1": "value1"})]
+    mock_set_params.return_value = [env["test_file1"]]
     mock_analyze_file.return_value = f"{env['test_file1']}_results.txt"
 
     # Call function under test
@@ -242,7 +251,7 @@ def test_analyze_with_custom_species_list(mock_analyze_file: MagicMock, mock_set
         f.write("Species1\nSpecies2\n")
 
     # Configure mocks
-    mock_set_params.return_value = [(env["test_file1"], {"param1": "value1"})]
+    mock_set_params.return_value = [env["test_file1"]]
     mock_analyze_file.return_value = f"{env['test_file1']}_results.txt"
 
     # Call function under test
@@ -426,3 +435,802 @@ def test_analyze_with_additional_columns(mock_ensure_model, setup_test_environme
             assert float(row["sensitivity"]) == cfg.SIGMOID_SENSITIVITY, "Sensitivity value does not match expected value"
             assert row["species_list"] == "", "Species list value does not match expected value"
             assert float(row["min_conf"]) == 0, "Min confidence value does not match expected value"
+
+
+@pytest.mark.parametrize("top_n", [None, 1, 5])
+@pytest.mark.parametrize("use_species_list", [False, True])
+def test_get_top_predictions(setup_test_environment, top_n, use_species_list):
+    """Test the vectorized selection of detections against a per-label reference implementation."""
+    from birdnet_analyzer.analyze.utils import get_species_mask, get_top_predictions
+
+    rng = np.random.default_rng(42)
+    cfg.LABELS = [f"Species{i}_Common{i}" for i in range(50)]
+    cfg.SPECIES_LIST = cfg.LABELS[::3] if use_species_list else []
+    cfg.TOP_N = top_n
+    cfg.MIN_CONFIDENCE = 0.5
+    pred = rng.random((8, len(cfg.LABELS))).astype("float32")
+
+    expected = []
+
+    for row in pred:
+        p_labels = [p for p in zip(cfg.LABELS, row, strict=True) if (top_n or p[1] >= cfg.MIN_CONFIDENCE) and (not cfg.SPECIES_LIST or p[0] in cfg.SPECIES_LIST)]
+        p_sorted = sorted(p_labels, key=lambda p: p[1], reverse=True)
+        expected.append(p_sorted[:top_n] if top_n else p_sorted)
+
+    assert get_top_predictions(pred, get_species_mask(cfg.LABELS, cfg.SPECIES_LIST)) == expected
+
+
+@pytest.mark.parametrize("top_n", [None, 3])
+def test_get_detections(setup_test_environment, top_n):
+    """Test that the columnar detections hold the same selection as get_top_predictions."""
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, get_detections, get_species_mask, get_top_predictions
+
+    rng = np.random.default_rng(42)
+    cfg.LABELS = [f"Species{i}_Common{i}" for i in range(20)]
+    cfg.SPECIES_LIST = []
+    cfg.TOP_N = top_n
+    cfg.MIN_CONFIDENCE = 0.5
+    pred = rng.random((6, len(cfg.LABELS))).astype("float32")
+    timestamps = [[i * 1.5, i * 1.5 + 3.0] for i in range(len(pred))]
+    species_mask = get_species_mask(cfg.LABELS, cfg.SPECIES_LIST)
+
+    detections = get_detections(timestamps, pred, species_mask)
+    expected = [(start, end, label, score) for (start, end), row in zip(timestamps, get_top_predictions(pred, species_mask), strict=True) for label, score in row]
+
+    assert detections.dtype == DETECTION_DTYPE
+    assert [(start, end, cfg.LABELS[label], score) for start, end, label, score in detections.tolist()] == expected
+
+
+def test_merge_consecutive_detections():
+    """Test merging of consecutive detections of the same label."""
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, merge_consecutive_detections, sort_detections
+
+    detections = np.array(
+        [(0.0, 3.0, 0, 0.5), (0.0, 3.0, 1, 0.25), (3.0, 6.0, 0, 0.75), (6.0, 9.0, 0, 1.0), (6.0, 9.0, 1, 0.5), (9.0, 12.0, 0, 0.25)],
+        dtype=DETECTION_DTYPE,
+    )
+
+    assert merge_consecutive_detections(detections, 1) is detections
+    assert sort_detections(merge_consecutive_detections(detections, 3)).tolist() == [
+        (0.0, 3.0, 1, 0.25),
+        (0.0, 9.0, 0, 0.75),
+        (6.0, 9.0, 1, 0.5),
+        (9.0, 12.0, 0, 0.25),
+    ]
+    assert sort_detections(merge_consecutive_detections(detections, None)).tolist() == [(0.0, 3.0, 1, 0.25), (0.0, 12.0, 0, 0.75), (6.0, 9.0, 1, 0.5)]
+    assert len(merge_consecutive_detections(detections[:0], 3)) == 0
+
+
+@pytest.mark.parametrize(("audio_speed", "overlap", "file_splitting_duration"), [(1.0, 0.0, 10), (1.0, 1.5, 10), (1.3, 0.5, 10), (1.0, 1.0, 2)])
+def test_iterate_raw_audio_chunks(setup_test_environment, audio_speed, overlap, file_splitting_duration):
+    """Test that the streamed chunks match splitting the whole decoded file."""
+    import soundfile as sf
+
+    from birdnet_analyzer import audio
+    from birdnet_analyzer.analyze.utils import iterate_raw_audio_chunks
+
+    fpath = os.path.join(setup_test_environment["input_dir"], "stream.wav")
+    rng = np.random.default_rng(42)
+    sf.write(fpath, rng.uniform(-0.5, 0.5, (44100 * 41 + 123, 2)).astype("float32"), 44100)
+
+    cfg.AUDIO_SPEED = audio_speed
+    cfg.SIG_OVERLAP = overlap
+    cfg.FILE_SPLITTING_DURATION = file_splitting_duration
+
+    sig, rate = audio.open_audio_file(fpath, cfg.SAMPLE_RATE, speed=audio_speed)
+    expected = audio.split_signal(sig, rate, cfg.SIG_LENGTH, cfg.SIG_OVERLAP, cfg.SIG_MINLEN)
+    chunks = list(iterate_raw_audio_chunks(fpath))
+
+    assert [i for i, _ in chunks] == np.cumsum([0] + [len(c) for _, c in chunks[:-1]]).tolist()
+    np.testing.assert_allclose(np.concatenate([c for _, c in chunks]), expected, atol=1e-6)
+
+
+@pytest.mark.parametrize(("audio_speed", "overlap", "file_splitting_duration"), [(1.0, 0.0, 10), (1.3, 1.5, 7), (0.8, 2.0, 5)])
+def test_get_file_parts(setup_test_environment, audio_speed, overlap, file_splitting_duration):
+    """Test that analyzing the ranges of a long file yields the same chunks as the whole file."""
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze.utils import get_file_parts, iterate_raw_audio_chunks
+
+    fpath = os.path.join(setup_test_environment["input_dir"], "long.wav")
+    rng = np.random.default_rng(42)
+    sf.write(fpath, rng.uniform(-0.5, 0.5, (44100 * 41 + 123, 2)).astype("float32"), 44100)
+
+    cfg.AUDIO_SPEED = audio_speed
+    cfg.SIG_OVERLAP = overlap
+    cfg.FILE_SPLITTING_DURATION = file_splitting_duration
+    cfg.BANDPASS_FMIN, cfg.BANDPASS_FMAX = 500, 12000
+
+    parts = get_file_parts(fpath)
+    expected = list(iterate_raw_audio_chunks(fpath))
+    chunks = [c for start, end in parts for c in iterate_raw_audio_chunks(fpath, start, end)]
+
+    assert len(parts) > 1
+    assert parts[-1][1] is None
+    assert [i for i, _ in chunks] == np.cumsum([0] + [len(c) for _, c in chunks[:-1]]).tolist()
+    np.testing.assert_allclose(np.concatenate([c for _, c in chunks]), np.concatenate([c for _, c in expected]), atol=1e-5)
+
+
+def test_analyze_files_shared_batches(setup_test_environment):
+    """Test that short files analyzed with shared batches get the same results as analyzed one by one."""
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    env = setup_test_environment
+    rng = np.random.default_rng(42)
+    fpaths = []
+
+    for i, duration in enumerate([4.2, 7.5, 3.0, 8.9, 1.0]):
+        fpath = os.path.join(env["input_dir"], f"clip{i}.wav")
+        sf.write(fpath, rng.uniform(-0.5, 0.5, int(48000 * duration)).astype("float32"), 48000)
+        fpaths.append(fpath)
+
+    # Unreadable files do not affect the other files of a batch
+    fpaths.insert(2, env["test_file1"])
+
+    cfg.INPUT_PATH = env["input_dir"]
+    cfg.OUTPUT_PATH = env["output_dir"]
+    cfg.LABELS = [f"Sci {i}_Common {i}" for i in range(4)]
+    cfg.TRANSLATED_LABELS = None
+    cfg.CODES = {}
+    cfg.SPECIES_LIST = []
+    cfg.RESULT_TYPES = ["csv", "scores"]
+    cfg.MIN_CONFIDENCE = 0.0
+    cfg.SIG_OVERLAP = 1.0
+    cfg.BATCH_SIZE = 4
+
+    def predict(samples, raw=False):
+        return np.stack([samples[:, :4].sum(axis=1), samples.std(axis=1), samples.max(axis=1), samples.min(axis=1)], axis=1)
+
+    def read_results(results):
+        outputs = []
+
+        for result in filter(None, results):
+            with open(result["csv"], encoding="utf-8") as f, np.load(result["scores"]) as scores:
+                outputs.append((f.read(), dict(scores)))
+
+        return outputs
+
+    with patch("birdnet_analyzer.analyze.utils.predict", side_effect=predict) as mock_predict:
+        expected = [analyze_utils.analyze_file(fpath) for fpath in fpaths]
+        expected_outputs = read_results(expected)
+        n_calls = mock_predict.call_count
+
+        results = analyze_utils.analyze_files(fpaths)
+
+    assert mock_predict.call_count - n_calls < n_calls
+    assert results == expected
+    assert results[2] is None
+
+    for (table, scores), (expected_table, expected_scores) in zip(read_results(results), expected_outputs, strict=True):
+        assert table == expected_table
+
+        for k, v in expected_scores.items():
+            np.testing.assert_array_equal(scores[k], v)
+
+
+def _merge_consecutive_reference(detections, max_consecutive):
+    """List based merging of consecutive detections, as done before the vectorized implementation."""
+    species = {}
+
+    for start, end, label, score in detections.tolist():
+        species.setdefault(label, []).append((start, end, score))
+
+    merged = []
+
+    for label in sorted(species):
+        timestamps = sorted(species[label], key=lambda t: t[0])
+        i = 0
+
+        while i < len(timestamps) - 1:
+            start, end, _ = timestamps[i]
+            next_start, next_end, _ = timestamps[i + 1]
+
+            if end >= next_start:
+                merged_scores = [timestamps[i][2], timestamps[i + 1][2]]
+                timestamps.pop(i)
+
+                while i < len(timestamps) - 1 and next_end >= timestamps[i + 1][0]:
+                    if max_consecutive and len(merged_scores) >= max_consecutive:
+                        break
+                    merged_scores.append(timestamps[i + 1][2])
+                    next_end = timestamps[i + 1][1]
+                    timestamps.pop(i + 1)
+
+                top_3_scores = sorted(merged_scores, reverse=True)[:3]
+                timestamps[i] = (start, next_end, sum(top_3_scores) / len(top_3_scores))
+
+            i += 1
+
+        merged.extend((start, end, label, score) for start, end, score in timestamps)
+
+    return merged
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_consecutive", [None, 2, 3, 5])
+def test_merge_consecutive_detections_random(seed, max_consecutive):
+    """Test the vectorized merging against the list based reference on random detections."""
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, merge_consecutive_detections
+
+    rng = np.random.default_rng(seed)
+    step = rng.choice([1.5, 2.0, 3.0, 4.0])
+    n_segments = 200
+    file_length = round(n_segments * step + 1.3, 2)
+
+    # Random subset of segments and labels, with ties in the scores
+    rows = [(round(i * step, 2), round(min(i * step + 3.0, file_length), 2)) for i in range(n_segments)]
+    detections = np.array(
+        [(start, end, label, rng.integers(1, 20) / 20) for start, end in rows for label in range(6) if rng.random() < 0.6],
+        dtype=DETECTION_DTYPE,
+    )
+    detections = detections[rng.permutation(len(detections))]
+    expected = np.array(_merge_consecutive_reference(detections, max_consecutive), dtype=DETECTION_DTYPE)
+
+    assert merge_consecutive_detections(detections, max_consecutive).tolist() == expected.tolist()
+
+
+def test_result_writers(setup_test_environment):
+    """Test the result writers with translated labels and eBird codes."""
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, RAVEN_TABLE_HEADER, CSVWriter, RavenTableWriter, get_label_table
+
+    env = setup_test_environment
+    fpath = os.path.join(env["input_dir"], "writer.wav")
+    sf.write(fpath, np.zeros(48000, dtype="float32"), 48000)
+
+    cfg.LABELS = ["Sci a_Common a", "Sci b_Common b"]
+    cfg.TRANSLATED_LABELS = ["Sci a_Gemein a", "Sci b_Gemein b"]
+    cfg.CODES = {"Sci b_Common b": "cobb"}
+    cfg.ADDITIONAL_COLUMNS = None
+    cfg.OUTPUT_PATH = env["output_dir"]
+    detections = np.array([(0.0, 3.0, 1, 0.5), (1.5, 4.5, 0, 0.25)], dtype=DETECTION_DTYPE)
+
+    # The table is rebuilt when the labels change
+    assert get_label_table().codes == ["Sci a_Common a", "cobb"]
+    assert get_label_table() is get_label_table()
+
+    table_path = os.path.join(env["output_dir"], "sub", "table.txt")
+    csv_path = os.path.join(env["output_dir"], "result.csv")
+
+    with RavenTableWriter(table_path, fpath) as writer:
+        writer.write(detections[:1])
+        writer.write(detections[1:])
+
+    with CSVWriter(csv_path, fpath) as writer:
+        writer.write(detections)
+
+    with open(table_path, encoding="utf-8") as f:
+        assert f.read() == (
+            RAVEN_TABLE_HEADER + f"1\tSpectrogram 1\t1\t0.0\t3.0\t0\t15000\tGemein b\tcobb\t0.5000\t{fpath}\t0.0\n"
+            f"2\tSpectrogram 1\t1\t1.5\t4.5\t0\t15000\tGemein a\tSci a_Common a\t0.2500\t{fpath}\t1.5\n"
+        )
+
+    with open(csv_path, encoding="utf-8") as f:
+        assert f.read().splitlines()[1:] == [f"0.0,3.0,Sci b,Gemein b,0.5000,{fpath}", f"1.5,4.5,Sci a,Gemein a,0.2500,{fpath}"]
+
+    # Empty tables get a placeholder line over the length of the file, so they can be combined
+    with RavenTableWriter(table_path, fpath, duration=12.5) as writer:
+        writer.write(detections[:0])
+
+    with open(table_path, encoding="utf-8") as f:
+        assert f.read().splitlines()[1].split("\t")[3:9] == ["0", "12.5", "0", "15000", "nocall", "nocall"]
+
+
+def test_combine_results(setup_test_environment):
+    """Test combining result files with the file durations of the analysis."""
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, CSVWriter, RavenTableWriter, combine_results
+
+    env = setup_test_environment
+    cfg.LABELS = ["Sci a_Common a", "Sci b_Common b"]
+    cfg.TRANSLATED_LABELS = None
+    cfg.CODES = {}
+    cfg.ADDITIONAL_COLUMNS = None
+    cfg.OUTPUT_PATH = env["output_dir"]
+    cfg.RESULT_TYPES = ["table", "csv"]
+    detections = np.array([(0.0, 3.0, 1, 0.5), (3.0, 6.0, 0, 0.25)], dtype=DETECTION_DTYPE)
+    saved_results = []
+
+    for i, afile in enumerate([env["test_file1"], env["test_file2"]]):
+        sf.write(afile, np.zeros(48000, dtype="float32"), 48000)
+        result_files = {"table": os.path.join(env["output_dir"], f"{i}.table.txt"), "csv": os.path.join(env["output_dir"], f"{i}.csv")}
+
+        with RavenTableWriter(result_files["table"], afile) as table, CSVWriter(result_files["csv"], afile) as csv_writer:
+            table.write(detections[i:])
+            csv_writer.write(detections[i:])
+
+        saved_results.append(result_files | {"duration": 10.0})
+
+    # The audio files are not opened again
+    with patch("birdnet_analyzer.audio.get_audio_file_length", side_effect=RuntimeError):
+        combine_results([*saved_results, None])
+
+    with open(os.path.join(env["output_dir"], cfg.OUTPUT_RAVEN_FILENAME), encoding="utf-8") as f:
+        rows = [line.split("\t") for line in f.read().splitlines()[1:]]
+
+    assert [row[:5] for row in rows] == [
+        ["1", "Spectrogram 1", "1", "0.0", "3.0"],
+        ["2", "Spectrogram 1", "1", "3.0", "6.0"],
+        ["3", "Spectrogram 1", "1", "13.0", "16.0"],
+    ]
+    assert [row[10] for row in rows] == [env["test_file1"], env["test_file1"], env["test_file2"]]
+
+    with open(os.path.join(env["output_dir"], cfg.OUTPUT_CSV_FILENAME), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    assert lines[0].startswith("Start (s)")
+    assert len(lines) == 4
+
+
+def test_run_manifest(setup_test_environment):
+    """Test resuming from the checkpoints and results stored in the run manifest."""
+    from birdnet_analyzer.analyze.core import _get_tasks
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, RunManifest, get_result_file_names
+
+    env = setup_test_environment
+    cfg.OUTPUT_PATH = env["output_dir"]
+    path = os.path.join(env["output_dir"], cfg.RUN_MANIFEST_FILENAME)
+    detections = np.array([(0.0, 3.0, 1, 0.5), (3.0, 6.0, 0, 0.25)], dtype=DETECTION_DTYPE)
+    scores = {"start": np.array([0.0]), "end": np.array([3.0]), "outputs": np.ones((1, 2), dtype="float16")}
+
+    manifest = RunManifest(path)
+    manifest.add_checkpoint((env["test_file1"], 0, 200), (detections, scores, 3))
+    manifest.add_checkpoint((env["test_file1"], 200, None), (detections[:0], None, 0))
+    manifest.add_result(env["test_file2"], {"table": "test2.txt", "duration": 5.0})
+    manifest.save(force=True)
+
+    # Completed ranges are restored after a restart
+    manifest = RunManifest(path)
+    parts = manifest.get_checkpoints(env["test_file1"])
+
+    assert manifest.loaded
+    assert manifest.get_result(env["test_file1"]) is None
+    assert manifest.get_result(env["test_file2"]) == {"table": "test2.txt", "duration": 5.0}
+    assert list(parts) == [(0, 200), (200, None)]
+    np.testing.assert_array_equal(parts[(0, 200)][0], detections)
+    np.testing.assert_array_equal(parts[(0, 200)][1]["outputs"], scores["outputs"])
+    assert parts[(200, None)][1] is None
+    assert parts[(0, 200)][2] == 3
+
+    # Checkpoints are removed once the file is completed
+    manifest.add_result(env["test_file1"], {"table": "test1.txt", "duration": 600.0})
+    manifest.save(force=True)
+
+    assert not os.path.exists(manifest.checkpoint_dir)
+
+    assert not manifest.stale
+
+    # A manifest of other settings is not used
+    cfg.MIN_CONFIDENCE = 0.5
+    manifest = RunManifest(path)
+
+    assert manifest.get_result(env["test_file2"]) is None
+    assert manifest.stale
+    assert not manifest.loaded
+
+    # Existing results are only kept for an output folder without a manifest
+    cfg.CPU_THREADS = 1
+
+    for result_path in get_result_file_names(env["test_file2"]).values():
+        os.makedirs(os.path.dirname(result_path), exist_ok=True)
+        open(result_path, "w").close()
+
+    assert env["test_file2"] in [task[0] for task in _get_tasks([env["test_file2"]], 1, manifest)]
+
+    os.remove(path)
+
+    assert _get_tasks([env["test_file2"]], 1, RunManifest(path)) == []
+
+
+def test_detection_database(setup_test_environment):
+    """Test writing detections to the result database through the database writer."""
+    import sqlite3
+
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    env = setup_test_environment
+    fpath = os.path.join(env["input_dir"], "20240512_053000.wav")
+    sf.write(fpath, np.zeros(48000 * 6, dtype="float32"), 48000)
+
+    cfg.LABELS = ["Sci a_Common a", "Sci b_Common b"]
+    cfg.TRANSLATED_LABELS = None
+    cfg.CODES = {}
+    cfg.OUTPUT_PATH = env["output_dir"]
+    cfg.RESULT_TYPES = ["sqlite"]
+    db_path = os.path.join(env["output_dir"], cfg.OUTPUT_SQLITE_FILENAME)
+    detections = np.array([(0.0, 3.0, 1, 0.5), (3.0, 6.0, 0, 0.25)], dtype=analyze_utils.DETECTION_DTYPE)
+
+    assert analyze_utils.get_result_file_names(fpath) == {"sqlite": db_path}
+    assert not analyze_utils.has_results(fpath, {"sqlite": db_path})
+
+    with analyze_utils.DatabaseWriter(db_path):
+        analyze_utils.save_result_files(detections, {"sqlite": db_path}, fpath)
+        # Results of a file that is analyzed again replace the previous ones
+        analyze_utils.save_result_files(detections[:1], {"sqlite": db_path}, fpath)
+
+    assert analyze_utils.DATABASE_QUEUE is None
+    assert analyze_utils.has_results(fpath, {"sqlite": db_path})
+
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("SELECT path, duration, recorded_at FROM files").fetchall() == [(fpath, 6.0, "2024-05-12T05:30:00")]
+        assert db.execute(
+            "SELECT species.scientific_name, species.common_name, start, end, confidence FROM detections JOIN species ON species.id = detections.species_id"
+        ).fetchall() == [("Sci b", "Common b", 0.0, 3.0, 0.5)]
+        assert "detections_species_confidence" in db.execute("EXPLAIN QUERY PLAN SELECT * FROM detections WHERE species_id = 2 AND confidence > 0.4").fetchone()[-1]
+
+
+@pytest.mark.parametrize("top_k", [0, 2])
+def test_save_scores(setup_test_environment, top_k):
+    """Test that the score files hold the raw model outputs of all segments."""
+    from birdnet_analyzer.analyze.utils import compress_scores, concatenate_scores, get_scores_config, save_scores
+
+    rng = np.random.default_rng(42)
+    cfg.LABELS = [f"Species{i}_Common{i}" for i in range(5)]
+    cfg.SCORES_TOP_K = top_k
+    outputs = rng.normal(0, 5, (7, len(cfg.LABELS))).astype("float32")
+    timestamps = [[i * 3.0, i * 3.0 + 3.0] for i in range(len(outputs))]
+    fpath = os.path.join(setup_test_environment["output_dir"], "scores", "test.BirdNET.scores.npz")
+
+    save_scores(fpath, concatenate_scores([compress_scores(timestamps[:4], outputs[:4]), compress_scores(timestamps[4:], outputs[4:])]))
+
+    with np.load(fpath) as scores:
+        np.testing.assert_array_equal(scores["start"], np.arange(7) * 3.0)
+        assert scores["outputs"].dtype == np.float16
+        assert scores["num_labels"] == len(cfg.LABELS)
+        assert json.loads(str(scores["config"])) == get_scores_config()
+
+        if top_k:
+            expected = np.sort(np.argsort(-outputs, axis=1)[:, :top_k], axis=1)
+            np.testing.assert_array_equal(scores["indices"], expected)
+            np.testing.assert_allclose(scores["outputs"], np.take_along_axis(outputs, expected, axis=1), rtol=1e-3)
+        else:
+            assert "indices" not in scores
+            np.testing.assert_allclose(scores["outputs"], outputs, rtol=1e-3)
+
+
+@pytest.mark.parametrize("top_k", [0, 3])
+def test_get_file_detections_from_scores(setup_test_environment, top_k):
+    """Test that detections from stored scores match the detections of the stored outputs."""
+    from birdnet_analyzer.analyze.utils import (
+        apply_sigmoid,
+        compress_scores,
+        get_audio_settings,
+        get_detections,
+        get_file_detections,
+        get_scores_file_name,
+        get_species_mask,
+        save_scores,
+    )
+
+    env = setup_test_environment
+    rng = np.random.default_rng(42)
+    cfg.INPUT_PATH = env["input_dir"]
+    cfg.LABELS = [f"Species{i}_Common{i}" for i in range(8)]
+    cfg.SPECIES_LIST = []
+    cfg.SCORES_TOP_K = top_k
+    cfg.SIG_OVERLAP = 1.0
+    outputs = rng.normal(-2, 4, (10, len(cfg.LABELS))).astype("float32")
+    timestamps = [[i * 2.0, i * 2.0 + 3.0] for i in range(len(outputs))]
+    save_scores(get_scores_file_name(env["test_file1"], env["output_dir"]), compress_scores(timestamps, outputs))
+
+    # Analyze again with other settings
+    cfg.SCORES_INPUT_PATH = env["output_dir"]
+    cfg.SIG_OVERLAP = 0.0
+    cfg.SIGMOID_SENSITIVITY = 1.25
+    cfg.MIN_CONFIDENCE = 0.3
+    cfg.SPECIES_LIST = cfg.LABELS[::2]
+
+    detections, scores = get_file_detections(env["test_file1"])
+    expected = get_detections(timestamps, apply_sigmoid(outputs.astype("float16").astype("float32")), get_species_mask(cfg.LABELS, cfg.SPECIES_LIST))
+
+    # Top-K scores only contain the highest outputs of each segment
+    if top_k:
+        top = np.argsort(-outputs, axis=1)[:, :top_k]
+        expected = expected[[label in top[int(start // 2)] for start, label in zip(expected["start"], expected["label"], strict=True)]]
+
+    # The stored settings are used for the result files without changing the configuration
+    assert scores is None
+    assert cfg.SIG_OVERLAP == 0.0
+    assert get_audio_settings(env["test_file1"])["sig_overlap"] == 1.0
+    assert get_audio_settings()["sig_overlap"] == 0.0
+    assert len(detections) > 0
+    assert detections.tolist() == expected.tolist()
+
+
+def test_autotune(setup_test_environment):
+    """Test that autotune picks the fastest measured configuration and reuses it from the cache."""
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    env = setup_test_environment
+    cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE = os.path.join(env["output_dir"], "cache", "autotune.json")
+
+    assert analyze_utils.get_autotune_candidates(1) == [(1, 1)]
+    assert analyze_utils.get_autotune_candidates(6) == [(1, 6), (2, 3), (4, 1), (6, 1)]
+
+    # Four workers with batch size 8 are the fastest
+    def measure_throughput(workers, tflite_threads, batch_sizes):
+        return [min(bs, 8) * (10 if workers == 4 else tflite_threads) for bs in batch_sizes]
+
+    with patch.object(analyze_utils, "measure_throughput", side_effect=measure_throughput) as mock_measure:
+        tuned = analyze_utils.autotune(6)
+        assert mock_measure.call_count == 4
+        assert (tuned["cpu_threads"], tuned["tflite_threads"], tuned["batch_size"]) == (4, 1, 8)
+
+        assert analyze_utils.autotune(6) == tuned
+        assert mock_measure.call_count == 4
+
+        with open(cfg.PERFORMANCE_AUTOTUNE_CACHE_FILE, encoding="utf-8") as f:
+            assert json.load(f) == {analyze_utils.get_autotune_key(6): tuned}
+
+        # Other thread counts are measured again
+        analyze_utils.autotune(2)
+        assert mock_measure.call_count == 6
+
+
+def test_get_memory_limits(setup_test_environment, capsys):
+    """Test that the decoding window and prefetching are reduced to fit the memory budget."""
+    from birdnet_analyzer.analyze.utils import (
+        INTERPRETER_MEMORY,
+        INTERPRETER_SAMPLE_MEMORY,
+        MIN_WINDOW_DURATION,
+        WINDOW_MEMORY_FACTOR,
+        WORKER_BASE_MEMORY,
+        get_memory_limits,
+        get_worker_base_memory,
+    )
+
+    cfg.SAMPLE_RATE = 48000
+    cfg.FILE_SPLITTING_DURATION = 600
+    cfg.PREFETCH_DEPTH = 2
+    cfg.BATCH_SIZE = 8
+    cfg.CASCADE_PRECISION = None
+    window_memory = cfg.SAMPLE_RATE * 4 / 1024**2
+
+    # Interpreters for batches of 1, 2, 4 and 8 samples
+    base_memory = get_worker_base_memory()
+    assert base_memory == WORKER_BASE_MEMORY + 4 * INTERPRETER_MEMORY + 15 * INTERPRETER_SAMPLE_MEMORY
+
+    cfg.CASCADE_PRECISION = "int8"
+    assert get_worker_base_memory() == 2 * base_memory - WORKER_BASE_MEMORY
+
+    cfg.CASCADE_PRECISION = None
+
+    # A large budget keeps the configured values
+    assert get_memory_limits(64000, 4) == (600, 2)
+
+    # 16 workers on 16 GB get shorter windows
+    window, depth = get_memory_limits(16384, 16)
+    assert depth == 2
+    assert MIN_WINDOW_DURATION <= window < 600
+    assert base_memory + window * window_memory * (WINDOW_MEMORY_FACTOR + depth + 1) <= 16384 / 16
+
+    # Prefetching is dropped before the window gets too short
+    budget = 2 * (base_memory + MIN_WINDOW_DURATION * window_memory * (WINDOW_MEMORY_FACTOR + 2))
+    assert get_memory_limits(budget, 2) == (MIN_WINDOW_DURATION, 1)
+
+    # Budgets that are too small use the smallest values
+    assert get_memory_limits(1000, 16) == (MIN_WINDOW_DURATION, 0)
+    assert "too small" in capsys.readouterr().out
+
+
+def test_activity_prescreen(setup_test_environment):
+    """Test that quiet chunks are skipped and the analyzed chunks get the same results as without the pre-screen."""
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    env = setup_test_environment
+    rng = np.random.default_rng(42)
+    signal = rng.normal(0, 1e-4, 48000 * 60).astype("float32")
+
+    # Loud bursts in a few chunks of an otherwise quiet recording
+    for t in (4, 20, 21, 47):
+        signal[t * 48000 : t * 48000 + 12000] += rng.uniform(-0.5, 0.5, 12000).astype("float32")
+
+    fpaths = [os.path.join(env["input_dir"], "night.wav"), os.path.join(env["input_dir"], "clip.wav")]
+    sf.write(fpaths[0], signal, 48000)
+    sf.write(fpaths[1], signal[: 48000 * 5], 48000)
+
+    cfg.INPUT_PATH = env["input_dir"]
+    cfg.OUTPUT_PATH = env["output_dir"]
+    cfg.LABELS = [f"Sci {i}_Common {i}" for i in range(4)]
+    cfg.SPECIES_LIST = []
+    cfg.RESULT_TYPES = ["scores"]
+    cfg.MIN_CONFIDENCE = 0.0
+    cfg.SIG_OVERLAP = 1.0
+    cfg.BATCH_SIZE = 4
+
+    def predict(samples, raw=False):
+        return np.stack([samples[:, :4].sum(axis=1), samples.std(axis=1), samples.max(axis=1), samples.min(axis=1)], axis=1)
+
+    levels = analyze_utils.get_activity_levels(np.stack([signal[:144000], signal[4 * 48000 : 4 * 48000 + 144000]]))
+    assert levels[0] < -60 < levels[1]
+
+    analyze_utils.reset_activity_stats()
+
+    with patch("birdnet_analyzer.analyze.utils.predict", side_effect=predict) as mock_predict:
+        expected, expected_scores = analyze_utils.get_file_detections(fpaths[0])
+        assert analyze_utils.ACTIVITY_STATS == {"chunks": 0, "skipped": 0}
+        n_samples = sum(len(c.args[0]) for c in mock_predict.call_args_list)
+        mock_predict.reset_mock()
+
+        cfg.ACTIVITY_THRESHOLD = -60.0
+        detections, scores = analyze_utils.get_file_detections(fpaths[0])
+
+        # Only the loud chunks are run through the model, in full batches
+        assert [len(c.args[0]) for c in mock_predict.call_args_list][0] == 4
+        assert sum(len(c.args[0]) for c in mock_predict.call_args_list) < n_samples / 3
+
+        shared_results = analyze_utils.analyze_files(fpaths)
+
+    skipped = np.isnan(scores["outputs"].astype("float32")).any(axis=1)
+    analyzed = np.isin(expected["start"], scores["start"][~skipped])
+
+    assert 0 < np.count_nonzero(~skipped) < len(skipped) / 3
+    np.testing.assert_array_equal(scores["start"], expected_scores["start"])
+    np.testing.assert_array_equal(scores["outputs"][~skipped], expected_scores["outputs"][~skipped])
+    assert detections.tolist() == expected[analyzed].tolist()
+
+    # Skipped chunks are counted per file and per worker
+    assert shared_results[0]["skipped_chunks"] == np.count_nonzero(skipped)
+    assert shared_results[1]["skipped_chunks"] == 1
+    assert analyze_utils.get_worker_stats()["activity"] == {"chunks": 2 * len(skipped) + 2, "skipped": 2 * np.count_nonzero(skipped) + 1}
+
+    # Skipped chunks have no detections with stored scores either
+    with np.load(shared_results[0]["scores"]) as data:
+        np.testing.assert_array_equal(data["outputs"], scores["outputs"])
+
+    cfg.SCORES_INPUT_PATH = env["output_dir"]
+    cfg.TOP_N = 2
+    assert set(analyze_utils.get_file_detections(fpaths[0])[0]["start"]) == set(scores["start"][~skipped])
+
+
+def test_calibrate_activity_threshold(setup_test_environment):
+    """Test that the threshold is calibrated against chunks with a confident score, not the top N outputs."""
+    import soundfile as sf
+
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    env = setup_test_environment
+    rng = np.random.default_rng(42)
+    signal = rng.normal(0, 1e-4, 48000 * 30).astype("float32")
+
+    # A loud burst in the fourth chunk, the rest of the recording is quiet
+    signal[10 * 48000 : 10 * 48000 + 12000] += rng.uniform(-0.5, 0.5, 12000).astype("float32")
+
+    fpath = os.path.join(env["input_dir"], "calibration.wav")
+    sf.write(fpath, signal, 48000)
+
+    cfg.LABELS = [f"Sci {i}_Common {i}" for i in range(2)]
+    cfg.SPECIES_LIST = []
+    cfg.MIN_CONFIDENCE = 0.5
+    cfg.SIG_OVERLAP = 0.0
+    cfg.BATCH_SIZE = 4
+    cfg.TOP_N = 2
+
+    def predict(samples, raw=False):
+        loud = (np.abs(samples).max(axis=1) > 0.1).astype("float32")
+        return np.stack([loud, np.full(len(samples), 0.1, dtype="float32")], axis=1)
+
+    levels = analyze_utils.get_activity_levels(np.stack([signal[:144000], signal[9 * 48000 : 9 * 48000 + 144000]]))
+
+    with patch("birdnet_analyzer.analyze.utils.predict", side_effect=predict):
+        threshold = analyze_utils.calibrate_activity_threshold([fpath], 10)
+
+    assert threshold == pytest.approx(levels[1] - analyze_utils.ACTIVITY_CALIBRATION_MARGIN, abs=1e-3)
+    assert levels[0] < threshold
+
+    cfg.MIN_CONFIDENCE = 1.5
+
+    with patch("birdnet_analyzer.analyze.utils.predict", side_effect=predict):
+        assert analyze_utils.calibrate_activity_threshold([fpath], 10) is None
+
+
+def test_predict_cascade(setup_test_environment, capsys):
+    """Test that only candidates of the first stage are re-scored with the full model."""
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    cfg.LABELS = [f"Sci {i}_Common {i}" for i in range(3)]
+    cfg.SPECIES_LIST = cfg.LABELS[:2]
+    cfg.APPLY_SIGMOID = False
+    cfg.CASCADE_PRECISION = "int8"
+    cfg.CASCADE_THRESHOLD = 0.2
+
+    # The third label is not allowed, so the last chunk is no candidate
+    first_stage = np.array([[0.1, 0.3, 0.0], [0.05, 0.1, 0.0], [0.0, 0.25, 0.9], [0.1, 0.0, 0.9]], dtype="float32")
+    samples = np.arange(4, dtype="float32")[:, None] * np.ones((4, 8), dtype="float32")
+
+    analyze_utils.reset_cascade_stats()
+
+    with (
+        patch("birdnet_analyzer.model.predict_cascade", return_value=first_stage) as mock_cascade,
+        patch("birdnet_analyzer.model.predict", side_effect=lambda x: np.full((len(x), 3), 0.5, dtype="float32") + x[:, :1]) as mock_predict,
+    ):
+        pred = analyze_utils.predict(samples)
+
+    mock_cascade.assert_called_once()
+    mock_predict.assert_called_once()
+    np.testing.assert_array_equal(mock_predict.call_args.args[0], samples[[0, 2]])
+    np.testing.assert_array_equal(pred[[0, 2]], [[0.5] * 3, [2.5] * 3])
+    np.testing.assert_array_equal(pred[[1, 3]], first_stage[[1, 3]])
+
+    stats = analyze_utils.get_worker_stats()["cascade"]
+    assert (stats["chunks"], stats["rescored"]) == (4, 2)
+
+    # The species mask is built once and again only when the species list is replaced
+    with (
+        patch("birdnet_analyzer.model.predict_cascade", return_value=first_stage),
+        patch("birdnet_analyzer.model.predict", side_effect=lambda x: np.zeros((len(x), 3), dtype="float32")),
+        patch("birdnet_analyzer.analyze.utils.get_species_mask", side_effect=analyze_utils.get_species_mask) as mock_mask,
+    ):
+        analyze_utils.predict(samples)
+        analyze_utils.predict(samples)
+        assert mock_mask.call_count == 0
+
+        cfg.SPECIES_LIST = cfg.LABELS[2:]
+        analyze_utils.predict(samples)
+        analyze_utils.predict(samples)
+        assert mock_mask.call_count == 1
+
+    assert analyze_utils.get_worker_stats()["cascade"]["rescored"] == 2 + 4 * 2
+
+    analyze_utils.print_cascade_stats([stats, stats | {"chunks": 0, "rescored": 0}])
+    assert "50.0% of 4 chunks re-scored" in capsys.readouterr().out
+
+
+def test_timed_analyze_task_flushes_metadata(setup_test_environment):
+    """Test that the metadata read by a task is committed before the worker can be terminated."""
+    import sqlite3
+
+    import soundfile as sf
+
+    from birdnet_analyzer import audio
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    env = setup_test_environment
+    fpath = os.path.join(env["input_dir"], "metadata.wav")
+    sf.write(fpath, np.zeros(48000 * 2, dtype="float32"), 48000)
+    cfg.AUDIO_METADATA_CACHE_FILE = os.path.join(env["test_dir"], "cache", "metadata.db")
+
+    with (
+        patch.object(audio, "METADATA_COMMIT_INTERVAL", 3600.0),
+        patch("birdnet_analyzer.analyze.utils.analyze_task", side_effect=audio.get_audio_file_length),
+    ):
+        audio.METADATA_LAST_COMMIT = audio.time.monotonic()
+        index, _, _, _, result = analyze_utils.timed_analyze_task((3, fpath))
+
+    assert (index, result) == (3, 2.0)
+
+    with sqlite3.connect(cfg.AUDIO_METADATA_CACHE_FILE) as db:
+        assert db.execute("SELECT path, duration FROM audio_metadata").fetchall() == [(fpath, 2.0)]
+
+
+def test_measure_worker_batch_sizes(setup_test_environment, fake_interpreter):
+    """Test that each batch size of the calibration is run as one batch of that size."""
+    import queue
+
+    from birdnet_analyzer import model
+    from birdnet_analyzer.analyze import utils as analyze_utils
+
+    cfg.BATCH_SIZE = 1
+    cfg.CUSTOM_CLASSIFIER = None
+    cfg.CASCADE_PRECISION = None
+
+    # Chunks of the input length of the fake interpreter
+    cfg.SAMPLE_RATE = 8
+    cfg.SIG_LENGTH = 1.0
+    results = queue.Queue()
+
+    analyze_utils._measure_worker(cfg.get_config(), MagicMock(), (1, 4, 8), 0.01, results)
+
+    rates = results.get_nowait()
+    assert len(rates) == 3
+    assert all(rate > 0 for rate in rates)
+    assert sorted(model.ENGINE.interpreters) == [1, 4, 8]
+    assert all(interpreter.invocations > 0 for interpreter in model.ENGINE.interpreters.values())
@@ -0,0 +1,118 @@
+import csv
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import birdnet_analyzer.config as cfg
+from birdnet_analyzer.benchmark.utils import RESULT_COLUMNS, _analyze_precision, compare_scores, print_results, save_results
+
+
+@pytest.fixture
+def scores():
+    """Scores of a model and the reference model for two segments and three classes."""
+    reference = np.array([[0.9, 0.1, 0.5], [0.2, 0.8, 0.6]], dtype="float32")
+    scores = np.array([[0.4, 0.6, 0.5], [0.1, 0.9, 0.7]], dtype="float32")
+
+    return scores, reference
+
+
+@pytest.fixture
+def results():
+    """Benchmark results of two model precisions."""
+    row = {
+        "precision": "fp32",
+        "audio_seconds": 60.0,
+        "processing_seconds": 3.0,
+        "real_time_factor": 0.05,
+        "speedup": 1.0,
+        "peak_rss_mb": 512.0,
+        "top1_agreement": 1.0,
+        "topk_overlap": 1.0,
+        "topk_mean_abs_diff": 0.0,
+        "detection_precision": 1.0,
+        "detection_recall": 1.0,
+    }
+
+    return [row, row | {"precision": "int8", "processing_seconds": 1.5, "speedup": 2.0, "peak_rss_mb": None, "top1_agreement": 0.5}]
+
+
+@pytest.mark.parametrize("block_size", [1, 4096])
+def test_compare_scores(scores, block_size):
+    scores, reference = scores
+
+    result = compare_scores(scores, reference, top_k=2, min_conf=0.55, block_size=block_size)
+
+    assert result["top1_agreement"] == pytest.approx(0.5)
+    assert result["topk_overlap"] == pytest.approx(0.75)
+    assert result["topk_mean_abs_diff"] == pytest.approx(0.175)
+    assert result["detection_precision"] == pytest.approx(2 / 3)
+    assert result["detection_recall"] == pytest.approx(2 / 3)
+
+
+def test_compare_scores_reference(scores):
+    """Test that the reference compared with itself agrees in everything."""
+    _, reference = scores
+
+    result = compare_scores(reference, reference, top_k=10, min_conf=0.99)
+
+    assert result == {
+        "top1_agreement": 1.0,
+        "topk_overlap": 1.0,
+        "topk_mean_abs_diff": 0.0,
+        "detection_precision": 1.0,
+        "detection_recall": 1.0,
+    }
+
+
+def test_print_results(results, capsys):
+    print_results(results, top_k=5)
+
+    lines = capsys.readouterr().out.splitlines()
+
+    assert len(lines) == 3
+    assert "Top-5" in lines[0]
+    assert lines[1].split()[:4] == ["fp32", "0.0500", "1.00x", "512"]
+    assert lines[2].split()[:5] == ["int8", "0.0500", "2.00x", "n/a", "0.500"]
+
+
+def test_save_results(results, tmp_path):
+    path = os.path.join(tmp_path, "benchmark", "results.csv")
+
+    save_results(path, results)
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    assert list(rows[0]) == list(RESULT_COLUMNS)
+    assert [row["precision"] for row in rows] == ["fp32", "int8"]
+    assert rows[1]["peak_rss_mb"] == ""
+    assert float(rows[1]["speedup"]) == 2.0
+
+
+def test_analyze_precision_writes_scores(tmp_path, monkeypatch):
+    """Test that the scores of all batches are streamed to the .npy file."""
+    monkeypatch.setattr(cfg, "MODEL_PRECISION", cfg.MODEL_PRECISION)
+    monkeypatch.setattr(cfg, "MODEL_PATH", cfg.MODEL_PATH)
+
+    batches = [np.full((4, 3), i, dtype="float32") for i in range(3)] + [np.full((1, 3), 3, dtype="float64")]
+    score_path = os.path.join(tmp_path, "int8.npy")
+
+    def iterate_audio_batches(fpath):
+        for batch in batches[:2] if fpath == "a.wav" else batches[2:]:
+            yield None, batch
+
+    with (
+        patch("birdnet_analyzer.audio.open_audio_file", return_value=(np.zeros(144000, dtype="float32"), 48000)),
+        patch("birdnet_analyzer.model.predict"),
+        patch("birdnet_analyzer.analyze.utils.iterate_audio_batches", side_effect=iterate_audio_batches),
+    ):
+        processing_time, _ = _analyze_precision("int8", ["a.wav", "b.wav"], score_path, cfg.get_config())
+
+    scores = np.load(score_path)
+
+    assert processing_time >= 0
+    assert scores.dtype == np.float32
+    np.testing.assert_array_equal(scores, np.concatenate(batches))
+    assert os.listdir(tmp_path) == ["int8.npy"]
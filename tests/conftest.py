@@ -0,0 +1,68 @@
+from typing import ClassVar
+
+import numpy as np
+import pytest
+
+
+class FakeInterpreter:
+    """Stand-in for a TFLite interpreter with 8 input samples, 2 embeddings and 3 outputs."""
+
+    instances: ClassVar[list["FakeInterpreter"]] = []
+
+    def __init__(self, model_path=None, num_threads=None):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.batch_size = 1
+        self.invocations = 0
+        self.tensors = {}
+        FakeInterpreter.instances.append(self)
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array([self.batch_size, 8])}]
+
+    def get_output_details(self):
+        return [{"index": 2, "shape": np.array([self.batch_size, 3])}]
+
+    def get_tensor_details(self):
+        return [{"index": index, "shape": np.array(tensor.shape)} for index, tensor in self.tensors.items()]
+
+    def resize_tensor_input(self, index, shape):
+        self.batch_size = shape[0]
+
+    def allocate_tensors(self):
+        self.tensors = {1: np.zeros((self.batch_size, 2), dtype="float32"), 2: np.zeros((self.batch_size, 3), dtype="float32")}
+
+    def set_tensor(self, index, value):
+        assert value.shape == (self.batch_size, 8)
+        self.tensors[index] = value
+
+    def invoke(self):
+        x = self.tensors[0]
+        self.invocations += 1
+        self.tensors[1] = np.stack([x.sum(axis=1), x.max(axis=1)], axis=1)
+        self.tensors[2] = np.stack([x[:, 0], x.sum(axis=1), x.min(axis=1)], axis=1)
+
+    def get_tensor(self, index):
+        return self.tensors[index].copy()
+
+
+@pytest.fixture
+def fake_interpreter(monkeypatch):
+    """Replaces the TFLite interpreter of the model module and unloads the models afterwards."""
+    from birdnet_analyzer import model
+
+    FakeInterpreter.instances = []
+    monkeypatch.setattr(model.tflite, "Interpreter", FakeInterpreter)
+
+    for name in ("ENGINE", "C_ENGINE", "CASCADE_ENGINE"):
+        monkeypatch.setattr(model, name, None)
+
+    return FakeInterpreter
+
+
+@pytest.fixture(autouse=True)
+def no_metadata_cache(monkeypatch):
+    """Keeps tests from writing to the on-disk audio metadata index of the user."""
+    import birdnet_analyzer.config as cfg
+
+    monkeypatch.setattr(cfg, "AUDIO_METADATA_CACHE_FILE", None)
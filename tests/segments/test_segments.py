@@ -63,3 +63,24 @@ def test_segments_cli(mock_parse_folders: MagicMock, mock_parse_files: MagicMock
     mock_parse_folders.assert_called_once()
     mock_parse_files.assert_called_once()
     mock_extract_segments.assert_called()
+
+
+def test_parse_files_from_database(setup_test_environment):
+    import numpy as np
+
+    from birdnet_analyzer.analyze.utils import DETECTION_DTYPE, DetectionDatabase, LabelTable
+    from birdnet_analyzer.segments.utils import parse_files, parse_folders
+
+    env = setup_test_environment
+    afile = os.path.join(env["input_dir"], "audio1.wav")
+    db_path = os.path.join(env["results_dir"], cfg.OUTPUT_SQLITE_FILENAME)
+    detections = np.array([(0.0, 3.0, 0, 0.9), (3.0, 6.0, 1, 0.2)], dtype=DETECTION_DTYPE)
+
+    with DetectionDatabase(db_path, LabelTable(["Sci a_Common a", "Sci b_Common b"])) as db:
+        db.add_file(afile, 6.0, detections)
+
+    cfg.MIN_CONFIDENCE = 0.5
+    flist = parse_folders(env["input_dir"], env["results_dir"])
+
+    assert flist == [{"isCombinedFile": True, "isDatabase": True, "result": db_path}]
+    assert parse_files(flist) == [(afile, [{"audio": afile, "start": 0.0, "end": 3.0, "species": "Common a", "confidence": 0.9}])]
@@ -0,0 +1,122 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+import birdnet_analyzer.config as cfg
+from birdnet_analyzer import audio
+
+
+@pytest.fixture
+def metadata_cache():
+    """Use a temporary on-disk metadata index."""
+    test_dir = tempfile.TemporaryDirectory()
+    original_cache_file = cfg.AUDIO_METADATA_CACHE_FILE
+    cfg.AUDIO_METADATA_CACHE_FILE = os.path.join(test_dir.name, "cache", "audio_metadata.db")
+    audio.METADATA_CACHE.clear()
+
+    yield test_dir.name
+
+    cfg.AUDIO_METADATA_CACHE_FILE = original_cache_file
+    audio.METADATA_CACHE.clear()
+
+    if audio.METADATA_DB is not None:
+        audio.METADATA_DB.close()
+
+    audio.METADATA_DB = audio.METADATA_DB_KEY = None
+    audio.METADATA_PENDING.clear()
+    test_dir.cleanup()
+
+
+def test_metadata_cache_batches_commits(metadata_cache):
+    """Test that rows of the on-disk metadata index are committed in batches."""
+    import sqlite3
+
+    fpaths = []
+
+    for i in range(5):
+        fpaths.append(os.path.join(metadata_cache, f"test{i}.wav"))
+        sf.write(fpaths[-1], np.zeros(16000 * (i + 1), dtype="float32"), 16000)
+
+    def count_rows():
+        with sqlite3.connect(cfg.AUDIO_METADATA_CACHE_FILE) as db:
+            return db.execute("SELECT COUNT(*) FROM audio_metadata").fetchone()[0]
+
+    with patch.object(audio, "METADATA_COMMIT_SIZE", 3), patch.object(audio, "METADATA_COMMIT_INTERVAL", 3600.0):
+        audio.METADATA_LAST_COMMIT = audio.time.monotonic()
+
+        for fpath in fpaths:
+            audio.get_audio_file_length(fpath)
+
+        assert count_rows() == 3
+
+        audio.flush_metadata_cache()
+
+        assert count_rows() == 5
+
+
+def test_get_audio_file_info_cache(metadata_cache):
+    fpath = os.path.join(metadata_cache, "test.wav")
+    sf.write(fpath, np.zeros((44100 * 3, 2), dtype="float32"), 44100)
+
+    assert audio.get_audio_file_info(fpath) == (3.0, 44100, 2)
+    assert os.path.isfile(cfg.AUDIO_METADATA_CACHE_FILE)
+
+    audio.flush_metadata_cache()
+
+    # Cached values are used without opening the file, also when the in-memory cache is empty
+    with patch("soundfile.info", side_effect=RuntimeError("header read")):
+        assert audio.get_audio_file_length(fpath) == 3.0
+        audio.METADATA_CACHE.clear()
+        assert audio.get_sample_rate(fpath) == 44100
+
+    # Changed files are read again
+    sf.write(fpath, np.zeros(32000 * 5, dtype="float32"), 32000)
+    os.utime(fpath, ns=(0, 10**9))
+
+    assert audio.get_audio_file_info(fpath) == (5.0, 32000, 1)
+
+
+@pytest.mark.parametrize(("fmin", "fmax"), [(500, 15000), (0, 3000), (1000, 8000)])
+def test_bandpass_blocks(fmin, fmax):
+    """Test that filtering consecutive blocks matches filtering the whole signal."""
+    sig = np.random.default_rng(42).uniform(-0.5, 0.5, 48000 * 5).astype("float32")
+
+    expected = audio.bandpass(sig, 48000, fmin, fmax)
+    filtered = np.concatenate(list(audio.bandpass_blocks(np.array_split(sig, 7), 48000, fmin, fmax)))
+
+    assert filtered.dtype == np.float32
+    np.testing.assert_allclose(filtered, expected, atol=1e-6)
+
+
+def test_bandpass_kaiser_fir():
+    """Test the FFT-based FIR filter against direct filtering with the same taps."""
+    from scipy.signal import lfilter
+
+    sig = np.random.default_rng(42).uniform(-0.5, 0.5, 48000 * 2).astype("float32")
+    taps = audio.get_kaiser_fir_taps(48000, 1000, 8000)
+
+    filtered = audio.bandpass_kaiser_fir(sig, 48000, 1000, 8000)
+
+    assert filtered.dtype == np.float32
+    np.testing.assert_allclose(filtered, lfilter(taps, 1.0, sig), atol=1e-5)
+
+
+def test_split_signal_writeable():
+    """Test that chunks are writable copies unless a read-only view is requested."""
+    sig = np.arange(48000 * 9, dtype="float32")
+
+    splits = audio.split_signal(sig, 48000, 3.0, 1.0, 1.0)
+    view = audio.split_signal(sig, 48000, 3.0, 1.0, 1.0, writeable=False)
+
+    np.testing.assert_array_equal(splits, view)
+    assert not view.flags.writeable
+    assert np.shares_memory(view, sig)
+
+    # Modifying a chunk does not change the signal or the overlapping chunks
+    splits[0] *= 0.5
+    assert sig[48000 * 2] == 48000 * 2
+    assert splits[1][0] == 48000 * 2
@@ -0,0 +1,132 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import birdnet_analyzer.config as cfg
+from birdnet_analyzer import model
+
+
+@pytest.fixture
+def engine_config(monkeypatch, fake_interpreter):
+    """Runs the model functions on the fake interpreter."""
+    monkeypatch.setattr(cfg, "CUSTOM_CLASSIFIER", None)
+    monkeypatch.setattr(cfg, "BATCH_SIZE", 4)
+
+    return fake_interpreter
+
+
+def test_inference_engine_batches(engine_config):
+    """Test that partial batches are padded to the next allocated shape and the padding is trimmed."""
+    engine = model.InferenceEngine("model.tflite")
+    sample = np.random.default_rng(42).uniform(-1, 1, (11, 8)).astype("float32")
+
+    outputs, vector = engine.run(sample, [engine.output_index, 1], batch_size=4)
+
+    # Two full batches and a batch of 3 samples padded to 4
+    assert sorted(engine.interpreters) == [1, 4]
+    assert engine.interpreters[4].invocations == 3
+    assert outputs.shape == (11, 3)
+    assert vector.shape == (11, 2)
+    np.testing.assert_allclose(outputs[:, 0], sample[:, 0])
+    np.testing.assert_allclose(outputs[:, 1], sample.sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(vector[:, 1], sample.max(axis=1))
+
+    # Short inputs use the next power of two, not a new shape for each length
+    engine.run(sample[:5], batch_size=8)
+    engine.run(sample[:6], batch_size=8)
+    engine.run(sample[:8], batch_size=8)
+    assert sorted(engine.interpreters) == [1, 4, 8]
+    assert model.get_batch_shapes(8) == [1, 2, 4, 8]
+
+
+def test_inference_engine_empty_input(engine_config):
+    """Test that an empty input gives empty outputs without invoking the model."""
+    engine = model.InferenceEngine("model.tflite")
+
+    outputs, vector = engine.run(np.empty((0, 8), dtype="float32"), [engine.output_index, 1])
+
+    assert outputs.shape == (0, 3)
+    assert vector.shape == (0, 2)
+    assert engine.interpreters[1].invocations == 0
+
+
+def test_inference_engine_short_samples(engine_config):
+    """Test that samples shorter than the model input are zero-padded."""
+    engine = model.InferenceEngine("model.tflite")
+    sample = np.random.default_rng(42).uniform(0.1, 1, (2, 5)).astype("float32")
+
+    outputs = engine.run(sample)[0]
+
+    assert outputs.shape == (2, 3)
+    np.testing.assert_allclose(outputs[:, 1], sample.sum(axis=1), rtol=1e-6)
+    np.testing.assert_array_equal(outputs[:, 2], [0, 0])
+
+
+def test_predict_with_embeddings_single_pass(engine_config):
+    """Test that scores and embeddings are read from a single invocation of the model."""
+    sample = np.random.default_rng(42).uniform(-1, 1, (3, 8)).astype("float32")
+
+    with patch.object(model.InferenceEngine, "run", autospec=True, side_effect=model.InferenceEngine.run) as run:
+        scores, vector = model.predict_with_embeddings(sample)
+
+    run.assert_called_once()
+    assert run.call_args.args[2] == [model.OUTPUT_LAYER_INDEX, model.EMBEDDINGS_LAYER_INDEX] == [2, 1]
+    assert sum(interpreter.invocations for interpreter in engine_config.instances) == 1
+
+    np.testing.assert_allclose(scores[:, 1], sample.sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(vector[:, 1], sample.max(axis=1))
+
+
+@pytest.mark.usefixtures("engine_config")
+def test_predict_with_embeddings_custom_classifier(monkeypatch):
+    """Test that a custom classifier on embeddings reuses the embeddings of the backbone."""
+    monkeypatch.setattr(cfg, "CUSTOM_CLASSIFIER", "classifier.tflite")
+    sample = np.random.default_rng(42).uniform(-1, 1, (3, 8)).astype("float32")
+
+    scores, vector = model.predict_with_embeddings(sample)
+
+    # One pass through the backbone and one through the classifier
+    assert sum(interpreter.invocations for interpreter in model.ENGINE.interpreters.values()) == 1
+    assert sum(interpreter.invocations for interpreter in model.C_ENGINE.interpreters.values()) == 1
+    np.testing.assert_allclose(vector[:, 0], sample.sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(scores[:, 1], vector.sum(axis=1), rtol=1e-6)
+
+    # Predictions of the custom classifier use the same path
+    with patch.object(model.InferenceEngine, "run", autospec=True, side_effect=model.InferenceEngine.run) as run:
+        np.testing.assert_array_equal(model.predict(sample), scores)
+
+    assert [(c.args[0], c.args[2] if len(c.args) > 2 else None) for c in run.call_args_list] == [
+        (model.ENGINE, [model.EMBEDDINGS_LAYER_INDEX]),
+        (model.C_ENGINE, None),
+    ]
+
+    monkeypatch.setattr(model, "C_INPUT_SIZE", 144000)
+
+    with pytest.raises(ValueError, match="raw audio"):
+        model.predict_with_embeddings(sample)
+
+
+def test_load_model_settings_changed(engine_config, monkeypatch):
+    """Test that the engine is loaded again when the model or the number of threads changes."""
+    monkeypatch.setattr(cfg, "MODEL_PATH", "fp32.tflite")
+    monkeypatch.setattr(cfg, "TFLITE_THREADS", 1)
+
+    model.load_model()
+    engine = model.ENGINE
+    model.load_model()
+
+    assert model.ENGINE is engine
+
+    monkeypatch.setattr(cfg, "MODEL_PATH", "int8.tflite")
+    model.load_model()
+
+    assert model.ENGINE is not engine
+    assert model.ENGINE.model_path.endswith("int8.tflite")
+
+    engine = model.ENGINE
+    monkeypatch.setattr(cfg, "TFLITE_THREADS", 4)
+    model.load_model()
+
+    assert model.ENGINE is not engine
+    assert model.ENGINE.num_threads == 4
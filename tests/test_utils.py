@@ -1,5 +1,8 @@
+import threading
 from pathlib import Path
 
+import pytest
+
 import birdnet_analyzer.config as cfg
 from birdnet_analyzer import utils
 
@@ -26,3 +29,36 @@ def test_read_lines_label_files():
             names = line.split("_")
             assert len(names) == 2, f"Expected two names in {line}, but got {len(names)} in {label}"
             assert original_labels[i][0] == names[0], f"Expected {original_labels[i][0]} but got {names[0]} in {label}"
+
+
+def test_prefetch():
+    assert list(utils.prefetch(range(100), 3)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise ValueError("decoding failed")
+
+    it = utils.prefetch(failing(), 2)
+
+    assert next(it) == 1
+
+    with pytest.raises(ValueError, match="decoding failed"):
+        next(it)
+
+
+def test_prefetch_close():
+    closed = threading.Event()
+
+    def produce():
+        try:
+            yield from range(1000)
+        finally:
+            closed.set()
+
+    it = utils.prefetch(produce(), 1)
+
+    assert next(it) == 0
+
+    it.close()
+
+    assert closed.is_set()